@@ -0,0 +1,307 @@
+"""
+Benchmarks the S3 path of EDepot (upload, list, verify, ACL and delete) against a local S3 stand-in.
+
+Backends:
+    inprocess  moto in the same process (moto.mock_aws); no network, lowest noise
+    server     a moto server on a local port, so requests go through HTTP
+    endpoint   any S3-compatible endpoint (e.g. a local MinIO), given with --endpoint-url
+
+Latency can be added to every request with --latency-ms, to approximate a remote store.
+Every run appends one JSON line with the git commit and the timings to the results file;
+'compare' compares two runs with the same settings and reports throughput regressions.
+
+    python benchmarks/s3_bench.py run --objects 1000 10000 --workers 16 --latency-ms 20
+    python benchmarks/s3_bench.py compare --threshold 10
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Run from a checkout without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from razu.config import Config  # noqa: E402
+from razu.transfer import TransferReport, FAILED, MISMATCH, MISSING  # noqa: E402
+
+KB = 1024
+MB = 1024 * KB
+OPERATIONS = ['upload', 'list', 'verify', 'acl', 'delete']
+DEFAULT_RESULTS_FILE = Path(__file__).resolve().parent / 'results.jsonl'
+BUCKET = 'bench0001'
+COLLECTION = 'NL-WbDRAZU-BENCH0001-1'
+
+# (fraction, min size, max size): mostly metadata files, some derivatives, a few scans above the multipart threshold
+SIZE_CLASSES = [
+    (0.80, 512, 16 * KB),
+    (0.19, 64 * KB, 2 * MB),
+    (0.01, 9 * MB, 24 * MB),
+]
+
+
+def generate_dataset(data_dir: Path, objects: int, seed: int, max_large: int) -> Path:
+    """
+    Writes a synthetic SIP of the given number of objects in mixed sizes, with its manifest, and returns the
+    manifest path. The content only depends on objects, seed and max_large, so an existing dataset is reused.
+    """
+    sip_directory = data_dir / f"objects-{objects}-seed-{seed}-large-{max_large}" / 'nl-wbdrazu' / BUCKET
+    manifest_file = sip_directory / f"{COLLECTION}.manifest.json"
+    if manifest_file.exists():
+        return manifest_file
+
+    rng = random.Random(seed)
+    entries = {}
+    large = 0
+    for i in range(objects):
+        draw = rng.random()
+        for fraction, min_size, max_size in SIZE_CLASSES:
+            draw -= fraction
+            if draw < 0:
+                break
+        if min_size >= SIZE_CLASSES[-1][1]:
+            if large >= max_large:
+                min_size, max_size = SIZE_CLASSES[0][1:]
+            else:
+                large += 1
+        size = rng.randint(min_size, max_size)
+        key = f"{COLLECTION}/{i // 1000:03d}/{COLLECTION}-{i}.meta.json"
+        path = sip_directory / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = rng.randbytes(size)
+        path.write_bytes(data)
+        entries[key] = {
+            'MD5Hash': hashlib.md5(data).hexdigest(),
+            'MD5HashDate': '2025-01-01T00:00:00',
+            'FileSize': size,
+        }
+    # Written last, so an interrupted generation is not mistaken for a complete dataset
+    manifest_file.write_text(json.dumps(entries, indent=4), encoding='utf-8')
+    return manifest_file
+
+
+@contextlib.contextmanager
+def s3_backend(backend: str, endpoint_url: Optional[str]):
+    """Sets up the S3 stand-in and the environment S3Storage reads its endpoint and credentials from."""
+    if backend == 'endpoint':
+        if not endpoint_url:
+            raise SystemExit("--endpoint-url is required for the endpoint backend")
+        os.environ['S3_ENDPOINT'] = endpoint_url
+        yield
+        return
+
+    # load_dotenv does not override these, so a .env with real credentials is never used against moto
+    os.environ.update(S3_ACCESS_KEY='bench', S3_SECRET_KEY='bench', AWS_DEFAULT_REGION='us-east-1')
+    if backend == 'inprocess':
+        from moto import mock_aws
+        os.environ['S3_ENDPOINT'] = 'https://s3.us-east-1.amazonaws.com'
+        with mock_aws():
+            yield
+    elif backend == 'server':
+        from moto.server import ThreadedMotoServer
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+        server.start()
+        try:
+            host, port = server.get_host_and_port()
+            os.environ['S3_ENDPOINT'] = f"http://{host}:{port}"
+            yield
+        finally:
+            server.stop()
+    else:
+        raise SystemExit(f"Unknown backend '{backend}'")
+
+
+def add_latency(client, latency_ms: float) -> None:
+    """Delays every request by latency_ms. Registered first, so it also runs before moto's in-process stub."""
+    def delay(**kwargs):
+        time.sleep(latency_ms / 1000)
+    client.meta.events.register_first('before-send.s3', delay)
+
+
+def run_operations(edepot, manifest_file: Path, operations: List[str], workers: int, verbose: bool) -> Dict[str, dict]:
+    sip_directory = str(manifest_file.parent)
+    manifest = str(manifest_file)
+    entries = json.loads(manifest_file.read_text(encoding='utf-8'))
+    total_bytes = sum(entry['FileSize'] for entry in entries.values())
+    edepot.check_or_create_bucket(BUCKET)
+
+    steps = {
+        'upload': lambda: edepot.store_files_from_manifest(manifest, sip_directory, workers=workers),
+        'list': lambda: edepot.list_objects(BUCKET, COLLECTION, refresh=True),
+        'verify': lambda: edepot.verify_files_from_manifest(manifest, sip_directory, workers=workers),
+        'acl': lambda: edepot.update_acl_from_manifest(manifest, sip_directory, acl='public-read', workers=workers),
+        'delete': lambda: edepot.execute_deletion_plan(
+            edepot.plan_deletion(manifest, BUCKET, plan_file=str(manifest_file.with_suffix('.delete-plan.json'))),
+            workers=workers),
+    }
+    results = {}
+    for operation in OPERATIONS:
+        if operation not in operations:
+            continue
+        edepot.metrics.reset()
+        output = sys.stdout if verbose else io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            outcome = steps[operation]()
+        seconds = time.perf_counter() - start
+        totals = edepot.metrics.totals
+        if isinstance(outcome, TransferReport):
+            failed = sum(1 for result in outcome.values() if result.status in (FAILED, MISMATCH, MISSING))
+        elif operation == 'delete':
+            failed = len(outcome['Errors']) + len(outcome['NotDeleted'])
+        else:
+            failed = 0
+        results[operation] = {
+            'seconds': round(seconds, 4),
+            'objects_per_second': round(len(entries) / seconds, 2),
+            'bytes_per_second': round(total_bytes / seconds) if operation == 'upload' else None,
+            'requests': totals.requests,
+            'failures': totals.failures,
+            'retries': totals.retries,
+            'failed_keys': failed,
+        }
+        print(f"  {operation:<7} {seconds:8.2f} s  {results[operation]['objects_per_second']:10.1f} obj/s  "
+              f"{totals.requests:7d} requests  {totals.failures} failures")
+    return results
+
+
+def git_info() -> dict:
+    root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def run(args) -> None:
+    Config.initialize(args.config)
+    from razu.edepot import EDepot
+    import boto3
+
+    data_dir = Path(args.data_dir or Path(tempfile.gettempdir()) / 'razu-bench')
+    for objects in args.objects:
+        print(f"Dataset of {objects} objects...")
+        manifest_file = generate_dataset(data_dir, objects, args.seed, args.max_large)
+        with s3_backend(args.backend, args.endpoint_url):
+            edepot = EDepot(transfer_profile=args.profile, max_pool_connections=max(10, args.workers))
+            if args.latency_ms:
+                add_latency(edepot.s3_client, args.latency_ms)
+            print(f"Running {', '.join(args.operations)} against {args.backend} "
+                  f"({args.latency_ms} ms latency, {args.workers} workers, profile {edepot.transfer_profile.name}):")
+            results = run_operations(edepot, manifest_file, args.operations, args.workers, args.verbose)
+
+        record = {
+            'time': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            **git_info(),
+            'label': args.label,
+            'settings': {
+                'objects': objects,
+                'backend': args.backend,
+                'latency_ms': args.latency_ms,
+                'workers': args.workers,
+                'profile': edepot.transfer_profile.name,
+                'seed': args.seed,
+                'max_large': args.max_large,
+            },
+            'python': platform.python_version(),
+            'boto3': boto3.__version__,
+            'results': results,
+        }
+        with open(args.results, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {args.results}")
+
+
+def load_runs(results_file: str) -> List[dict]:
+    with open(results_file, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(args) -> int:
+    """Compares the latest run with the previous run (or the given commits) with the same settings."""
+    runs = load_runs(args.results)
+    if not runs:
+        raise SystemExit(f"No runs in {args.results}")
+
+    def matches(run_record: dict, commit: Optional[str]) -> bool:
+        return commit is None or (run_record.get('commit') or '').startswith(commit)
+
+    candidates = [run_record for run_record in runs if matches(run_record, args.current)]
+    if not candidates:
+        raise SystemExit(f"No run for commit {args.current}")
+    current = candidates[-1]
+    earlier = [run_record for run_record in runs[:runs.index(current)] if run_record['settings'] == current['settings']
+               and matches(run_record, args.baseline)]
+    if not earlier:
+        raise SystemExit("No earlier run with the same settings to compare with")
+    baseline = earlier[-1]
+
+    print(f"Baseline {(baseline.get('commit') or '?')[:10]} ({baseline['time']}) -> "
+          f"current {(current.get('commit') or '?')[:10]} ({current['time']}), settings {current['settings']}")
+    regressions = 0
+    for operation in OPERATIONS:
+        if operation not in baseline['results'] or operation not in current['results']:
+            continue
+        before = baseline['results'][operation]['objects_per_second']
+        after = current['results'][operation]['objects_per_second']
+        change = (after - before) / before * 100 if before else 0.0
+        regression = change < -args.threshold
+        regressions += regression
+        print(f"  {operation:<7} {before:10.1f} -> {after:10.1f} obj/s  {change:+6.1f}%"
+              + ("  REGRESSION" if regression else ""))
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the EDepot S3 path against a local S3 stand-in.")
+    parser.add_argument('--results', default=str(DEFAULT_RESULTS_FILE), help="JSON lines file with the runs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run the benchmark and append the results")
+    run_parser.add_argument('--objects', type=int, nargs='+', default=[1000],
+                            help="dataset sizes, e.g. 1000 10000 100000 (default: 1000)")
+    run_parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+    run_parser.add_argument('--backend', choices=['inprocess', 'server', 'endpoint'], default='inprocess')
+    run_parser.add_argument('--endpoint-url', help="S3 endpoint for the endpoint backend")
+    run_parser.add_argument('--latency-ms', type=float, default=0, help="latency added to every request")
+    run_parser.add_argument('--workers', type=int, default=16)
+    run_parser.add_argument('--profile', help="transfer profile (default: from config.yaml or 'default')")
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--max-large', type=int, default=20, help="maximum number of multipart-sized objects")
+    run_parser.add_argument('--data-dir', help="where datasets are generated and kept (default: temp dir)")
+    run_parser.add_argument('--config', help="config.yaml to use (default: the usual lookup)")
+    run_parser.add_argument('--label', help="free text stored with the run, e.g. the change being measured")
+    run_parser.add_argument('--verbose', action='store_true', help="show the output of the EDepot operations")
+
+    compare_parser = subparsers.add_parser('compare', help="compare the latest run with an earlier one")
+    compare_parser.add_argument('--baseline', help="commit (prefix) of the baseline run")
+    compare_parser.add_argument('--current', help="commit (prefix) of the run to check (default: the latest)")
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help="throughput drop in percent reported as a regression (default: 10)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 # load two logs text files generated from delete_objects_from_manifest method in edepot.py and compare line-by-line
+# for a read-only comparison that also checks checksums, use razu-manifest-diff (tools/manifest_diff.py)
 
 file_a = "logs/objects_in_manifest.txt"
 file_b = "logs/s3_objects_found_from_manifest.txt"
@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from razu.s3storage import RemoteObject
+
+
+class AclCache:
+    """
+    Remembers which canned ACL was applied to which object, stored as JSON next to the manifest.
+
+    An entry is only trusted while the object's listing marker (ETag and LastModified) is unchanged:
+    uploading an object again resets its ACL, and also changes its LastModified.
+    """
+    ACL_CACHE_SUFFIX = ".acl.json"
+
+    def __init__(self, cache_file: str):
+        self.cache_file = str(cache_file)
+        self.entries: Dict[str, dict] = {}
+        self.is_modified = False
+        if Path(self.cache_file).exists():
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @classmethod
+    def for_manifest(cls, manifest_file: str) -> 'AclCache':
+        """Open the ACL cache that belongs to a manifest file, e.g. 'x.manifest.json' -> 'x.manifest.acl.json'."""
+        return cls(str(Path(manifest_file).with_suffix(cls.ACL_CACHE_SUFFIX)))
+
+    def has_acl(self, remote: RemoteObject, acl: str) -> bool:
+        """True if the acl was applied to this exact version of the object."""
+        entry = self.entries.get(remote.key)
+        return entry is not None and entry == self._entry(remote, acl)
+
+    def set_acl(self, remote: Optional[RemoteObject], key: str, acl: str) -> None:
+        if remote is None:
+            self.entries.pop(key, None)
+        else:
+            self.entries[key] = self._entry(remote, acl)
+        self.is_modified = True
+
+    def save(self) -> None:
+        """Save the cache, but only if it has been modified."""
+        if self.is_modified:
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1)
+            self.is_modified = False
+
+    @staticmethod
+    def _entry(remote: RemoteObject, acl: str) -> dict:
+        return {'acl': acl, 'etag': remote.etag, 'last_modified': remote.last_modified}
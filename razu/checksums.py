@@ -0,0 +1,93 @@
+"""S3 additional checksums (SHA-256, SHA-1, CRC32, CRC32C), computed locally in the form S3 stores them."""
+
+import base64
+import hashlib
+import zlib
+from typing import List, Optional
+
+try:
+    from awscrt import checksums as crt_checksums
+except ImportError:  # CRC32C needs awscrt, e.g. pip install boto3[crt]
+    crt_checksums = None
+
+CHECKSUM_ALGORITHMS = ('SHA256', 'SHA1', 'CRC32', 'CRC32C')
+# S3 only stores a full-object checksum of a multipart upload for CRC algorithms; SHA checksums are composite
+FULL_OBJECT_ALGORITHMS = ('CRC32', 'CRC32C')
+
+
+class Checksum:
+    """Incremental checksum of one of the CHECKSUM_ALGORITHMS, with the digest S3 expects (big-endian for CRCs)."""
+
+    def __init__(self, algorithm: str):
+        self.algorithm = normalize_algorithm(algorithm)
+        self._hash = hashlib.new(self.algorithm.lower()) if self.algorithm.startswith('SHA') else None
+        self._crc = 0
+
+    def update(self, data: bytes) -> None:
+        if self._hash is not None:
+            self._hash.update(data)
+        elif self.algorithm == 'CRC32':
+            self._crc = zlib.crc32(data, self._crc)
+        else:
+            self._crc = crt_checksums.crc32c(data, self._crc)
+
+    def digest(self) -> bytes:
+        return self._hash.digest() if self._hash is not None else self._crc.to_bytes(4, 'big')
+
+    @property
+    def value(self) -> str:
+        """The base64 encoded digest, as in the Checksum<algorithm> field of S3 requests and responses."""
+        return base64.b64encode(self.digest()).decode('ascii')
+
+
+def normalize_algorithm(algorithm: str) -> str:
+    """The algorithm name as S3 uses it, e.g. 'sha256' -> 'SHA256'. Raises ValueError if it is not available."""
+    normalized = algorithm.upper().replace('-', '')
+    if normalized not in CHECKSUM_ALGORITHMS:
+        raise ValueError(f"Unknown checksum algorithm '{algorithm}'. Available: {', '.join(CHECKSUM_ALGORITHMS)}")
+    if normalized == 'CRC32C' and crt_checksums is None:
+        raise ValueError("CRC32C checksums need the awscrt package (pip install boto3[crt])")
+    return normalized
+
+
+def checksum_field(algorithm: str) -> str:
+    """The name of the request and response field holding a checksum, e.g. 'ChecksumSHA256'."""
+    return f"Checksum{algorithm}"
+
+
+def composite_value(algorithm: str, part_digests: List[bytes]) -> str:
+    """The composite checksum of a multipart upload: the checksum of the part digests, '-' and the number of parts."""
+    checksum = Checksum(algorithm)
+    for digest in part_digests:
+        checksum.update(digest)
+    return f"{checksum.value}-{len(part_digests)}"
+
+
+def calculate_file_checksum(file_path, algorithm: str, part_size: Optional[int] = None,
+                            full_object: bool = True) -> str:
+    """
+    Calculate the checksum S3 stores for a file: of the whole file, or, for a multipart upload with a
+    composite checksum, of the checksums of its parts of part_size.
+    """
+    whole = Checksum(algorithm)
+    part_digests = []
+    with open(file_path, "rb") as f:
+        if part_size is None:
+            while chunk := f.read(1024 * 1024):
+                whole.update(chunk)
+            return whole.value
+        while True:
+            part = Checksum(algorithm)
+            remaining = part_size
+            while remaining > 0 and (chunk := f.read(min(remaining, 1024 * 1024))):
+                whole.update(chunk)
+                part.update(chunk)
+                remaining -= len(chunk)
+            if remaining == part_size:
+                break
+            part_digests.append(part.digest())
+    if full_object:
+        return whole.value
+    if not part_digests:
+        part_digests.append(Checksum(algorithm).digest())
+    return composite_value(algorithm, part_digests)
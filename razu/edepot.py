@@ -1,15 +1,30 @@
 import os
 import json
+import time
+import urllib.parse
 from datetime import datetime
+from pathlib import Path
 from rdflib.namespace import SKOS
 from typing import Any, Callable, TypeVar, Optional, Dict, List, Union
 
+from razu.acl_cache import AclCache
 from razu.concept_resolver import Concept
+from razu.ingest_journal import IngestJournal
 from razu.manifest import Manifest
-from razu.s3storage import S3Storage
+from razu.metrics import Progress
+from razu.s3storage import (S3Storage, RemoteObject, UploadResult, CopyResult, ChecksumMismatchError,
+                            PART_SIZE_METADATA_KEY)
+from razu.throttle import error_code
+from razu.transfer import (TransferResult, TransferReport, run_concurrently, schedule_by_size, UPLOADED, UPDATED,
+                           COPIED, DOWNLOADED, SKIPPED, FAILED, VERIFIED, MISMATCH, MISSING, UNVERIFIABLE_MULTIPART,
+                           NO_CHECKSUM)
+import razu.util as util
 
 T = TypeVar('T')
 
+DELETE_PLAN_SUFFIX = ".delete-plan.json"
+RESTORE_JOURNAL_SUFFIX = ".restore.journal.jsonl"
+
 class EDepot(S3Storage):
     """
     Provides RAZU-specific e-depot functionality, extending the S3Storage class.
@@ -41,6 +56,48 @@ class EDepot(S3Storage):
         else:
             raise ValueError(f"Kan bucket_name niet bepalen uit manifest_file: '{manifest_file}' (geen 'nl-wbdrazu' in pad)")
 
+    @staticmethod
+    def _get_collection_prefix(manifest: Manifest) -> str:
+        """
+        Bepaalt de langste gemeenschappelijke prefix van alle keys in het manifest,
+        zodat één listing van die prefix de hele collectie dekt.
+        """
+        return os.path.commonprefix(list(manifest.entries.keys())) if manifest.entries else ""
+
+    @staticmethod
+    def _get_manifest_prefix(manifest: Manifest) -> str:
+        """
+        Bepaalt de prefix van de toegang uit de naam van het manifest-bestand,
+        bijv. 'NL-WbDRAZU-K50907905-500' voor 'NL-WbDRAZU-K50907905-500.manifest.json'.
+        """
+        return Path(manifest.manifest_filename).name.split(".")[0]
+
+    @staticmethod
+    def is_unchanged(remote: RemoteObject, properties: dict) -> bool:
+        """
+        Checks whether a listed single-part object matches a manifest entry, by comparing its ETag to the
+        MD5Hash. Multipart ETags are not an MD5, so a multipart object never counts as unchanged here;
+        see _is_multipart_unchanged.
+        """
+        return not remote.is_multipart and remote.etag == properties.get('MD5Hash')
+
+    def _is_multipart_unchanged(self, bucket_name: str, remote: RemoteObject, local_filename: str,
+                                properties: dict) -> bool:
+        """
+        Checks whether a listed multipart object matches the local file, by comparing its ETag to the
+        composite ETag calculated with the part size from the manifest or (with a HEAD request) from the
+        object's PartSize metadata. False when the part size is unknown.
+        """
+        if properties.get('FileSize') is not None and int(properties['FileSize']) != remote.size:
+            return False
+        part_size = properties.get(PART_SIZE_METADATA_KEY)
+        if part_size is None:
+            metadata = self.controller.call(self.get_file_metadata, bucket_name, remote.key) or {}
+            part_size = metadata.get(PART_SIZE_METADATA_KEY.lower())
+        if part_size is None or not os.path.exists(local_filename):
+            return False
+        return util.calculate_multipart_etag(local_filename, int(part_size)) == remote.etag
+
     def print_output(self, method: Callable[..., T], *args, print_output: bool = True, 
                                   pretty_print: bool = True, **kwargs) -> Optional[T]:
         """
@@ -105,7 +162,10 @@ class EDepot(S3Storage):
             # If reference manifest doesn't exist, include all files
             return lambda key, entry: True
 
-    def store_files_from_manifest(self, manifest_file, sip_directory, only_if_new=False, file_filter=None):
+    def store_files_from_manifest(self, manifest_file, sip_directory, only_if_new=False, file_filter=None,
+                                  workers: int = 1, max_bytes_in_flight: Optional[int] = None,
+                                  sync: bool = False, use_journal: bool = False,
+                                  compute_sha256: bool = False) -> TransferReport:
         """
         Stores files listed in the manifest into their respective S3 buckets.
 
@@ -114,42 +174,129 @@ class EDepot(S3Storage):
         :param only_if_new: If True, only upload files if the key does not already exist in the bucket.
         :param file_filter: Optional callable that takes (key, entry) and returns True if file should be uploaded.
                            Example: lambda key, entry: entry.md5date >= '2024-01-01T00:00:00'
+        :param workers: Number of files to upload concurrently. The S3 client is shared by all workers,
+                        so its max_pool_connections should be at least this number. With more than one worker,
+                        files are uploaded largest first (by FileSize), with small files interleaved.
+        :param max_bytes_in_flight: Optional cap on the total size of the files being uploaded at the same time.
+        :param sync: If True, list the collection prefix once and only upload files that are missing in the
+                     bucket or whose ETag differs: for single-part objects the manifest MD5Hash, for multipart
+                     objects the composite ETag calculated from the local file (with a HEAD request for the
+                     PartSize when the manifest has none). Replaces the per-key HEAD requests of only_if_new.
+        :param use_journal: If True, record every completed upload in an IngestJournal next to the manifest and
+                            skip keys the journal already lists with the same MD5Hash, so an interrupted run can
+                            be restarted. Unfinished multipart uploads recorded in the journal are resumed.
+        :param compute_sha256: If True, also compute the SHA-256 of every file while it is uploaded; it is
+                               recorded in the journal. The MD5 is always computed in the same pass and
+                               checked against the manifest MD5Hash; files that do not match are not stored.
+        :return: A TransferReport with an uploaded, skipped or failed result for every manifest key.
         """
         manifest = Manifest.load_existing(sip_directory, manifest_file)
-        # Bepaal bucket_name één keer (op basis van eerste entry)
         # Bepaal bucket_name als het padsegment na 'nl-wbdrazu', zonder begin/eindslash
         bucket_name = self._get_bucket_name(manifest_file)
         print(f"{manifest_file} verwerken.")
-        
-        filtered_count = 0
-        uploaded_count = 0
-        
+
+        journal = IngestJournal.for_manifest(manifest.manifest_file_path) if use_journal else None
+        remote_objects = self.list_objects(bucket_name, self._get_collection_prefix(manifest)) if sync else {}
+
+        report = TransferReport()
+        to_upload = []
         for key, entry in manifest.entries.items():
-            local_filename = os.path.join(sip_directory, key)
-            properties = entry.to_dict()
-            
             # Apply custom filter if provided
             if file_filter and not file_filter(key, entry):
-                filtered_count += 1
-                print(f"SKIP-FILTERED: {key}", end="\r")
+                report.add(TransferResult(key, SKIPPED, reason="filtered"))
                 continue
-                
-            if only_if_new:
-                # Check of de key al bestaat in de bucket
-                meta = self.get_file_metadata(bucket_name, key)
-                if meta is not None:
-                    print(f"SKIP-EXISTING: {key}", end="\r")
-                    continue
-                    
-            self.store_file(bucket_name, key, local_filename, properties)
-            uploaded_count += 1
-
-        print(f"\nUpload voltooid: {uploaded_count} bestanden geüpload, {filtered_count} gefilterd.")
+            properties = entry.to_dict()
+            if journal and journal.is_completed(key, entry.md5hash):
+                record = journal.completed[key]
+                report.add(TransferResult(key, SKIPPED, size=record.get('size') or 0, etag=record.get('etag'),
+                                          reason="journal"))
+                continue
+            remote = remote_objects.get(key)
+            if remote is not None and self.is_unchanged(remote, properties):
+                report.add(TransferResult(key, SKIPPED, size=remote.size, etag=remote.etag, reason="unchanged"))
+                continue
+            to_upload.append((key, os.path.join(sip_directory, key), properties))
+        # Multipart objects are compared by their composite ETag by the workers, before uploading
+        multipart_remotes = {key: remote for key, remote in remote_objects.items() if remote.is_multipart}
+        if workers > 1:
+            to_upload = schedule_by_size(to_upload, self._local_size, self.transfer_config.multipart_threshold)
+
+        def upload(item) -> TransferResult:
+            key, local_filename, properties = item
+            try:
+                remote = multipart_remotes.get(key)
+                if remote is not None and self._is_multipart_unchanged(bucket_name, remote, local_filename,
+                                                                       properties):
+                    return TransferResult(key, SKIPPED, size=remote.size, etag=remote.etag, reason="unchanged")
+                if only_if_new and self.controller.call(self.get_file_metadata, bucket_name, key) is not None:
+                    return TransferResult(key, SKIPPED, reason="exists")
+                if journal is None:
+                    uploaded = self.controller.call(self.put_file, bucket_name, key, local_filename, properties,
+                                                    expected_md5=properties.get('MD5Hash'),
+                                                    compute_sha256=compute_sha256)
+                else:
+                    # An unfinished multipart upload is recorded in the journal, so the next run resumes it
+                    uploaded = self.controller.call(self._put_file_journaled, journal, bucket_name, key,
+                                                    local_filename, properties, compute_sha256)
+                return TransferResult(key, UPLOADED, size=uploaded.size, etag=uploaded.etag)
+            except Exception as e:
+                return TransferResult(key, FAILED, error=f"{type(e).__name__}: {e}")
+
+        progress = Progress("Upload", total=len(to_upload))
+        try:
+            for result in run_concurrently(to_upload, upload, workers,
+                                           size_of=self._local_size, max_bytes_in_flight=max_bytes_in_flight):
+                report.add(result)
+                progress.add(result)
+        finally:
+            progress.close()
+            if journal:
+                journal.close()
+
+        summary = report.summary
+        print(f"Upload voltooid: {summary.get(UPLOADED, 0)} bestanden geüpload, "
+              f"{summary.get(SKIPPED, 0)} overgeslagen, {summary.get(FAILED, 0)} mislukt.")
 
         # Upload manifest file zelf
         manifest_rel_key = os.path.relpath(manifest_file, sip_directory)
-        print(manifest_rel_key)
-        self.store_file(bucket_name, manifest_rel_key, manifest_file, {})
+        report.add(self._upload_manifest(bucket_name, manifest_rel_key, manifest_file))
+        return report
+
+    def _put_file_journaled(self, journal: IngestJournal, bucket_name: str, key: str, local_filename: str,
+                            properties: dict, compute_sha256: bool = False) -> UploadResult:
+        """Uploads a file, resuming its unfinished multipart upload if the journal has one, and records it."""
+        md5hash = properties.get('MD5Hash')
+        unfinished = journal.get_multipart_upload(key, md5hash) or {}
+        uploaded = self.put_file(
+            bucket_name, key, local_filename, properties,
+            expected_md5=md5hash,
+            compute_sha256=compute_sha256,
+            upload_id=unfinished.get('upload_id'),
+            part_size=unfinished.get('part_size'),
+            on_multipart_started=lambda upload_id, part_size: journal.record_multipart_started(
+                key, upload_id, part_size, md5hash)
+        )
+        journal.record_completed(key, uploaded.etag, uploaded.md5, uploaded.size, sha256=uploaded.sha256,
+                                 checksum_algorithm=uploaded.checksum_algorithm, checksum=uploaded.checksum)
+        return uploaded
+
+    def _upload_manifest(self, bucket_name: str, manifest_rel_key: str, manifest_file: str) -> TransferResult:
+        try:
+            uploaded = self.controller.call(self.put_file, bucket_name, manifest_rel_key, manifest_file, {})
+            return TransferResult(manifest_rel_key, UPLOADED, size=uploaded.size, etag=uploaded.etag)
+        except Exception as e:
+            return TransferResult(manifest_rel_key, FAILED, error=f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    def _local_size(item) -> int:
+        """Size of a (key, local_filename, properties) upload item, preferring the manifest FileSize."""
+        _, local_filename, properties = item
+        if properties.get('FileSize') is not None:
+            return int(properties['FileSize'])
+        try:
+            return os.path.getsize(local_filename)
+        except OSError:
+            return 0
 
     def delete_files_from_manifest(self, manifest_file, bucket_name):
             """
@@ -165,11 +312,12 @@ class EDepot(S3Storage):
             After prompting the user twice, the 'delete_objects' method is called with the list of objects found in s3 to delete 'objects to delete'.
             Since the delete_objects method in boto3 doesn't flag files not found as errors but simply saves them in the 'Deleted' list, we call again 'get_bucket_contents' to find objects in the bucket that correspond to the prefix in the manifest
             If by any chance, some files were not deleted they are logged in the delete_log files as well under key 'NotDeleted'
+            For scripted, non-interactive cleanups use plan_deletion followed by execute_deletion_plan.
 
             """
             # Load manifest and get toegang prefix
             manifest = Manifest.load_existing(save_directory=os.path.dirname(manifest_file), manifest_filename=os.path.basename(manifest_file))
-            manifest_prefix = manifest.manifest_filename.split(".")[0]
+            manifest_prefix = self._get_manifest_prefix(manifest)
 
             # save list of objects in manifest
             with open("logs/objects_in_manifest.txt", "w") as f:
@@ -254,21 +402,440 @@ class EDepot(S3Storage):
                     print("Operation Cancelled.")
                     return
 
-    def validate_uploaded_files_from_manifest(self, manifest_file, sip_directory):
+    def update_metadata_from_manifest(self, manifest_file, sip_directory, fields: Optional[List[str]] = None,
+                                      file_filter=None, workers: int = 8) -> TransferReport:
+        """
+        Merges the properties of the manifest entries (ManifestEntry.to_dict, e.g. a refreshed MD5HashDate)
+        into the metadata of the stored objects, for example after a fixity run.
+
+        Existing metadata fields that are not in the manifest are kept. Objects whose metadata would not
+        change are skipped without a copy; with a fresh inventory that check needs no request at all.
+        Changed objects are copied onto themselves, concurrently, keeping their Content-Type and ACL.
+
+        :param manifest_file: The path to the manifest file.
+        :param sip_directory: The directory where the files listed in the manifest are located.
+        :param fields: Optional list of manifest properties to merge, e.g. ['MD5HashDate']. Defaults to all.
+        :param file_filter: Optional callable that takes (key, entry) and returns True if the metadata should be updated.
+        :param workers: Number of objects to update concurrently.
+        :return: A TransferReport with an updated, skipped, missing or failed result per key.
+        """
+        manifest = Manifest.load_existing(sip_directory, manifest_file)
+        bucket_name = self._get_bucket_name(manifest_file)
+
+        report = TransferReport()
+        to_update = []
+        for key, entry in manifest.entries.items():
+            if file_filter and not file_filter(key, entry):
+                report.add(TransferResult(key, SKIPPED, reason="filtered"))
+                continue
+            properties = {name: value for name, value in entry.to_dict().items()
+                          if value is not None and (fields is None or name in fields)}
+            to_update.append((key, properties))
+
+        def update(item) -> TransferResult:
+            key, properties = item
+            try:
+                # Met een verse inventaris kan de vergelijking zonder HEAD-verzoek
+                current = self.controller.call(self.get_file_metadata, bucket_name, key)
+                if current is None:
+                    return TransferResult(key, MISSING)
+
+                current = {name: urllib.parse.unquote(value) for name, value in current.items()}
+                merged = {**current, **{name.lower(): str(value) for name, value in properties.items()}}
+                if merged == current:
+                    return TransferResult(key, SKIPPED, reason="unchanged")
+
+                copied = self._copy_keeping_acl(bucket_name, key, bucket_name, key,
+                                                metadata=self._encode_metadata(merged))
+                return TransferResult(key, UPDATED, size=copied.size, etag=copied.etag)
+            except Exception as e:
+                return TransferResult(key, FAILED, error=f"{type(e).__name__}: {e}")
+
+        progress = Progress("Metadata update", total=len(to_update))
+        for result in run_concurrently(to_update, update, workers):
+            report.add(result)
+            progress.add(result)
+        progress.close()
+
+        summary = report.summary
+        print(f"Metadata update voltooid: {summary.get(UPDATED, 0)} bestanden bijgewerkt, "
+              f"{summary.get(SKIPPED, 0)} overgeslagen, {summary.get(FAILED, 0) + summary.get(MISSING, 0)} mislukt.")
+        return report
+
+    def migrate_prefix(self, source_bucket: str, prefix: str, target_bucket: str, target_prefix: Optional[str] = None,
+                       workers: int = 8) -> TransferReport:
+        """
+        Copies all objects under a prefix to another bucket (or prefix) server-side, e.g. to move the archive
+        of a municipality to a new bucket. No data passes through this host.
+
+        Objects are copied concurrently, largest first, with copy_file, keeping their metadata, Content-Type
+        and ACL; multipart objects keep their ETag. Objects already present in the target with the same ETag
+        and size are skipped, so an interrupted migration can simply be run again. The source is not deleted;
+        use plan_deletion and execute_deletion_plan for that once the migration is verified.
+
+        :param source_bucket: The bucket to copy from.
+        :param prefix: The prefix of the keys to copy, e.g. 'nl-wbdrazu/g0321/'.
+        :param target_bucket: The bucket to copy to. It must exist.
+        :param target_prefix: Optional prefix replacing prefix in the target keys. Defaults to prefix.
+        :param workers: Number of objects to copy concurrently.
+        :return: A TransferReport with a copied, skipped or failed result per source key.
+        """
+        target_prefix = prefix if target_prefix is None else target_prefix
+        print(f"Migratie van {source_bucket}/{prefix} naar {target_bucket}/{target_prefix}.")
+        existing = self.list_objects(target_bucket, target_prefix or None)
+
+        report = TransferReport()
+        to_copy = []
+        for remote in self.iter_objects(source_bucket, prefix or None):
+            target_key = target_prefix + remote.key[len(prefix):]
+            copied = existing.get(target_key)
+            if copied is not None and copied.etag == remote.etag and copied.size == remote.size:
+                report.add(TransferResult(remote.key, SKIPPED, size=remote.size, etag=remote.etag, reason="exists"))
+                continue
+            to_copy.append((remote, target_key))
+        to_copy = schedule_by_size(to_copy, lambda item: item[0].size, self.transfer_config.multipart_threshold)
+
+        def copy(item) -> TransferResult:
+            remote, target_key = item
+            try:
+                copied = self._copy_keeping_acl(source_bucket, remote.key, target_bucket, target_key)
+                return TransferResult(remote.key, COPIED, size=copied.size, etag=copied.etag)
+            except Exception as e:
+                return TransferResult(remote.key, FAILED, error=f"{type(e).__name__}: {e}")
+
+        progress = Progress("Migratie", total=len(to_copy))
+        for result in run_concurrently(to_copy, copy, workers):
+            report.add(result)
+            progress.add(result)
+        progress.close()
+
+        summary = report.summary
+        print(f"Migratie voltooid: {summary.get(COPIED, 0)} objecten gekopieerd, "
+              f"{summary.get(SKIPPED, 0)} overgeslagen, {summary.get(FAILED, 0)} mislukt.")
+        return report
+
+    def _copy_keeping_acl(self, source_bucket: str, source_key: str, bucket_name: str, object_key: str,
+                          metadata: Optional[dict] = None, content_type: Optional[str] = None) -> CopyResult:
+        """
+        Copies an object with copy_file and gives the copy the ACL of the source. An ACL that is not a canned
+        ACL is put on the copy afterwards, with the owner of the copy, which differs from the source owner when
+        the target bucket belongs to another account; grants to the source owner are given to that owner.
+        """
+        acl = self.controller.call(self.s3_client.get_object_acl, Bucket=source_bucket, Key=source_key)
+        source_owner_id = acl.get('Owner', {}).get('ID')
+        canned_acl = self.canned_acl_for_grants(acl['Grants'])
+        # canned_acl_for_grants only looks at group grants; grants to other accounts need the full ACL
+        if any(grant['Grantee'].get('Type') != 'Group' and grant['Grantee'].get('ID') != source_owner_id
+               for grant in acl['Grants']):
+            canned_acl = None
+        copied = self.controller.call(self.copy_file, source_bucket, source_key, bucket_name, object_key,
+                                      metadata=metadata, acl=canned_acl or 'private', content_type=content_type)
+        if canned_acl is None:
+            # Grants other than those of a canned ACL cannot be passed to a copy request
+            owner = self.controller.call(self.s3_client.get_object_acl, Bucket=bucket_name, Key=object_key)['Owner']
+            grants = []
+            for grant in acl['Grants']:
+                if grant['Grantee'].get('ID') == source_owner_id:
+                    grantee = {'Type': 'CanonicalUser', 'ID': owner['ID']}
+                    grant = {'Grantee': grantee, 'Permission': grant['Permission']}
+                grants.append(grant)
+            self.controller.call(self.s3_client.put_object_acl, Bucket=bucket_name, Key=object_key,
+                                 AccessControlPolicy={'Grants': grants, 'Owner': owner})
+        return copied
+
+    def plan_deletion(self, manifest_file, bucket_name, plan_file: Optional[str] = None) -> str:
+        """
+        Writes a deletion plan: the keys currently found in the bucket under the prefix of the manifest.
+        This is the non-interactive first step of delete_files_from_manifest; review or archive the plan,
+        then run execute_deletion_plan.
+
+        :param manifest_file: The path to the manifest file.
+        :param bucket_name: The name of the bucket where the files are stored.
+        :param plan_file: Where to write the plan. Defaults to '<manifest>.delete-plan.json' next to the manifest.
+        :return: The path of the plan file.
+        """
+        manifest = Manifest.load_existing(save_directory=os.path.dirname(manifest_file), manifest_filename=os.path.basename(manifest_file))
+        manifest_prefix = self._get_manifest_prefix(manifest)
+        plan_file = plan_file or str(Path(manifest_file).with_suffix(DELETE_PLAN_SUFFIX))
+
+        objects = [{"Key": obj.key, "ETag": obj.etag, "Size": obj.size} for obj in self.list_objects(bucket_name, manifest_prefix).values()]
+        plan = {
+            "bucket": bucket_name,
+            "prefix": manifest_prefix,
+            "manifest": os.path.abspath(manifest_file),
+            "manifest_entries": len(manifest.entries),
+            "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "objects": objects
+        }
+        with open(plan_file, "w", encoding="utf-8") as f:
+            json.dump(plan, f, indent=4)
+
+        print(f"There are {len(manifest.entries)} objects in the manifest, of which {len(objects)} were found in the bucket.")
+        print(f"Deletion plan written to {plan_file}")
+        return plan_file
+
+    def execute_deletion_plan(self, plan_file: str, workers: int = 4, max_attempts: int = 3) -> dict:
+        """
+        Deletes the objects of a plan written by plan_deletion, without asking for confirmation.
+
+        Objects are deleted in concurrent delete_objects batches; keys that fail are retried with backoff
+        up to max_attempts times. Afterwards the prefix is listed again to confirm that no key from the plan
+        is left. The log is written next to the plan as '<plan>.log.json'.
+
+        :param plan_file: The path of the plan file.
+        :param workers: Number of delete_objects batches to run concurrently.
+        :param max_attempts: Number of attempts per key.
+        :return: The log: the number of deleted objects, the remaining errors and the keys not deleted.
+        """
+        with open(plan_file, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+        bucket_name = plan["bucket"]
+
+        print(f"Deleting {len(plan['objects'])} objects from bucket '{bucket_name}'...")
+        to_delete = [{"Key": obj["Key"]} for obj in plan["objects"]]
+        deleted_count = 0
+        errors = []
+        for attempt in range(1, max_attempts + 1):
+            deleted, errors = self.delete_objects_in_batches(bucket_name, to_delete, workers=workers)
+            deleted_count += deleted
+            if not errors or attempt == max_attempts:
+                break
+            print(f"{len(errors)} objects could not be deleted, retrying (attempt {attempt + 1} of {max_attempts})...")
+            time.sleep(2 ** attempt)
+            to_delete = [{"Key": error["Key"]} for error in errors]
+
+        # look again in the bucket (not the inventory) to confirm that no key from the plan is left
+        planned_keys = {obj["Key"] for obj in plan["objects"]}
+        not_deleted = [obj.key for obj in self.iter_objects(bucket_name, plan["prefix"]) if obj.key in planned_keys]
+
+        delete_log = {
+            "plan": os.path.abspath(plan_file),
+            "executed": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "Deleted": deleted_count,
+            "Errors": errors,
+            "NotDeleted": not_deleted
+        }
+        log_file = str(Path(plan_file).with_suffix(".log.json"))
+        with open(log_file, "w", encoding="utf-8") as f:
+            json.dump(delete_log, f, indent=4)
+
+        print(f"Deletion complete: {deleted_count} deleted, {len(errors)} errors, {len(not_deleted)} not deleted.")
+        if errors or not_deleted:
+            print(f"Check {log_file} for details.")
+        return delete_log
+
+    def validate_uploaded_files_from_manifest(self, manifest_file, sip_directory, workers: int = 8) -> TransferReport:
         """
         Validates that files listed in the manifest were correctly uploaded by comparing their checksums.
+        Prints a summary and every key that could not be verified.
+
+        :param manifest_file: The path to the manifest file.
+        :param sip_directory: The directory where the files listed in the manifest are located.
+        :param workers: Number of concurrent HEAD requests and local multipart ETag calculations.
+        :return: The TransferReport of verify_files_from_manifest.
+        """
+        report = self.verify_files_from_manifest(manifest_file, sip_directory, workers=workers)
+        for result in report.values():
+            if result.status != VERIFIED:
+                print(f"{result.status.upper()}: {result.key}" + (f" ({result.reason})" if result.reason else ""))
+        summary = report.summary
+        print(f"Validatie voltooid: {summary.get(VERIFIED, 0)} geverifieerd, {summary.get(MISMATCH, 0)} afwijkend, "
+              f"{summary.get(MISSING, 0)} ontbrekend, {summary.get(UNVERIFIABLE_MULTIPART, 0)} niet verifieerbaar.")
+        return report
+
+    def verify_files_from_manifest(self, manifest_file, sip_directory, workers: int = 8) -> TransferReport:
+        """
+        Verifies all manifest entries against a single paginated listing of the collection prefix.
+
+        Single-part objects are verified by comparing the listed ETag with the manifest MD5Hash. Multipart
+        objects are verified by calculating the composite ETag from the local file; only when the manifest
+        entry has no PartSize is a HEAD request made to read it from the object metadata. These fallbacks
+        run concurrently.
 
         :param manifest_file: The path to the manifest file.
         :param sip_directory: The directory where the files listed in the manifest are located.
+        :param workers: Number of concurrent HEAD requests and local multipart ETag calculations.
+        :return: A TransferReport with a verified, mismatch, missing or unverifiable-multipart result per key.
         """
         manifest = Manifest.load_existing(sip_directory, manifest_file)
         bucket_name = self._get_bucket_name(manifest_file)
-        for filename, entry in manifest.entries.items():
+        remote_objects = self.list_objects(bucket_name, self._get_collection_prefix(manifest))
+
+        report = TransferReport()
+        multipart = []
+        for key, entry in manifest.entries.items():
             properties = entry.to_dict()
-            md = properties["MD5Hash"]
-            self.verify_upload(bucket_name, filename, md)
+            remote = remote_objects.get(key)
+            if remote is None:
+                report.add(TransferResult(key, MISSING))
+            elif not remote.is_multipart:
+                status = VERIFIED if remote.etag == properties.get('MD5Hash') else MISMATCH
+                report.add(TransferResult(key, status, size=remote.size, etag=remote.etag,
+                                          reason="etag" if status == MISMATCH else None))
+            elif properties.get('FileSize') is not None and int(properties['FileSize']) != remote.size:
+                report.add(TransferResult(key, MISMATCH, size=remote.size, etag=remote.etag, reason="size"))
+            else:
+                multipart.append((key, os.path.join(sip_directory, key), properties, remote))
+
+        def verify_multipart(item) -> TransferResult:
+            key, local_filename, properties, remote = item
+            try:
+                part_size = properties.get(PART_SIZE_METADATA_KEY)
+                if part_size is None:
+                    metadata = self.controller.call(self.get_file_metadata, bucket_name, key) or {}
+                    part_size = metadata.get(PART_SIZE_METADATA_KEY.lower())
+                if part_size is None or not os.path.exists(local_filename):
+                    return TransferResult(key, UNVERIFIABLE_MULTIPART, size=remote.size, etag=remote.etag,
+                                          reason="part size unknown" if part_size is None else "local file missing")
+                expected_etag = util.calculate_multipart_etag(local_filename, int(part_size))
+                if expected_etag == remote.etag:
+                    return TransferResult(key, VERIFIED, size=remote.size, etag=remote.etag)
+                return TransferResult(key, MISMATCH, size=remote.size, etag=remote.etag, reason="etag")
+            except Exception as e:
+                return TransferResult(key, UNVERIFIABLE_MULTIPART, size=remote.size, etag=remote.etag,
+                                      error=f"{type(e).__name__}: {e}")
+
+        progress = Progress("Validatie multipart", total=len(multipart))
+        for result in run_concurrently(multipart, verify_multipart, workers):
+            report.add(result)
+            progress.add(result)
+        progress.close()
+        return report
+
+    def verify_checksums_from_manifest(self, manifest_file, sip_directory, workers: int = 8) -> TransferReport:
+        """
+        Remote fixity check of the objects in the manifest by their S3 additional checksums, without downloading.
+
+        The checksum S3 stores with every object is read with a HEAD request (and get_object_attributes for
+        composite checksums of multipart uploads) and compared with the checksum recorded in the ingest journal
+        (see store_files_from_manifest with use_journal), or else with the checksum of the local file.
+
+        :param manifest_file: The path to the manifest file.
+        :param sip_directory: The directory where the files listed in the manifest are located.
+        :param workers: Number of concurrent checks.
+        :return: A TransferReport with a verified, mismatch, missing or no-checksum result per key.
+        """
+        manifest = Manifest.load_existing(sip_directory, manifest_file)
+        bucket_name = self._get_bucket_name(manifest_file)
+        journal_file = Path(manifest.manifest_file_path).with_suffix(IngestJournal.JOURNAL_SUFFIX)
+        completed = IngestJournal(str(journal_file)).completed if journal_file.exists() else {}
+
+        def verify(key) -> TransferResult:
+            try:
+                remote = self.controller.call(self.get_object_checksum, bucket_name, key)
+                if remote is None:
+                    return TransferResult(key, NO_CHECKSUM, reason="no checksum stored")
+                record = completed.get(key, {})
+                local_filename = os.path.join(sip_directory, key)
+                if record.get('checksum_algorithm') == remote.algorithm and record.get('checksum'):
+                    verified = record['checksum'].split('-')[0] == remote.value.split('-')[0]
+                elif os.path.exists(local_filename):
+                    verified = self.verify_checksum(bucket_name, key, local_filename, remote)
+                else:
+                    verified = None
+                if verified is None:
+                    return TransferResult(key, NO_CHECKSUM, reason="no reference checksum")
+                return TransferResult(key, VERIFIED if verified else MISMATCH,
+                                      reason=None if verified else remote.algorithm)
+            except Exception as e:
+                if error_code(e) in ('404', 'NotFound', 'NoSuchKey'):
+                    return TransferResult(key, MISSING)
+                return TransferResult(key, FAILED, error=f"{type(e).__name__}: {e}")
+
+        report = TransferReport()
+        progress = Progress("Checksumcontrole", total=len(manifest.entries))
+        for result in run_concurrently(list(manifest.entries), verify, workers):
+            report.add(result)
+            progress.add(result)
+        progress.close()
+
+        summary = report.summary
+        print(f"Checksumcontrole voltooid: {summary.get(VERIFIED, 0)} geverifieerd, "
+              f"{summary.get(MISMATCH, 0)} afwijkend, {summary.get(MISSING, 0)} ontbrekend, "
+              f"{summary.get(NO_CHECKSUM, 0)} zonder checksum, "
+              f"{summary.get(FAILED, 0)} mislukt.")
+        return report
+
+    def restore_files_from_manifest(self, manifest_file, sip_directory, target_directory, file_filter=None,
+                                    workers: int = 4, max_bytes_in_flight: Optional[int] = None,
+                                    use_journal: bool = True) -> TransferReport:
+        """
+        Restores the files listed in the manifest from S3 to target_directory, in their original relative layout.
+
+        Files are downloaded concurrently, largest first; large objects are fetched in ranges (see
+        S3Storage.get_file). Every file is checked against the manifest MD5Hash while it is written and only
+        appears under its own name once it is complete and correct, so an interrupted restore leaves no partial
+        files behind.
+
+        :param manifest_file: The path to the manifest file.
+        :param sip_directory: The directory where the manifest file is located.
+        :param target_directory: The directory to restore the files into.
+        :param file_filter: Optional callable that takes (key, entry) and returns True if file should be restored.
+        :param workers: Number of files to download concurrently.
+        :param max_bytes_in_flight: Optional cap on the total size of the files being downloaded at the same time.
+        :param use_journal: If True, record every restored file in a journal in target_directory and skip the
+                            files it already lists with the same MD5Hash, so a restore can be restarted.
+        :return: A TransferReport with a downloaded, skipped, mismatch, missing or failed result for every key.
+        """
+        manifest = Manifest.load_existing(sip_directory, manifest_file)
+        bucket_name = self._get_bucket_name(manifest_file)
+        print(f"{manifest_file} terugzetten naar {target_directory}.")
 
-    def update_acl_from_manifest(self, manifest_file, sip_directory, acl="public-read", file_filter=None):
+        os.makedirs(target_directory, exist_ok=True)
+        journal = None
+        if use_journal:
+            journal = IngestJournal(os.path.join(
+                target_directory, self._get_manifest_prefix(manifest) + RESTORE_JOURNAL_SUFFIX))
+
+        report = TransferReport()
+        to_restore = []
+        for key, entry in manifest.entries.items():
+            if file_filter and not file_filter(key, entry):
+                report.add(TransferResult(key, SKIPPED, reason="filtered"))
+                continue
+            target_filename = os.path.join(target_directory, key)
+            if journal and journal.is_completed(key, entry.md5hash) and os.path.exists(target_filename):
+                record = journal.completed[key]
+                report.add(TransferResult(key, SKIPPED, size=record.get('size') or 0, etag=record.get('etag'),
+                                          reason="journal"))
+                continue
+            to_restore.append((key, target_filename, entry.to_dict()))
+        to_restore = schedule_by_size(to_restore, self._local_size, self.transfer_config.multipart_threshold)
+
+        def restore(item) -> TransferResult:
+            key, target_filename, properties = item
+            try:
+                downloaded = self.controller.call(self.get_file, bucket_name, key, target_filename,
+                                                  expected_md5=properties.get('MD5Hash'))
+                if journal:
+                    journal.record_completed(key, downloaded.etag, downloaded.md5, downloaded.size)
+                return TransferResult(key, DOWNLOADED, size=downloaded.size, etag=downloaded.etag)
+            except ChecksumMismatchError as e:
+                return TransferResult(key, MISMATCH, reason="md5", error=str(e))
+            except Exception as e:
+                if error_code(e) in ('404', 'NotFound', 'NoSuchKey'):
+                    return TransferResult(key, MISSING)
+                return TransferResult(key, FAILED, error=f"{type(e).__name__}: {e}")
+
+        progress = Progress("Restore", total=len(to_restore))
+        try:
+            for result in run_concurrently(to_restore, restore, workers,
+                                           size_of=self._local_size, max_bytes_in_flight=max_bytes_in_flight):
+                report.add(result)
+                progress.add(result)
+        finally:
+            progress.close()
+            if journal:
+                journal.close()
+
+        summary = report.summary
+        print(f"Restore voltooid: {summary.get(DOWNLOADED, 0)} bestanden teruggezet, "
+              f"{summary.get(SKIPPED, 0)} overgeslagen, {summary.get(MISMATCH, 0)} afwijkend, "
+              f"{summary.get(MISSING, 0)} ontbrekend, {summary.get(FAILED, 0)} mislukt.")
+        return report
+
+    def update_acl_from_manifest(self, manifest_file, sip_directory, acl="public-read", file_filter=None,
+                                 workers: int = 1, skip_unchanged: bool = False) -> TransferReport:
         """
         Updates the access control list (ACL) of files in S3 based on the manifest.
 
@@ -276,29 +843,64 @@ class EDepot(S3Storage):
         :param sip_directory: The directory where the files listed in the manifest are located.
         :param acl: The access control list setting to apply to the files (default is 'public-read').
         :param file_filter: Optional callable that takes (key, entry) and returns True if ACL should be updated.
+        :param workers: Number of ACL updates to run concurrently.
+        :param skip_unchanged: If True, skip objects that already have the ACL. The collection prefix is listed
+                               once; objects that an AclCache next to the manifest records as having the ACL,
+                               with the same ETag and LastModified, are skipped without any request. For the
+                               others the current grants are read first and only changed if they differ.
+        :return: A TransferReport with an updated, skipped, missing or failed result per key.
         """
         manifest = Manifest.load_existing(sip_directory, manifest_file)
         bucket_name = self._get_bucket_name(manifest_file)
-        
-        filtered_count = 0
-        updated_count = 0
-        
+
+        cache = AclCache.for_manifest(manifest.manifest_file_path) if skip_unchanged else None
+        remote_objects = self.list_objects(bucket_name, self._get_collection_prefix(manifest)) if skip_unchanged else {}
+
+        report = TransferReport()
+        to_update = []
         for key, entry in manifest.entries.items():
             # Apply custom filter if provided
             if file_filter and not file_filter(key, entry):
-                filtered_count += 1
-                print(f"SKIP-FILTERED: {key}", end="\r")
+                report.add(TransferResult(key, SKIPPED, reason="filtered"))
                 continue
-                
-            properties = entry.to_dict()
-            print(f"{bucket_name} {key}, {acl}")
-            self.update_acl(bucket_name, key, acl)
-            updated_count += 1
-            
+            if skip_unchanged:
+                remote = remote_objects.get(key)
+                if remote is None:
+                    report.add(TransferResult(key, MISSING))
+                    continue
+                if cache.has_acl(remote, acl):
+                    report.add(TransferResult(key, SKIPPED, size=remote.size, etag=remote.etag, reason="cached"))
+                    continue
+            to_update.append(key)
+
+        def update(key) -> TransferResult:
+            try:
+                if skip_unchanged and self.grants_match_acl(
+                        self.controller.call(self.get_object_grants, bucket_name, key), acl):
+                    return TransferResult(key, SKIPPED, reason="unchanged")
+                self.controller.call(self.s3_client.put_object_acl, Bucket=bucket_name, Key=key, ACL=acl)
+                return TransferResult(key, UPDATED)
+            except Exception as e:
+                return TransferResult(key, FAILED, error=f"{type(e).__name__}: {e}")
+
+        progress = Progress("ACL update", total=len(to_update))
+        try:
+            for result in run_concurrently(to_update, update, workers):
+                report.add(result)
+                progress.add(result)
+                if cache is not None and result.status in (UPDATED, SKIPPED):
+                    cache.set_acl(remote_objects.get(result.key), result.key, acl)
+        finally:
+            progress.close()
+            if cache is not None:
+                cache.save()
+
         # Update the ACL of the manifest file itself if any file ACL was updated
-        if updated_count > 0:
+        if report.with_status(UPDATED):
             manifest_rel_key = os.path.relpath(manifest_file, sip_directory)
-            print(f"{bucket_name} {manifest_rel_key}, {acl} (manifest)")
-            self.update_acl(bucket_name, manifest_rel_key, acl)
-            
-        print(f"\nACL update voltooid: {updated_count} bestanden bijgewerkt, {filtered_count} gefilterd.")
+            report.add(update(manifest_rel_key))
+
+        summary = report.summary
+        print(f"ACL update voltooid: {summary.get(UPDATED, 0)} bestanden bijgewerkt, "
+              f"{summary.get(SKIPPED, 0)} overgeslagen, {summary.get(FAILED, 0) + summary.get(MISSING, 0)} mislukt.")
+        return report
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Files modified this many seconds before they were hashed are not cached: a change within the same
+# mtime tick (coarse on some NAS file systems) would otherwise go unnoticed.
+RACY_WINDOW = 2.0
+
+
+class FixityCache:
+    """
+    Remembers the last verified MD5 of every file of a manifest, stored as JSON next to the manifest.
+
+    An entry is only trusted while the file's device, inode, size and mtime (in nanoseconds) are unchanged,
+    and while it was verified less than max_age seconds ago, so a quick validation only re-hashes files that
+    changed or are due for re-verification.
+    """
+    FIXITY_CACHE_SUFFIX = ".fixity.json"
+
+    def __init__(self, cache_file: str):
+        self.cache_file = str(cache_file)
+        self.entries: Dict[str, dict] = {}
+        self.is_modified = False
+        if Path(self.cache_file).exists():
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @classmethod
+    def for_manifest(cls, manifest_file: str) -> 'FixityCache':
+        """Open the fixity cache that belongs to a manifest file, e.g. 'x.manifest.json' -> 'x.manifest.fixity.json'."""
+        return cls(str(Path(manifest_file).with_suffix(cls.FIXITY_CACHE_SUFFIX)))
+
+    def get_verified_md5(self, filename: str, stat: os.stat_result, max_age: Optional[float] = None) -> Optional[str]:
+        """
+        The MD5 verified earlier for this exact version of the file, or None when the file changed since,
+        or when the verification is older than max_age seconds (None: never too old).
+        """
+        entry = self.entries.get(filename)
+        if entry is None or entry['stat'] != self._signature(stat):
+            return None
+        if max_age is not None and time.time() - self._timestamp(entry['checked']) >= max_age:
+            return None
+        return entry['md5']
+
+    def set_verified(self, filename: str, stat: os.stat_result, md5hash: str, checked: Optional[float] = None) -> None:
+        """
+        Record that the file with the given stat (taken before hashing) had md5hash at time checked.
+        A stat of a file modified just before it was hashed is not cached.
+        """
+        checked = checked if checked is not None else time.time()
+        if stat.st_mtime_ns / 1e9 >= checked - RACY_WINDOW:
+            self.forget(filename)
+            return
+        self.entries[filename] = {
+            'stat': self._signature(stat),
+            'md5': md5hash,
+            'checked': datetime.fromtimestamp(checked).strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.is_modified = True
+
+    def forget(self, filename: str) -> None:
+        if self.entries.pop(filename, None) is not None:
+            self.is_modified = True
+
+    def retain(self, filenames: Iterable[str]) -> None:
+        """Drop the entries of files that are no longer in the manifest."""
+        keep = set(filenames)
+        for filename in [filename for filename in self.entries if filename not in keep]:
+            self.forget(filename)
+
+    def save(self) -> None:
+        """Save the cache, but only if it has been modified."""
+        if self.is_modified:
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1)
+            os.replace(temp_file, self.cache_file)
+            self.is_modified = False
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> list:
+        return [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    @staticmethod
+    def _timestamp(checked: str) -> float:
+        return datetime.strptime(checked, "%Y-%m-%dT%H:%M:%S").timestamp()
@@ -0,0 +1,97 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class IngestJournal:
+    """
+    Append-only journal (JSON lines) of an ingest, stored next to the manifest.
+
+    Every completed upload is recorded with its ETag and MD5, so a restarted run can skip
+    finished work without asking S3. Started multipart uploads are recorded with their
+    upload id and part size, so an interrupted upload can be resumed instead of restarted.
+    """
+    JOURNAL_SUFFIX = ".journal.jsonl"
+
+    def __init__(self, journal_file: str):
+        self.journal_file = str(journal_file)
+        self.completed: Dict[str, dict] = {}
+        self.multipart_uploads: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    @classmethod
+    def for_manifest(cls, manifest_file: str) -> 'IngestJournal':
+        """Open the journal that belongs to a manifest file, e.g. 'x.manifest.json' -> 'x.manifest.journal.jsonl'."""
+        return cls(str(Path(manifest_file).with_suffix(cls.JOURNAL_SUFFIX)))
+
+    def is_completed(self, key: str, md5hash: Optional[str]) -> bool:
+        """True if the key was uploaded before with the same MD5 (a changed file is uploaded again)."""
+        record = self.completed.get(key)
+        return record is not None and record.get('md5') == md5hash
+
+    def get_multipart_upload(self, key: str, md5hash: Optional[str]) -> Optional[dict]:
+        """Get the unfinished multipart upload of the key for the same MD5, if any."""
+        record = self.multipart_uploads.get(key)
+        if record is not None and record.get('md5') == md5hash:
+            return record
+        return None
+
+    def record_completed(self, key: str, etag: Optional[str], md5hash: Optional[str], size: int,
+                         sha256: Optional[str] = None, checksum_algorithm: Optional[str] = None,
+                         checksum: Optional[str] = None) -> None:
+        record = {'event': 'completed', 'key': key, 'etag': etag, 'md5': md5hash, 'size': size}
+        if sha256:
+            record['sha256'] = sha256
+        if checksum:
+            record['checksum_algorithm'] = checksum_algorithm
+            record['checksum'] = checksum
+        self._append(record)
+
+    def record_multipart_started(self, key: str, upload_id: str, part_size: int, md5hash: Optional[str]) -> None:
+        self._append({'event': 'multipart-started', 'key': key, 'upload_id': upload_id,
+                      'part_size': part_size, 'md5': md5hash})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> 'IngestJournal':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _append(self, record: dict) -> None:
+        record['time'] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock:
+            self._apply(record)
+            if self._file is None:
+                self._file = open(self.journal_file, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def _apply(self, record: dict) -> None:
+        key = record.get('key')
+        if record.get('event') == 'completed':
+            self.completed[key] = record
+            self.multipart_uploads.pop(key, None)
+        elif record.get('event') == 'multipart-started':
+            self.multipart_uploads[key] = record
+
+    def _load(self) -> None:
+        journal_path = Path(self.journal_file)
+        if not journal_path.exists():
+            return
+        with journal_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash can leave a partially written last line; that entry is simply redone.
+                    continue
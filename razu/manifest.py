@@ -1,15 +1,25 @@
+import os
 import sys
 import json
+import time
 import argparse    
+import fnmatch
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
 from razu.config import Config
+from razu.fixity_cache import FixityCache
 from razu.identifiers import Identifiers
 from razu.meta_resource import StructuredMetaResource
+from razu.metrics import Progress
+from razu.transfer import TransferReport, TransferResult, run_concurrently, VERIFIED, MISMATCH, MISSING, FAILED
 import razu.util as util
 
+# Default re-verification age of files in a quick validation
+DEFAULT_FIXITY_MAX_AGE_DAYS = 30
+
+
 class ManifestEntry:
     """ Represents a single entry in the manifest, containing file metadata and checksum information."""
 
@@ -86,6 +96,7 @@ class Manifest:
         self.manifest_filename = None  # Will be set by create_new or load_existing (stored as relative Path or str)
         self.is_valid = True
         self.is_modified = False
+        self.validation_report: Optional[TransferReport] = None  # Per-file results of the last validate()
 
     @property
     def manifest_file_path(self) -> str:
@@ -182,15 +193,25 @@ class Manifest:
             }
         self.is_modified = False
 
-    def validate(self, ignore_files: list = None, show_progress: bool = False) -> dict:
+    def validate(self, ignore_files: list = None, show_progress: bool = False, jobs: int = 1,
+                 fixity_cache: Optional[FixityCache] = None, max_age: Optional[float] = None) -> dict:
         """ Verify 1 to 1 relationship between manifest entries and files in the directory. 
 
         Args:
             ignore_files: Optional list of filenames to ignore when checking for extra files.
                          The manifest file itself is always ignored.
+            show_progress: Show the number of files and bytes checked on stderr.
+            jobs: Number of files to hash at the same time. hashlib releases the GIL while hashing,
+                  so threads spread the work over multiple cores and disks.
+            fixity_cache: Optional FixityCache. Files that are unchanged since they were last verified
+                          (and verified less than max_age seconds ago) are not hashed again; the cache is
+                          updated with the files that are hashed, and saved.
+            max_age: Re-verification age in seconds for cached files. 0 hashes every file (paranoid mode)
+                     and only refreshes the cache; None trusts cache entries of any age.
 
         Returns:
-            dict: A dictionary of errors with keys 'missing_files', 'checksum_mismatch', and 'extra_files'
+            dict: A dictionary of errors with keys 'missing_files', 'checksum_mismatch', and 'extra_files',
+                  each sorted by filename. The result per file is kept in self.validation_report.
         """
         errors = {
             'missing_files': [],
@@ -201,88 +222,151 @@ class Manifest:
         ignore_files = list(ignore_files) if ignore_files else []
         ignore_files.append(Path(self.manifest_file_path).name)
 
-        # Check manifest entries against filesystem
-        counter = 1
+        started = time.time()
+        self.validation_report = TransferReport()
+        stats = {}
         for filename in self.entries:
-            if show_progress:
-                print(counter, end='\r', file=sys.stderr)
-            counter += 1
-            file_path = self.base_directory / filename
-            if not file_path.exists():
+            try:
+                stats[filename] = (self.base_directory / filename).stat()
+            except FileNotFoundError:
+                stats[filename] = None
+                continue
+            if fixity_cache is not None and max_age != 0:
+                cached_md5 = fixity_cache.get_verified_md5(filename, stats[filename], max_age)
+                if cached_md5 is not None and cached_md5 == self.entries[filename].md5hash:
+                    self.validation_report.add(TransferResult(filename, VERIFIED, stats[filename].st_size,
+                                                              etag=cached_md5, reason='cached'))
+
+        def size_of(filename: str) -> int:
+            return stats[filename].st_size if stats[filename] is not None else 0
+
+        # Largest files first, so a large file at the end does not leave the other jobs idle
+        filenames = [filename for filename in self.entries if filename not in self.validation_report]
+        if jobs > 1:
+            filenames.sort(key=size_of, reverse=True)
+
+        progress = None
+        if show_progress:
+            progress = Progress("Validatie", total=len(filenames), stream=sys.stderr,
+                                total_bytes=sum(size_of(filename) for filename in filenames))
+            if self.validation_report:
+                print(f"{len(self.validation_report)} bestanden ongewijzigd sinds de vorige controle.",
+                      file=sys.stderr)
+        for result in run_concurrently(filenames, lambda filename: self._validate_file(filename, stats[filename]),
+                                       workers=jobs):
+            self.validation_report.add(result)
+            if fixity_cache is not None:
+                if result.status == VERIFIED:
+                    fixity_cache.set_verified(result.key, stats[result.key], result.etag, checked=started)
+                else:
+                    fixity_cache.forget(result.key)
+            if progress:
+                progress.add(result)
+        if progress:
+            progress.close()
+        if fixity_cache is not None:
+            fixity_cache.retain(self.entries)
+            fixity_cache.save()
+
+        unreadable = []
+        for filename in sorted(self.validation_report):
+            result = self.validation_report[filename]
+            if result.status == MISSING:
                 errors['missing_files'].append(filename)
-            else:
-                current_md5 = util.calculate_md5(str(file_path))
-                if current_md5 != self.entries[filename].md5hash:
-                    errors['checksum_mismatch'].append(filename)
+            elif result.status == MISMATCH:
+                errors['checksum_mismatch'].append(filename)
+            elif result.status == FAILED:
+                unreadable.append(f"{filename} ({result.error})")
 
+        if unreadable:
+            raise OSError(f"Files not readable: {unreadable}")
         if errors['missing_files']:
             raise FileNotFoundError(f"Files missing: {errors['missing_files']}")
         if errors['extra_files']:
             raise FileExistsError(f"Extra files found: {errors['extra_files']}")
         return errors
+
+    def _validate_file(self, filename: str, stat: Optional[os.stat_result]) -> TransferResult:
+        """Compares the MD5 of one file with its entry; a missing file has stat None."""
+        if stat is None:
+            return TransferResult(filename, MISSING)
+        size = stat.st_size
+        try:
+            current_md5 = util.calculate_md5(str(self.base_directory / filename))
+        except OSError as e:
+            return TransferResult(filename, FAILED, size, error=str(e))
+        if current_md5 != self.entries[filename].md5hash:
+            return TransferResult(filename, MISMATCH, size, etag=current_md5, reason='md5')
+        return TransferResult(filename, VERIFIED, size, etag=current_md5)
         
     @classmethod
     def create_from_directory(cls, directory: str, manifest_filename: str = None, 
-                              ignore_files: list = None, include_metadata: bool = True) -> 'Manifest':
+                              ignore_files: list = None, include_metadata: bool = True,
+                              jobs: int = 1) -> 'Manifest':
         """Create a new manifest by scanning all files in a directory.
         
+        The directory is walked with os.scandir, so the stat of every file is taken once, and the files
+        are hashed by a pool of jobs threads. Only a few files per job are in progress at any time.
+
         Args:
             directory: Directory to scan for files
             manifest_filename: Optional explicit manifest filename. If not provided, uses id_factory to generate name.
-            ignore_files: Optional list of filenames to ignore when scanning
+            ignore_files: Optional list of filenames or glob patterns (e.g. '*.tmp', 'scans/*/thumbs.db') to
+                          ignore when scanning. Patterns are matched against the name and the relative path
+                          of every file and directory; an ignored directory is not scanned.
             include_metadata: Whether to include file metadata like size and last modified date
+            jobs: Number of files to hash at the same time
             
         Returns:
-            A new Manifest instance with entries for all files in the directory
+            A new Manifest instance with entries for all files in the directory, sorted by path
         """
         manifest = cls.create_new(directory)
         if manifest_filename:
             manifest.manifest_filename = manifest_filename
-            
-        ignore_files = ignore_files or []
-        ignore_files.append(Path(manifest.manifest_file_path).name)
-        
-        # Scan directory and add all files to manifest (pathlib)
-        directory_path = Path(directory)
-        manifest_basename = Path(manifest.manifest_file_path).name
-        for file_path in directory_path.rglob('*'):
-            if not file_path.is_file():
-                continue
-            if file_path.name in ignore_files:
-                continue
 
-            relative_path = file_path.relative_to(directory_path).as_posix()
-
-            # Skip the manifest file itself
-            if relative_path == manifest_basename:
-                continue
+        # Skip the manifest file itself
+        ignore_files = list(ignore_files) if ignore_files else []
+        ignore_files.append(Path(manifest.manifest_file_path).name)
 
-            # Calculate MD5 hash
-            md5hash = util.calculate_md5(str(file_path))
-            md5date = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        def hash_file(item: tuple) -> tuple:
+            relative_path, file_path, file_stat = item
+            return relative_path, file_stat, util.calculate_md5(file_path), datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
 
-            # Add optional metadata
+        results = {}
+        for relative_path, file_stat, md5hash, md5date in run_concurrently(
+                cls._scan_directory(str(directory), ignore_files), hash_file, workers=jobs):
             metadata = {}
             if include_metadata:
-                file_stat = file_path.stat()
                 metadata.update({
                     'FileSize': file_stat.st_size,
-                    'LastModified': util.get_last_modified(str(file_path)),
-                    'FileExtension': util.get_full_extension(file_path.name),
+                    'LastModified': datetime.fromtimestamp(file_stat.st_mtime).strftime("%Y-%m-%dT%H:%M:%S"),
+                    'FileExtension': util.get_full_extension(Path(relative_path).name),
                 })
+            results[relative_path] = (md5hash, md5date, metadata)
 
-            # Add entry to manifest
-            manifest.add_entry(
-                relative_path,
-                md5hash=md5hash,
-                md5date=md5date,
-                **metadata
-            )
+        for relative_path in sorted(results):
+            md5hash, md5date, metadata = results[relative_path]
+            manifest.add_entry(relative_path, md5hash=md5hash, md5date=md5date, **metadata)
         
         manifest.is_valid = True
         manifest.is_modified = True
         return manifest
 
+    @staticmethod
+    def _scan_directory(directory: str, ignore_patterns: List[str], relative_directory: str = ''):
+        """Yields (relative path, path, stat) of every file below directory that matches no ignore pattern."""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative_path = f"{relative_directory}{entry.name}"
+                if any(fnmatch.fnmatchcase(entry.name, pattern) or fnmatch.fnmatchcase(relative_path, pattern)
+                       for pattern in ignore_patterns):
+                    continue
+                # Like Path.rglob, symlinks to directories are not followed
+                if entry.is_dir(follow_symlinks=False):
+                    yield from Manifest._scan_directory(entry.path, ignore_patterns, f"{relative_path}/")
+                elif entry.is_file():
+                    yield relative_path, entry.path, entry.stat()
+
 
 if __name__ == "__main__":
     """Command-line interface for managing a file manifest."""
@@ -296,9 +380,12 @@ if __name__ == "__main__":
     create_parser.add_argument("--output", "-o", dest="manifest_filename", 
                               help="Output manifest filename (default: auto-generated)")
     create_parser.add_argument("--ignore", "-i", nargs="+", dest="ignore_files",
-                              help="Files to ignore during scanning")
+                              help="Files to ignore during scanning (names or glob patterns, e.g. '*.tmp')")
     create_parser.add_argument("--no-metadata", dest="include_metadata", action="store_false",
                               help="Don't include file metadata in manifest")
+    create_parser.add_argument("--jobs", "-j", type=int, default=1,
+                              help="Number of files to hash in parallel (default: 1)")
+    create_parser.add_argument("--config", help="config.yaml to use (default: the usual lookup)")
     
     # Validate command
     validate_parser = subparsers.add_parser("validate", help="Validate a manifest (files available and correct checksum)")
@@ -307,6 +394,18 @@ if __name__ == "__main__":
                                 help="Files to ignore during validation")
     validate_parser.add_argument("--progress", "-p", action="store_true",
                                 help="Show progress counter during validation")
+    validate_parser.add_argument("--jobs", "-j", type=int, default=1,
+                                help="Number of files to hash in parallel (default: 1)")
+    mode_group = validate_parser.add_mutually_exclusive_group()
+    mode_group.add_argument("--quick", "-q", action="store_true",
+                            help="Only hash files changed since their last verification, or verified longer "
+                                 "than --max-age days ago (uses the .fixity.json cache next to the manifest)")
+    mode_group.add_argument("--paranoid", action="store_true",
+                            help="Hash every file and refresh the .fixity.json cache")
+    validate_parser.add_argument("--max-age", type=float, dest="max_age_days",
+                                help=f"Re-verification age in days for --quick (default: fixity_max_age_days "
+                                     f"in config.yaml, or {DEFAULT_FIXITY_MAX_AGE_DAYS})")
+    validate_parser.add_argument("--config", help="config.yaml to use (default: the usual lookup)")
     
     # Parse arguments
     # If no subcommand is given, interpret the invocation as 'validate'
@@ -322,11 +421,13 @@ if __name__ == "__main__":
     
     try:
         if args.command == "create":
+            Config.initialize(args.config)
             manifest = Manifest.create_from_directory(
                 args.directory,
                 manifest_filename=args.manifest_filename,
                 ignore_files=args.ignore_files,
-                include_metadata=args.include_metadata
+                include_metadata=args.include_metadata,
+                jobs=args.jobs
             )
             manifest.save()
             print(f"Created manifest with {len(manifest.entries)} entries at {manifest.manifest_file_path}")
@@ -339,11 +440,18 @@ if __name__ == "__main__":
             # manifest path relative to base_directory (keeps nested structure)
             manifest_relpath = str(manifest_path.relative_to(base_directory))
 
+            cfg = Config.initialize(args.config)
             manifest = Manifest.load_existing(str(base_directory), manifest_filename=manifest_relpath)
             ignore_files = list(args.ignore_files) if args.ignore_files else []
+            fixity_cache = FixityCache.for_manifest(str(manifest_path)) if args.quick or args.paranoid else None
+            max_age_days = args.max_age_days
+            if max_age_days is None:
+                max_age_days = getattr(cfg, 'fixity_max_age_days', None) or DEFAULT_FIXITY_MAX_AGE_DAYS
+            max_age = max_age_days * 24 * 3600 if args.quick else 0
             timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
             try:
-                errors = manifest.validate(ignore_files=ignore_files, show_progress=args.progress)
+                errors = manifest.validate(ignore_files=ignore_files, show_progress=args.progress,
+                                           jobs=args.jobs, fixity_cache=fixity_cache, max_age=max_age)
                 has_errors = any(errors.values())
                 if has_errors:
                     error_parts = []
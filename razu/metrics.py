@@ -0,0 +1,274 @@
+"""Metrics of the S3 calls of an S3Storage, and a progress line for EDepot bulk operations."""
+
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from razu.throttle import body_size
+from razu.transfer import TransferResult, FAILED, MISMATCH, MISSING
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+_START_KEY = 'razu_metrics_start'
+_OBJECT_KEY = 'razu_metrics_key'
+_SENT_KEY = 'razu_metrics_sent'
+
+
+@dataclass
+class CallStats:
+    """Counters and latency histogram of one operation type or key prefix."""
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency_sum: float = 0.0
+    latency_buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+    def add(self, latency: float, failed: bool, retries: int, sent: int, received: int) -> None:
+        self.requests += 1
+        self.failures += int(failed)
+        self.retries += retries
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.latency_sum += latency
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if latency <= upper:
+                self.latency_buckets[i] += 1
+                break
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding quantile q; an estimate like Prometheus' histogram_quantile."""
+        if not self.requests:
+            return None
+        needed = q * self.requests
+        cumulative = 0
+        for upper, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            cumulative += count
+            if cumulative >= needed:
+                return upper if upper != float('inf') else None
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'retries': self.retries,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_mean': self.latency_sum / self.requests if self.requests else None,
+            'latency_p50': self.latency_quantile(0.5),
+            'latency_p95': self.latency_quantile(0.95),
+            'latency_p99': self.latency_quantile(0.99),
+        }
+
+
+class TransferMetrics:
+    """
+    Collects request counts, bytes, latency histograms, retries and failures of every call made by an S3 client,
+    per operation type (PutObject, UploadPart, HeadObject, ...) and per key prefix.
+
+    Attach it to a client with attach(); S3Storage does so for its own client. The metrics can be exported as
+    a JSON summary with save_json and as a Prometheus textfile (for the node_exporter textfile collector)
+    with write_prometheus, to compare ingest runs and find slow prefixes.
+    """
+
+    def __init__(self, prefix_depth: Optional[int] = None):
+        """
+        :param prefix_depth: Number of leading key segments ('/'-separated) that make up the prefix of a key.
+                             Defaults to the whole 'directory' of the key.
+        """
+        self.prefix_depth = prefix_depth
+        self.started = time.time()
+        self.operations: Dict[str, CallStats] = {}
+        self.prefixes: Dict[str, CallStats] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client) -> None:
+        client.meta.events.register('before-parameter-build.s3', self._on_before_parameter_build)
+        client.meta.events.register('after-call.s3', self._on_after_call)
+        client.meta.events.register('after-call-error.s3', self._on_after_call_error)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self.operations = {}
+            self.prefixes = {}
+
+    def record(self, operation: str, key: Optional[str], latency: float, failed: bool = False, retries: int = 0,
+               sent: int = 0, received: int = 0) -> None:
+        with self._lock:
+            self.operations.setdefault(operation, CallStats()).add(latency, failed, retries, sent, received)
+            if key is not None:
+                self.prefixes.setdefault(self._prefix_of(key), CallStats()).add(latency, failed, retries, sent, received)
+
+    @property
+    def totals(self) -> CallStats:
+        total = CallStats()
+        with self._lock:
+            for stats in self.operations.values():
+                total.requests += stats.requests
+                total.failures += stats.failures
+                total.retries += stats.retries
+                total.bytes_sent += stats.bytes_sent
+                total.bytes_received += stats.bytes_received
+                total.latency_sum += stats.latency_sum
+                total.latency_buckets = [a + b for a, b in zip(total.latency_buckets, stats.latency_buckets)]
+        return total
+
+    def to_dict(self, slowest_prefixes: int = 20) -> dict:
+        """Summary with totals, stats per operation and the prefixes with the highest mean latency."""
+        elapsed = time.time() - self.started
+        totals = self.totals
+        with self._lock:
+            operations = {name: stats.to_dict() for name, stats in sorted(self.operations.items())}
+            prefixes = sorted(self.prefixes.items(), key=lambda item: item[1].latency_sum / item[1].requests,
+                              reverse=True)[:slowest_prefixes]
+        return {
+            'started': datetime.fromtimestamp(self.started).strftime("%Y-%m-%dT%H:%M:%S"),
+            'elapsed': elapsed,
+            'totals': {
+                **totals.to_dict(),
+                'requests_per_second': totals.requests / elapsed if elapsed else None,
+                'bytes_sent_per_second': totals.bytes_sent / elapsed if elapsed else None,
+                'error_rate': totals.failures / totals.requests if totals.requests else None,
+            },
+            'operations': operations,
+            'slowest_prefixes': {prefix: stats.to_dict() for prefix, stats in prefixes},
+        }
+
+    def save_json(self, output_file: str) -> None:
+        _write_atomic(output_file, json.dumps(self.to_dict(), indent=4))
+
+    def to_prometheus(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """The metrics per operation in the Prometheus text exposition format, with optional extra labels."""
+        extra = ''.join(f',{name}="{value}"' for name, value in (labels or {}).items())
+        counters = [
+            ('razu_s3_requests_total', 'S3 requests', 'requests'),
+            ('razu_s3_failures_total', 'Failed S3 requests', 'failures'),
+            ('razu_s3_retries_total', 'Retries of S3 requests by botocore', 'retries'),
+            ('razu_s3_sent_bytes_total', 'Bytes sent in S3 request bodies', 'bytes_sent'),
+            ('razu_s3_received_bytes_total', 'Bytes received in S3 response bodies', 'bytes_received'),
+        ]
+        with self._lock:
+            operations = sorted(self.operations.items())
+            lines = []
+            for name, help_text, attribute in counters:
+                lines += [f"# HELP {name} {help_text}.", f"# TYPE {name} counter"]
+                lines += [f'{name}{{operation="{operation}"{extra}}} {getattr(stats, attribute)}'
+                          for operation, stats in operations]
+            name = 'razu_s3_request_duration_seconds'
+            lines += [f"# HELP {name} Duration of S3 calls, including retries.", f"# TYPE {name} histogram"]
+            for operation, stats in operations:
+                cumulative = 0
+                for upper, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+                    cumulative += count
+                    le = '+Inf' if upper == float('inf') else repr(upper)
+                    lines.append(f'{name}_bucket{{operation="{operation}"{extra},le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{operation="{operation}"{extra}}} {stats.latency_sum}')
+                lines.append(f'{name}_count{{operation="{operation}"{extra}}} {stats.requests}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, output_file: str, labels: Optional[Dict[str, str]] = None) -> None:
+        """Writes a .prom file atomically, so the textfile collector never reads a partial file."""
+        _write_atomic(output_file, self.to_prometheus(labels))
+
+    def _prefix_of(self, key: str) -> str:
+        segments = key.split('/')[:-1]
+        if self.prefix_depth is not None:
+            segments = segments[:self.prefix_depth]
+        return '/'.join(segments)
+
+    def _on_before_parameter_build(self, params=None, context=None, **kwargs) -> None:
+        if context is not None:
+            context[_START_KEY] = time.monotonic()
+            context[_OBJECT_KEY] = (params or {}).get('Key')
+            context[_SENT_KEY] = body_size((params or {}).get('Body'))
+
+    def _on_after_call(self, http_response=None, parsed=None, model=None, context=None, **kwargs) -> None:
+        if context is None or _START_KEY not in context:
+            return
+        retries = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        received = 0
+        if model is not None and model.name != 'HeadObject' and http_response is not None:
+            received = int(http_response.headers.get('content-length') or 0)
+        self.record(model.name if model is not None else 'unknown', context.get(_OBJECT_KEY),
+                    time.monotonic() - context[_START_KEY],
+                    failed=http_response is None or http_response.status_code >= 300,
+                    retries=retries, sent=context.get(_SENT_KEY, 0), received=received)
+
+    def _on_after_call_error(self, exception=None, context=None, event_name='', **kwargs) -> None:
+        if context is None or _START_KEY not in context:
+            return
+        self.record(event_name.rsplit('.', 1)[-1] or 'unknown', context.get(_OBJECT_KEY),
+                    time.monotonic() - context[_START_KEY], failed=True, sent=context.get(_SENT_KEY, 0))
+
+
+class Progress:
+    """
+    Progress line of a bulk operation, rewritten in place (end="\\r") at most once per interval, with the number
+    of processed keys, failures, bytes and throughput. With total_bytes, the bytes are shown as a part of it.
+    """
+
+    def __init__(self, label: str, total: Optional[int] = None, interval: float = 1.0, stream=None,
+                 total_bytes: Optional[int] = None):
+        self.label = label
+        self.total = total
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._printed = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, done: int = 1, size: int = 0, failed: int = 0) -> None:
+        with self._lock:
+            self.done += done
+            self.bytes += size
+            self.failed += failed
+            now = time.monotonic()
+            if now - self._printed >= self.interval:
+                self._printed = now
+                print(self.line(), end="\r", file=self.stream, flush=True)
+
+    def add(self, result: TransferResult) -> None:
+        """Counts a TransferResult; failed, mismatching and missing keys count as failures."""
+        self.update(size=result.size, failed=int(result.status in (FAILED, MISMATCH, MISSING)))
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        count = f"{self.done}/{self.total}" if self.total is not None else f"{self.done}"
+        size = format_size(self.bytes)
+        if self.total_bytes:
+            size = f"{size} van {format_size(self.total_bytes)} ({100 * self.bytes / self.total_bytes:.0f}%)"
+        rate = f"{format_size(self.bytes / elapsed)}/s" if elapsed > 0 else "-"
+        return f"{self.label}: {count} ({self.failed} mislukt), {size}, {rate}"
+
+    def close(self) -> None:
+        """Prints the final state and ends the line."""
+        if self._printed:
+            print(self.line(), file=self.stream)
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _write_atomic(output_file: str, content: str) -> None:
+    temp_file = f"{output_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_file, output_file)
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+from appdirs import user_cache_dir
+
+from razu.s3storage import RemoteObject
+from razu.transfer import run_concurrently
+
+
+class S3Inventory:
+    """
+    Persistent local inventory of S3 buckets, stored in SQLite.
+
+    Holds key, ETag, size, last-modified time and (optionally) user metadata per object, and the time
+    each (bucket, prefix) was last refreshed from S3. Once a prefix is fresh, S3Storage answers
+    list_objects and get_file_metadata for it from the inventory, so bulk operations can be planned
+    without S3 round trips. Uploads, deletes and metadata updates made through S3Storage are written
+    through, so the inventory stays current for the changes made by this process.
+    """
+    DEFAULT_FILENAME = "s3_inventory.sqlite"
+
+    def __init__(self, db_file: Optional[str] = None, max_age: Optional[float] = None):
+        """
+        :param db_file: The SQLite file. Defaults to 's3_inventory.sqlite' in the user cache directory.
+        :param max_age: Seconds after which a refreshed prefix is considered stale. Without max_age,
+                        a refreshed prefix stays fresh until it is refreshed again.
+        """
+        if db_file is None:
+            cache_dir = user_cache_dir("razu")
+            os.makedirs(cache_dir, exist_ok=True)
+            db_file = os.path.join(cache_dir, self.DEFAULT_FILENAME)
+        self.db_file = str(db_file)
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    bucket TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    etag TEXT,
+                    size INTEGER,
+                    last_modified TEXT,
+                    metadata TEXT,
+                    PRIMARY KEY (bucket, key)
+                ) WITHOUT ROWID""")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS refreshes (
+                    bucket TEXT NOT NULL,
+                    prefix TEXT NOT NULL,
+                    refreshed REAL NOT NULL,
+                    PRIMARY KEY (bucket, prefix)
+                )""")
+
+    def refresh(self, storage, bucket_name: str, prefix: str = "", with_metadata: bool = False,
+                workers: int = 8) -> Dict[str, int]:
+        """
+        Refreshes a prefix from a paginated listing. Only objects that are new or changed (by ETag, size
+        or last-modified time) get their metadata fetched again with a HEAD request, and only when
+        with_metadata is True; objects that are no longer listed are removed.
+
+        :param storage: The S3Storage to list (and HEAD) the objects with.
+        :param bucket_name: The name of the bucket.
+        :param prefix: The prefix to refresh; '' refreshes the whole bucket.
+        :param with_metadata: If True, also fetch user metadata for objects without known metadata.
+        :param workers: Number of concurrent HEAD requests when fetching metadata.
+        :return: The number of added, changed, unchanged and removed objects.
+        """
+        refreshed = time.time()
+        known = {row[0]: row[1:] for row in self._select(
+            "SELECT key, etag, size, last_modified, metadata FROM objects", bucket_name, prefix)}
+        counts = {'added': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        rows = []
+        for obj in storage.iter_objects(bucket_name, prefix or None):
+            previous = known.pop(obj.key, None)
+            metadata = None
+            if previous is None:
+                counts['added'] += 1
+            elif self._is_same(previous, obj):
+                counts['unchanged'] += 1
+                metadata = previous[3]
+            else:
+                counts['changed'] += 1
+            rows.append([bucket_name, obj.key, obj.etag, obj.size, obj.last_modified, metadata])
+        counts['removed'] = len(known)
+
+        if with_metadata:
+            def head(row: list) -> None:
+                metadata = storage.get_file_metadata(bucket_name, row[1], use_inventory=False)
+                row[5] = json.dumps(metadata) if metadata is not None else None
+            list(run_concurrently((row for row in rows if row[5] is None), head, workers))
+
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM objects WHERE bucket = ? AND key = ?",
+                                 [(bucket_name, key) for key in known])
+            self._db.execute("INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?)", (bucket_name, prefix, refreshed))
+        return counts
+
+    def last_refreshed(self, bucket_name: str, prefix: str = "") -> Optional[float]:
+        """Get the time of the latest refresh covering the prefix (of the prefix itself or a shorter one)."""
+        with self._lock:
+            rows = self._db.execute("SELECT prefix, refreshed FROM refreshes WHERE bucket = ?", (bucket_name,)).fetchall()
+        times = [refreshed for refreshed_prefix, refreshed in rows if prefix.startswith(refreshed_prefix)]
+        return max(times) if times else None
+
+    def is_fresh(self, bucket_name: str, prefix: str = "") -> bool:
+        refreshed = self.last_refreshed(bucket_name, prefix)
+        if refreshed is None:
+            return False
+        return self.max_age is None or time.time() - refreshed <= self.max_age
+
+    def objects(self, bucket_name: str, prefix: str = "") -> Iterator[RemoteObject]:
+        """Iterates over the known objects under the prefix, in key order like a listing."""
+        for key, etag, size, last_modified in self._select(
+                "SELECT key, etag, size, last_modified FROM objects", bucket_name, prefix, order=True):
+            yield RemoteObject(key, etag, size, last_modified)
+
+    def get(self, bucket_name: str, key: str) -> Optional[RemoteObject]:
+        with self._lock:
+            row = self._db.execute("SELECT etag, size, last_modified FROM objects WHERE bucket = ? AND key = ?",
+                                   (bucket_name, key)).fetchone()
+        return RemoteObject(key, *row) if row else None
+
+    def get_metadata(self, bucket_name: str, key: str) -> Optional[dict]:
+        """Get the user metadata of an object as returned by a HEAD request, or None if not known."""
+        with self._lock:
+            row = self._db.execute("SELECT metadata FROM objects WHERE bucket = ? AND key = ?",
+                                   (bucket_name, key)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def record_upload(self, bucket_name: str, key: str, etag: str, size: int, metadata: Optional[dict] = None,
+                      last_modified: Optional[str] = None) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?)",
+                             (bucket_name, key, etag, size, last_modified,
+                              json.dumps(metadata) if metadata is not None else None))
+
+    def record_metadata(self, bucket_name: str, key: str, metadata: dict, etag: Optional[str] = None,
+                        last_modified: Optional[str] = None) -> None:
+        """Records replaced metadata of a known object; the ETag may change when an object is copied onto itself."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE objects SET metadata = ?, etag = COALESCE(?, etag), last_modified = ? "
+                             "WHERE bucket = ? AND key = ?",
+                             (json.dumps(metadata), etag, last_modified, bucket_name, key))
+
+    def record_deleted(self, bucket_name: str, keys: Iterable[str]) -> None:
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM objects WHERE bucket = ? AND key = ?",
+                                 [(bucket_name, key) for key in keys])
+
+    def forget_bucket(self, bucket_name: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM objects WHERE bucket = ?", (bucket_name,))
+            self._db.execute("DELETE FROM refreshes WHERE bucket = ?", (bucket_name,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _is_same(previous: tuple, obj: RemoteObject) -> bool:
+        etag, size, last_modified, _ = previous
+        # Objects recorded by our own uploads have no last-modified time; their ETag and size suffice
+        return etag == obj.etag and size == obj.size and last_modified in (None, obj.last_modified)
+
+    def _select(self, query: str, bucket_name: str, prefix: str, order: bool = False) -> list:
+        # A key range instead of LIKE, so the primary key index is used and '%' or '_' in keys need no escaping
+        query += " WHERE bucket = ?"
+        params = [bucket_name]
+        if prefix:
+            query += " AND key >= ? AND key < ?"
+            params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        if order:
+            query += " ORDER BY key"
+        with self._lock:
+            return self._db.execute(query, params).fetchall()
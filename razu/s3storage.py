@@ -1,11 +1,97 @@
 import os
-import tempfile
+import base64
 import hashlib
+import tempfile
 import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 from dotenv import load_dotenv
 import mimetypes
 import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from s3transfer.utils import ChunksizeAdjuster
+
+import razu.util as util
+from razu.checksums import (Checksum, CHECKSUM_ALGORITHMS, FULL_OBJECT_ALGORITHMS, calculate_file_checksum,
+                            checksum_field, composite_value, normalize_algorithm)
+from razu.metrics import Progress, TransferMetrics
+from razu.throttle import ConcurrencyController, RateLimits, body_size, get_rate_limits
+from razu.transfer import run_concurrently, batched
+from razu.transfer_profiles import TransferProfile, get_transfer_profile
+
+if TYPE_CHECKING:
+    from razu.s3_inventory import S3Inventory
+
+PART_SIZE_METADATA_KEY = 'PartSize'
+# Largest object copy_object can copy in one request; larger objects are copied in parts
+MAX_COPY_OBJECT_SIZE = 5 * 1024 ** 3
+
+ALL_USERS_URI = 'http://acs.amazonaws.com/groups/global/AllUsers'
+AUTHENTICATED_USERS_URI = 'http://acs.amazonaws.com/groups/global/AuthenticatedUsers'
+
+
+@dataclass
+class RemoteObject:
+    """Listing information of an object in a bucket."""
+    key: str
+    etag: str
+    size: int
+    last_modified: Optional[str] = None
+
+    @property
+    def is_multipart(self) -> bool:
+        """Multipart ETags are not an MD5 of the content; they end with '-' and the part count."""
+        return '-' in self.etag
+
+
+@dataclass
+class UploadResult:
+    """Outcome of put_file: the object's ETag and the digests computed while the file was read."""
+    etag: str
+    size: int
+    md5: str
+    sha256: Optional[str] = None
+    part_size: Optional[int] = None
+    checksum_algorithm: Optional[str] = None
+    checksum: Optional[str] = None
+
+
+@dataclass
+class RemoteChecksum:
+    """An additional checksum S3 stores with an object, as returned by head_object with ChecksumMode enabled."""
+    algorithm: str
+    value: str
+    checksum_type: Optional[str] = None
+    part_size: Optional[int] = None
+
+    @property
+    def is_composite(self) -> bool:
+        return self.checksum_type == 'COMPOSITE' or '-' in self.value
+
+
+@dataclass
+class CopyResult:
+    """Outcome of copy_file: the ETag and size of the copy, and the part size if it was copied in parts."""
+    etag: str
+    size: int
+    part_size: Optional[int] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of get_file: the object's ETag and size and the MD5 computed while it was written."""
+    etag: str
+    size: int
+    md5: str
+
+
+class ChecksumMismatchError(ValueError):
+    """Raised when the bytes read for an upload or download do not match the expected MD5."""
 
 
 class S3Storage:
@@ -34,14 +120,43 @@ class S3Storage:
         endpoint (str): S3 service endpoint URL.
         access_key (str): Access key for S3 service.
         secret_key (str): Secret key for S3 service.
-        s3_client (boto3.Client): Initialized S3 client for performing operations.
+        s3_client (boto3.Client): Initialized S3 client for performing operations. The client is
+            thread-safe and shared by all worker threads of concurrent bulk operations.
+        transfer_profile (TransferProfile): The transfer profile the client and transfers are configured with.
+        transfer_config (TransferConfig): Multipart threshold, part size and per-file concurrency
+            used for uploads and downloads, taken from the transfer profile.
+        inventory (S3Inventory): Optional local inventory that answers listings and metadata lookups
+            of fresh prefixes without S3 round trips.
+        controller (ConcurrencyController): Limits the calls in flight of all bulk operations of this instance,
+            shrinking the window when the backend throttles. Failed requests are retried by botocore only,
+            per request, as set by the retry_mode and max_attempts of the transfer profile.
+        rate_limits (RateLimits): Optional bytes per second and requests per second limits on all requests.
+        metrics (TransferMetrics): Request counts, bytes, latencies, retries and failures of all calls of s3_client.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, transfer_profile: Union[str, TransferProfile, None] = None,
+                 max_pool_connections: Optional[int] = None, inventory: Optional['S3Inventory'] = None,
+                 controller: Optional[ConcurrencyController] = None,
+                 rate_limits: Optional[RateLimits] = None, metrics: Optional[TransferMetrics] = None) -> None:
         """
         Initializes the S3 client with credentials and endpoint information from environment variables.
         The credentials and endpoint are loaded from a .env file. Lookup order:
         first from the current working directory, then fallback to the module directory.
+
+        :param transfer_profile: Name of a transfer profile (e.g. 'many-small-files', 'large-scans',
+                                 'low-bandwidth') or a TransferProfile. Defaults to the 's3_transfer_profile'
+                                 setting in config.yaml, or 'default'.
+        :param max_pool_connections: Optional override of the profile's HTTP connection pool size. Should be
+                                     at least the number of workers used for concurrent bulk operations.
+        :param inventory: Optional S3Inventory. list_objects and get_file_metadata use it for prefixes that are
+                          fresh, and changes made through this instance are recorded in it.
+        :param controller: Optional ConcurrencyController, e.g. to share one between instances. Defaults to
+                           a controller with a window of at most max_pool_connections calls, which does not
+                           retry itself: botocore retries every request, and each of its retries of a throttled
+                           request already shrinks the window.
+        :param rate_limits: Optional RateLimits for all uploads, downloads and other requests. Defaults to the
+                            's3_rate_limits' setting in config.yaml, if any.
+        :param metrics: Optional TransferMetrics, e.g. to collect the calls of several instances together.
         """
         # Prefer .env from current working directory, then fallback to module directory
         cwd_env_path = os.path.join(os.getcwd(), '.env')
@@ -58,13 +173,28 @@ class S3Storage:
         self.endpoint = os.getenv('S3_ENDPOINT')
         self.access_key = os.getenv('S3_ACCESS_KEY')
         self.secret_key = os.getenv('S3_SECRET_KEY')
+
+        self.transfer_profile = get_transfer_profile(transfer_profile)
+        if max_pool_connections is not None:
+            self.transfer_profile = replace(self.transfer_profile, max_pool_connections=max_pool_connections)
         
         self.s3_client = boto3.client(
             's3',
             endpoint_url=self.endpoint,
             aws_access_key_id=self.access_key,
-            aws_secret_access_key=self.secret_key
+            aws_secret_access_key=self.secret_key,
+            config=self.transfer_profile.client_config()
         )
+        self.transfer_config = self.transfer_profile.transfer_config()
+        self.inventory = inventory
+        self.controller = controller or ConcurrencyController(max_window=self.transfer_profile.max_pool_connections)
+        self.controller.observe(self.s3_client)
+        self.rate_limits = rate_limits or get_rate_limits()
+        if self.rate_limits is not None:
+            self.rate_limits.attach(self.s3_client)
+        self.metrics = metrics or TransferMetrics()
+        self.metrics.attach(self.s3_client)
+        self.s3_client.meta.events.register_last('before-call.s3', self._send_small_body_directly)
 
 
     def check_or_create_bucket(self, bucket_name, enable_versioning=False) -> bool:
@@ -150,38 +280,20 @@ class S3Storage:
             return "Error"
 
 
-    def store_file(self, bucket_name, object_key, local_filename, metadata) -> None:
+    def store_file(self, bucket_name, object_key, local_filename, metadata,
+                   checksum_algorithm: Optional[str] = None) -> None:
         """
         Uploads a file to the specified S3 bucket along with its metadata.
+        Throttled and transient failures of its requests are retried with backoff by botocore.
 
         :param bucket_name: The name of the bucket to upload the file to.
         :param filename: The local path of the file to upload.
         :param metadata: A dictionary containing metadata for the uploaded file.
+        :param checksum_algorithm: Optional S3 additional checksum to store with the object (see put_file).
         """
         try:
-            # Controleer of het bestand bestaat
-            if not os.path.exists(local_filename):
-                raise FileNotFoundError(f"The file {local_filename} was not found.")
-                
-            # Bepaal het MIME-type
-            mime_type, _ = mimetypes.guess_type(object_key)
-            if mime_type is None:
-                mime_type = 'application/octet-stream'
-            
-            # Maak de extra argumenten voor de upload
-            extra_args = {
-                "Metadata": self._encode_metadata(metadata), 
-                "ContentType": mime_type
-            }
-
-            # Use upload_file instead of put_object for large files
-            # upload_file automatically handles file size and chunking
-            self.s3_client.upload_file(
-                local_filename,
-                bucket_name,
-                object_key,
-                ExtraArgs=extra_args
-            )
+            self.controller.call(self.put_file, bucket_name, object_key, local_filename, metadata,
+                                 checksum_algorithm=checksum_algorithm)
             print(f"File {local_filename} uploaded successfully to {bucket_name}: {object_key} .")
         except FileNotFoundError:
             print(f"The file {local_filename} was not found.")
@@ -191,19 +303,390 @@ class S3Storage:
             print(f"An error occurred: Failed to upload {local_filename} to {bucket_name}: {object_key}: {e}")
 
 
-    def get_file_metadata(self, bucket: str, file_key: str) -> dict:
+    def put_file(self, bucket_name: str, object_key: str, local_filename: str, metadata: dict,
+                 expected_md5: Optional[str] = None, compute_sha256: bool = False,
+                 upload_id: Optional[str] = None, part_size: Optional[int] = None,
+                 on_multipart_started: Optional[Callable[[str, int], None]] = None,
+                 checksum_algorithm: Optional[str] = None, full_object_checksum: Optional[bool] = None) -> UploadResult:
+        """
+        Uploads a file to the specified S3 bucket along with its metadata, like store_file,
+        but raises on failure instead of printing. Safe to call from multiple threads.
+
+        The file is read only once: its MD5 (and optionally SHA-256) is computed from the same bytes that
+        are sent. Files below the multipart threshold of transfer_config are read into memory and sent with
+        a single PUT carrying Content-MD5, so the server rejects a corrupted transfer. Larger files are
+        uploaded in parts, each with its own Content-MD5, max_concurrency parts at a time. Such an upload can
+        be resumed by passing the upload_id and part_size of an earlier, interrupted attempt; parts that are
+        already present with a matching MD5 are not sent again.
+
+        With a checksum_algorithm, an S3 additional checksum is computed in the same pass and sent with the
+        object (and with every part), so S3 validates and stores it. For a multipart upload S3 stores a composite
+        checksum of the part checksums, or, with full_object_checksum (CRC32 and CRC32C only), the checksum of
+        the whole file. The stored checksum can be read back without downloading with get_object_checksum.
+
+        :param bucket_name: The name of the bucket to upload the file to.
+        :param object_key: The key of the object in the bucket.
+        :param local_filename: The local path of the file to upload.
+        :param metadata: A dictionary containing metadata for the uploaded file.
+        :param expected_md5: Optional MD5 (e.g. the manifest MD5Hash) the file must have. On a mismatch a
+                             ChecksumMismatchError is raised: a single-part file is not sent and a multipart
+                             upload is aborted instead of completed.
+        :param compute_sha256: If True, also compute the SHA-256 of the file.
+        :param upload_id: Optional id of an unfinished multipart upload of this file to resume.
+        :param part_size: Part size of the unfinished multipart upload given by upload_id.
+        :param on_multipart_started: Optional callable(upload_id, part_size), called when a new multipart
+                                     upload is created. If given, a multipart upload that fails for other
+                                     reasons than a checksum mismatch is left open so it can be resumed;
+                                     otherwise it is aborted.
+        :param checksum_algorithm: Optional additional checksum: 'SHA256', 'SHA1', 'CRC32' or 'CRC32C' (the
+                                   latter needs awscrt). Defaults to the checksum_algorithm of the transfer profile.
+        :param full_object_checksum: For multipart uploads, store a full-object instead of a composite checksum.
+                                     Defaults to the full_object_checksum of the transfer profile.
+        :return: An UploadResult with the ETag, size, computed digests and additional checksum.
+        """
+        checksum_algorithm = checksum_algorithm or self.transfer_profile.checksum_algorithm
+        if checksum_algorithm:
+            checksum_algorithm = normalize_algorithm(checksum_algorithm)
+        if full_object_checksum is None:
+            full_object_checksum = self.transfer_profile.full_object_checksum
+        if checksum_algorithm and full_object_checksum and checksum_algorithm not in FULL_OBJECT_ALGORITHMS:
+            raise ValueError(f"S3 has no full-object {checksum_algorithm} checksum for multipart uploads; "
+                             f"use {' or '.join(FULL_OBJECT_ALGORITHMS)}")
+
+        # Controleer of het bestand bestaat; één stat levert ook de grootte
+        try:
+            file_size = os.stat(local_filename).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"The file {local_filename} was not found.") from None
+
+        mime_type = self._content_type(object_key)
+        if upload_id is None or part_size is None:
+            upload_id, part_size = None, self._part_size_for(file_size)
+
+        if part_size is None:
+            encoded_metadata = self._encode_metadata(metadata)
+            result = self._put_single_part(bucket_name, object_key, local_filename, encoded_metadata, mime_type,
+                                           expected_md5, compute_sha256, checksum_algorithm)
+        else:
+            # Leg de partgrootte van een multipart upload vast, zodat de ETag later lokaal na te rekenen is
+            metadata = {**metadata, PART_SIZE_METADATA_KEY: part_size}
+            encoded_metadata = self._encode_metadata(metadata)
+            result = self._put_multipart(bucket_name, object_key, local_filename, metadata, mime_type, part_size,
+                                         upload_id, on_multipart_started, expected_md5, compute_sha256,
+                                         checksum_algorithm, full_object_checksum)
+
+        if self.inventory is not None:
+            self.inventory.record_upload(bucket_name, object_key, result.etag, result.size,
+                                         {key.lower(): value for key, value in encoded_metadata.items()})
+        return result
+
+
+    def _put_single_part(self, bucket_name: str, object_key: str, local_filename: str, encoded_metadata: dict,
+                         content_type: str, expected_md5: Optional[str] = None, compute_sha256: bool = False,
+                         checksum_algorithm: Optional[str] = None) -> UploadResult:
+        """
+        Sends a file below the multipart threshold from memory with a single put_object carrying its Content-MD5,
+        so the server rejects a corrupted transfer.
+        """
+        with open(local_filename, "rb") as f:
+            data = f.read()
+        md5 = hashlib.md5(data)
+        sha256 = hashlib.sha256(data).hexdigest() if compute_sha256 else None
+        self._check_md5(object_key, md5.hexdigest(), expected_md5)
+        checksum = None
+        checksum_args = {}
+        if checksum_algorithm:
+            checksum = Checksum(checksum_algorithm)
+            checksum.update(data)
+            checksum_args = {'ChecksumAlgorithm': checksum_algorithm,
+                             checksum_field(checksum_algorithm): checksum.value}
+        response = self.s3_client.put_object(
+            Bucket=bucket_name,
+            Key=object_key,
+            Body=data,
+            ContentMD5=base64.b64encode(md5.digest()).decode('ascii'),
+            Metadata=encoded_metadata,
+            ContentType=content_type,
+            **checksum_args
+        )
+        return UploadResult(response['ETag'].strip('"'), len(data), md5.hexdigest(), sha256,
+                            checksum_algorithm=checksum_algorithm,
+                            checksum=checksum.value if checksum_algorithm else None)
+
+
+    def _send_small_body_directly(self, params=None, **kwargs) -> None:
+        """
+        botocore sends every upload body with 'Expect: 100-continue' and waits for the server's go-ahead, a full
+        round trip. For a body of a few KB that wait costs more than sending a body the server might reject.
+        """
+        if params and 'Expect' in params.get('headers', {}):
+            size = body_size(params.get('body'))
+            if 0 < size < self.transfer_profile.small_object_threshold:
+                del params['headers']['Expect']
+
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _content_type_for_suffix(suffix: str) -> str:
+        mime_type, _ = mimetypes.guess_type(f"file{suffix}")
+        return mime_type or 'application/octet-stream'
+
+
+    @classmethod
+    def _content_type(cls, object_key: str) -> str:
+        """The MIME type of a key, looked up once per combination of its last two extensions (e.g. '.meta.json')."""
+        return cls._content_type_for_suffix(''.join(PurePosixPath(object_key).suffixes[-2:]))
+
+
+    def _put_multipart(self, bucket_name: str, object_key: str, local_filename: str, metadata: dict,
+                       content_type: str, part_size: int, upload_id: Optional[str],
+                       on_multipart_started: Optional[Callable[[str, int], None]],
+                       expected_md5: Optional[str] = None, compute_sha256: bool = False,
+                       checksum_algorithm: Optional[str] = None, full_object_checksum: bool = False) -> UploadResult:
+        """
+        Uploads a file in parts of part_size, resuming upload_id if it still exists.
+        The file is read sequentially, so the whole-file digests are computed in the same pass;
+        at most max_concurrency parts are held in memory.
+        """
+        field = checksum_field(checksum_algorithm) if checksum_algorithm else None
+        uploaded_parts = self._list_uploaded_parts(bucket_name, object_key, upload_id) if upload_id else None
+        if uploaded_parts is None:
+            checksum_args = {}
+            if checksum_algorithm:
+                checksum_args = {'ChecksumAlgorithm': checksum_algorithm,
+                                 'ChecksumType': 'FULL_OBJECT' if full_object_checksum else 'COMPOSITE'}
+            response = self.s3_client.create_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                Metadata=self._encode_metadata(metadata),
+                ContentType=content_type,
+                **checksum_args
+            )
+            upload_id = response['UploadId']
+            uploaded_parts = {}
+            if on_multipart_started:
+                on_multipart_started(upload_id, part_size)
+
+        max_concurrency = max(1, self.transfer_config.max_concurrency)
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256() if compute_sha256 else None
+        whole_checksum = Checksum(checksum_algorithm) if checksum_algorithm and full_object_checksum else None
+        size = 0
+        parts = []
+        try:
+            with open(local_filename, "rb") as f, ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                pending = set()
+                part_number = 0
+                while data := f.read(part_size):
+                    part_number += 1
+                    size += len(data)
+                    md5.update(data)
+                    if sha256:
+                        sha256.update(data)
+                    if whole_checksum:
+                        whole_checksum.update(data)
+                    part_md5 = hashlib.md5(data)
+                    previous = uploaded_parts.get(part_number)
+                    if previous and previous['Size'] == len(data) and previous['ETag'].strip('"') == part_md5.hexdigest():
+                        part = {'PartNumber': part_number, 'ETag': previous['ETag']}
+                        if field and previous.get(field):
+                            part[field] = previous[field]
+                        parts.append(part)
+                        continue
+                    if len(pending) >= max_concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        parts.extend(future.result() for future in done)
+                    pending.add(executor.submit(self._upload_part, bucket_name, object_key, upload_id,
+                                                part_number, data, part_md5.digest(), checksum_algorithm))
+                parts.extend(future.result() for future in pending)
+
+            self._check_md5(object_key, md5.hexdigest(), expected_md5)
+            checksum_args = {}
+            if whole_checksum:
+                checksum_args = {'ChecksumType': 'FULL_OBJECT', field: whole_checksum.value}
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': sorted(parts, key=lambda part: part['PartNumber'])},
+                **checksum_args
+            )
+        except Exception as e:
+            if on_multipart_started is None or isinstance(e, ChecksumMismatchError):
+                self.s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+            raise
+        checksum = None
+        if field:
+            checksum = response.get(field)
+            if checksum is None and whole_checksum:
+                checksum = whole_checksum.value
+            elif checksum is None and all(part.get(field) for part in parts):
+                checksum = composite_value(checksum_algorithm, [base64.b64decode(part[field]) for part in
+                                                                sorted(parts, key=lambda part: part['PartNumber'])])
+        return UploadResult(response['ETag'].strip('"'), size, md5.hexdigest(),
+                            sha256.hexdigest() if sha256 else None, part_size,
+                            checksum_algorithm=checksum_algorithm, checksum=checksum)
+
+
+    @staticmethod
+    def _check_md5(object_key: str, md5hash: str, expected_md5: Optional[str]) -> None:
+        if expected_md5 is not None and md5hash != expected_md5:
+            raise ChecksumMismatchError(f"MD5 of {object_key} is {md5hash}, expected {expected_md5}")
+
+
+    def _upload_part(self, bucket_name: str, object_key: str, upload_id: str, part_number: int,
+                     data: bytes, md5_digest: bytes, checksum_algorithm: Optional[str] = None) -> dict:
+        checksum_args = {}
+        if checksum_algorithm:
+            checksum = Checksum(checksum_algorithm)
+            checksum.update(data)
+            checksum_args[checksum_field(checksum_algorithm)] = checksum.value
+        response = self.s3_client.upload_part(
+            Bucket=bucket_name,
+            Key=object_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+            ContentMD5=base64.b64encode(md5_digest).decode('ascii'),
+            **checksum_args
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag'], **checksum_args}
+
+
+    def _list_uploaded_parts(self, bucket_name: str, object_key: str, upload_id: str) -> Optional[Dict[int, dict]]:
+        """
+        Returns the parts already uploaded for a multipart upload by part number,
+        or None if the upload no longer exists (completed, aborted or expired).
+        """
+        try:
+            paginator = self.s3_client.get_paginator('list_parts')
+            return {
+                part['PartNumber']: part
+                for page in paginator.paginate(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+                for part in page.get('Parts', [])
+            }
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchUpload', '404', 'NotFound'):
+                return None
+            raise
+
+
+    def _part_size_for(self, file_size: int) -> Optional[int]:
+        """
+        Returns the part size put_file uses for a file of the given size,
+        or None if the file is uploaded in a single part.
+        """
+        if file_size < self.transfer_config.multipart_threshold:
+            return None
+        return ChunksizeAdjuster().adjust_chunksize(self.transfer_config.multipart_chunksize, file_size)
+
+
+    def get_file(self, bucket_name: str, object_key: str, local_filename: str,
+                 expected_md5: Optional[str] = None) -> DownloadResult:
+        """
+        Downloads an object to a local file, verifying it while the bytes arrive. Safe to call from multiple threads.
+
+        Objects below the multipart threshold of transfer_config are read with a single GET; larger ones with
+        ranged GETs of multipart_chunksize, max_concurrency at a time, all conditional on the ETag of the first
+        HEAD, so an object that is replaced during the download fails instead of being mixed. The MD5 is computed
+        over the parts in order, so no second read of the file is needed. The data is written to a temporary file
+        next to local_filename, which only replaces local_filename when the download is complete and correct.
+
+        :param bucket_name: The name of the bucket containing the object.
+        :param object_key: The key of the object.
+        :param local_filename: The local path to write to. Missing directories are created.
+        :param expected_md5: Optional MD5 (e.g. the manifest MD5Hash) the object must have. On a mismatch a
+                             ChecksumMismatchError is raised and local_filename is left untouched.
+        :return: A DownloadResult with the ETag, size and computed MD5.
+        """
+        response = self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        etag = response['ETag']
+        size = response['ContentLength']
+        part_size = None
+        if size >= self.transfer_config.multipart_threshold:
+            part_size = self.transfer_config.multipart_chunksize
+
+        os.makedirs(os.path.dirname(os.path.abspath(local_filename)), exist_ok=True)
+        temp_filename = f"{local_filename}.download"
+        md5 = hashlib.md5()
+        try:
+            with open(temp_filename, "wb") as f:
+                if part_size is None:
+                    body = self.s3_client.get_object(Bucket=bucket_name, Key=object_key, IfMatch=etag)['Body']
+                    for chunk in body.iter_chunks(1024 * 1024):
+                        self._write_downloaded(f, md5, chunk)
+                else:
+                    self._get_ranges(bucket_name, object_key, etag, size, part_size, f, md5)
+                written = f.tell()
+            if written != size:
+                raise IOError(f"Downloaded {written} of {size} bytes of {object_key}")
+            self._check_md5(object_key, md5.hexdigest(), expected_md5)
+            os.replace(temp_filename, local_filename)
+        except BaseException:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+        return DownloadResult(etag.strip('"'), size, md5.hexdigest())
+
+
+    def _get_ranges(self, bucket_name: str, object_key: str, etag: str, size: int, part_size: int, f, md5) -> None:
+        """Fetches the object in ranges, max_concurrency at a time, and writes and hashes them in order."""
+        max_concurrency = max(1, self.transfer_config.max_concurrency)
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = deque()
+            for start in range(0, size, part_size):
+                if len(pending) >= max_concurrency:
+                    self._write_downloaded(f, md5, pending.popleft().result())
+                pending.append(executor.submit(self._get_range, bucket_name, object_key, etag,
+                                               start, min(start + part_size, size) - 1))
+            while pending:
+                self._write_downloaded(f, md5, pending.popleft().result())
+
+
+    def _get_range(self, bucket_name: str, object_key: str, etag: str, first: int, last: int) -> bytes:
+        response = self.s3_client.get_object(Bucket=bucket_name, Key=object_key, IfMatch=etag,
+                                             Range=f"bytes={first}-{last}")
+        return response['Body'].read()
+
+
+    def _write_downloaded(self, f, md5, data: bytes) -> None:
+        if self.rate_limits is not None:
+            self.rate_limits.download_callback(len(data))
+        md5.update(data)
+        f.write(data)
+
+
+    def get_file_metadata(self, bucket: str, file_key: str, use_inventory: bool = True) -> dict:
         """
         Retrieves the metadata of a specific file (object) from an S3 bucket.
         
         :param bucket: The name of the bucket where the file is stored.
         :param file_key: The key (filename) of the object in the bucket.
+        :param use_inventory: If False, always send a HEAD request, even when an inventory is set.
         :return: The metadata of the file, or None if the file or bucket does not exist.
+                 Answered from the inventory when it holds a fresh listing with metadata of the key.
         """
+        if use_inventory and self.inventory is not None and self.inventory.is_fresh(bucket, file_key):
+            if self.inventory.get(bucket, file_key) is None:
+                return None
+            metadata = self.inventory.get_metadata(bucket, file_key)
+            if metadata is not None:
+                return metadata
+        response = self._head_object_or_none(bucket, file_key)
+        if response is None:
+            return None
+        metadata = response.get('Metadata', {})
+        #print(f"Metadata for '{file_key}' in bucket '{bucket}': {metadata}")
+        if self.inventory is not None and self.inventory.get(bucket, file_key) is not None:
+            self.inventory.record_metadata(bucket, file_key, metadata, response['ETag'].strip('"'),
+                                           response['LastModified'].isoformat())
+        return metadata
+
+
+    def _head_object_or_none(self, bucket: str, file_key: str) -> Optional[dict]:
+        """The head_object response, or None if the object or bucket does not exist."""
         try:
-            response = self.s3_client.head_object(Bucket=bucket, Key=file_key)
-            metadata = response.get('Metadata', {})
-            #print(f"Metadata for '{file_key}' in bucket '{bucket}': {metadata}")
-            return metadata
+            return self.s3_client.head_object(Bucket=bucket, Key=file_key)
         except ClientError as e:
             # For missing objects or buckets, return None silently so callers can treat it as "does not exist".
             code = e.response.get('Error', {}).get('Code')
@@ -211,48 +694,121 @@ class S3Storage:
                 return None
             # Other client errors should not be swallowed; re-raise to surface real issues.
             raise
-        except Exception as e:
-            # Unexpected exceptions should be propagated to aid debugging.
-            raise
 
 
-    def verify_upload(self, bucket_name, file_key, local_md5) -> None:
+    def get_object_checksum(self, bucket_name: str, file_key: str) -> Optional[RemoteChecksum]:
+        """
+        Reads the additional checksum S3 stores with an object with a HEAD request, without downloading it.
+
+        :param bucket_name: The name of the bucket containing the object.
+        :param file_key: The key of the object.
+        :return: The RemoteChecksum, with the part size put_file recorded for multipart uploads,
+                 or None if the object was stored without an additional checksum.
+        """
+        response = self.s3_client.head_object(Bucket=bucket_name, Key=file_key, ChecksumMode='ENABLED')
+        return self._checksum_from_response(bucket_name, file_key, response)
+
+
+    def _checksum_from_response(self, bucket_name: str, file_key: str, response: dict) -> Optional[RemoteChecksum]:
+        """The checksum in a head_object response; a composite one is read with get_object_attributes."""
+        recorded_part_size = response.get('Metadata', {}).get(PART_SIZE_METADATA_KEY.lower())
+        for algorithm in CHECKSUM_ALGORITHMS:
+            field = checksum_field(algorithm)
+            if response.get(field):
+                remote = RemoteChecksum(algorithm, response[field], response.get('ChecksumType'),
+                                        int(recorded_part_size) if recorded_part_size else None)
+                if remote.is_composite:
+                    attributes = self.s3_client.get_object_attributes(Bucket=bucket_name, Key=file_key,
+                                                                      ObjectAttributes=['Checksum'])
+                    remote.value = attributes.get('Checksum', {}).get(field) or remote.value
+                return remote
+        return None
+
+
+    def verify_checksum(self, bucket_name: str, file_key: str, local_filename: str,
+                        remote: Optional[RemoteChecksum] = None) -> Optional[bool]:
+        """
+        Verifies an object against a local file by its S3 additional checksum, without downloading it.
+
+        :param bucket_name: The name of the bucket containing the object.
+        :param file_key: The key of the object.
+        :param local_filename: The local path of the file to compare with.
+        :param remote: The checksum of the object, if already read with get_object_checksum.
+        :return: True or False, or None if the object has no checksum or a composite one of unknown part size.
+        """
+        remote = remote or self.get_object_checksum(bucket_name, file_key)
+        if remote is None or (remote.is_composite and remote.part_size is None):
+            return None
+        expected = calculate_file_checksum(local_filename, remote.algorithm,
+                                           remote.part_size if remote.is_composite else None,
+                                           full_object=not remote.is_composite)
+        # Composite checksums are returned with ('-3') or without the number of parts, depending on the request
+        return expected.split('-')[0] == remote.value.split('-')[0]
+
+
+    def verify_upload(self, bucket_name, file_key, local_md5, local_filename: str = None,
+                      part_size: int = None) -> bool:
         """
         Verifies if a file was correctly uploaded by comparing its local MD5 checksum with the S3 ETag.
 
+        For multipart uploads the ETag is not an MD5 of the content. If the part size used at upload time
+        is known (passed in, e.g. from the manifest entry, or recorded in the object metadata by put_file)
+        and the local file is available, the expected multipart ETag is calculated locally, so a single
+        HEAD request suffices. Otherwise an additional checksum stored with the object is compared with the
+        local file. Only when neither is possible is the object downloaded and hashed.
+
         :param bucket_name: The name of the bucket containing the file.
         :param file_key: The key (filename) of the uploaded file.
         :param local_md5: The MD5 checksum of the local file to compare against the uploaded file.
+        :param local_filename: Optional local path of the file, needed to verify multipart uploads without downloading.
+        :param part_size: Optional part size used at upload time; defaults to the object's PartSize metadata.
+        :return: True if the upload was verified successfully, False otherwise.
         """
-
-        def calculate_md5(file_path):
-            """Calculates the MD5 checksum of a file."""
-            md5_hash = hashlib.md5()
-            with open(file_path, "rb") as f:
-                while chunk := f.read(8192):
-                    md5_hash.update(chunk)
-            return md5_hash.hexdigest()
-
-        response = self.s3_client.head_object(Bucket=bucket_name, Key=file_key)
+        response = self.s3_client.head_object(Bucket=bucket_name, Key=file_key, ChecksumMode='ENABLED')
         s3_etag = response['ETag'].strip('"')
         
         # Check for multi-part upload (S3 ETags of multi-part uploads contain '-' and part count)
         if '-' in s3_etag:
+            if part_size is None:
+                recorded_part_size = response.get('Metadata', {}).get(PART_SIZE_METADATA_KEY.lower())
+                part_size = int(recorded_part_size) if recorded_part_size else None
+
+            if part_size is not None and local_filename and os.path.exists(local_filename):
+                expected_etag = util.calculate_multipart_etag(local_filename, part_size)
+                if expected_etag == s3_etag:
+                    print(f"Multi-part upload verification successful: {file_key}")
+                    return True
+                print(f"Multi-part upload verification failed for {file_key}. Expected ETag: {expected_etag}, S3 ETag: {s3_etag}")
+                return False
+
+            remote_checksum = self._checksum_from_response(bucket_name, file_key, response)
+            if remote_checksum is not None and local_filename and os.path.exists(local_filename):
+                verified = self.verify_checksum(bucket_name, file_key, local_filename, remote_checksum)
+                if verified is not None:
+                    status = "successful" if verified else "failed"
+                    print(f"Multi-part upload checksum verification {status}: {file_key}")
+                    return verified
+
             print(f"Multi-part upload detected for {file_key}. Downloading file for verification...")
             with tempfile.NamedTemporaryFile(delete=False) as temp_file:
                 download_path = temp_file.name
-            self.s3_client.download_file(bucket_name, file_key, download_path)
-            downloaded_md5 = calculate_md5(download_path)
+            try:
+                self.s3_client.download_file(bucket_name, file_key, download_path, Config=self.transfer_config,
+                                             Callback=self.rate_limits.download_callback if self.rate_limits else None)
+                downloaded_md5 = util.calculate_md5(download_path)
+            finally:
+                os.remove(download_path)
             if downloaded_md5 == local_md5:
                 print(f"Multi-part upload verification successful: {file_key}")
-            else:
-                print(f"Multi-part upload verification failed for {file_key}. Local MD5: {local_md5}, Downloaded MD5: {downloaded_md5}")
-            os.remove(download_path)
+                return True
+            print(f"Multi-part upload verification failed for {file_key}. Local MD5: {local_md5}, Downloaded MD5: {downloaded_md5}")
+            return False
         else:
             if local_md5 == s3_etag:
                 print(f"Upload verification successful: {file_key}")
-            else:
-                print(f"Upload verification failed for {file_key}. Local MD5: {local_md5}, S3 ETag: {s3_etag}")
+                return True
+            print(f"Upload verification failed for {file_key}. Local MD5: {local_md5}, S3 ETag: {s3_etag}")
+            return False
 
 
     def update_acl(self, bucket_name, file_key, acl="public-read") -> None:
@@ -271,6 +827,47 @@ class S3Storage:
             print(f"An error occurred while updating ACL: {e}")
         
 
+    def get_object_grants(self, bucket_name: str, file_key: str) -> list:
+        """
+        Retrieves the grants of the ACL of an object, raising on failure.
+
+        :param bucket_name: The name of the bucket containing the object.
+        :param file_key: The key (filename) of the object.
+        :return: List of grants, each with a 'Grantee' and a 'Permission'.
+        """
+        return self.s3_client.get_object_acl(Bucket=bucket_name, Key=file_key)['Grants']
+
+
+    @staticmethod
+    def grants_match_acl(grants: list, acl: str) -> bool:
+        """
+        Checks whether the grants of an object are those of a canned ACL, as far as group grants go.
+        Only 'private', 'public-read' and 'authenticated-read' can be recognized; other ACLs never match.
+
+        :param grants: The grants, as returned by get_object_grants.
+        :param acl: The canned ACL.
+        """
+        group_grants = {
+            (grant['Grantee'].get('URI'), grant['Permission'])
+            for grant in grants if grant['Grantee'].get('Type') == 'Group'
+        }
+        expected = {
+            'private': set(),
+            'public-read': {(ALL_USERS_URI, 'READ')},
+            'authenticated-read': {(AUTHENTICATED_USERS_URI, 'READ')},
+        }
+        return acl in expected and group_grants == expected[acl]
+
+
+    @staticmethod
+    def canned_acl_for_grants(grants: list) -> Optional[str]:
+        """Get the canned ACL ('private', 'public-read' or 'authenticated-read') the grants match, or None."""
+        for acl in ('private', 'public-read', 'authenticated-read'):
+            if S3Storage.grants_match_acl(grants, acl):
+                return acl
+        return None
+
+
     def get_object_acl(self, bucket_name, file_key):
         """
         Retrieves the ACL of a specific object in an S3 bucket.
@@ -294,19 +891,43 @@ class S3Storage:
         :param prefix: Optional prefix to filter the listed objects.
         :return: List of all object keys in the bucket (optionally filtered by prefix).
         """
+        return [obj.key for obj in self.iter_objects(bucket_name, prefix)]
+
+
+    def iter_objects(self, bucket_name: str, prefix: str = None) -> Iterator[RemoteObject]:
+        """
+        Iterates over the objects in a bucket using paginated ListObjectsV2 calls, in key order.
+
+        :param bucket_name: The name of the bucket to list objects from.
+        :param prefix: Optional prefix to filter the listed objects.
+        :return: Iterator of RemoteObject with key, ETag (without quotes), size and last-modified time.
+        """
         paginator = self.s3_client.get_paginator('list_objects_v2')
         pagination_params = {'Bucket': bucket_name}
         if prefix:
             pagination_params['Prefix'] = prefix
 
-        page_iterator = paginator.paginate(**pagination_params)
+        for page in paginator.paginate(**pagination_params):
+            for obj in page.get('Contents', []):
+                yield RemoteObject(obj['Key'], obj['ETag'].strip('"'), obj['Size'], obj['LastModified'].isoformat())
 
-        all_keys = []
-        for page in page_iterator:
-            contents = page.get('Contents', [])
-            all_keys.extend(obj['Key'] for obj in contents)
 
-        return all_keys
+    def list_objects(self, bucket_name: str, prefix: str = None, refresh: bool = False) -> Dict[str, RemoteObject]:
+        """
+        Lists a bucket (prefix) once and returns an in-memory map of key to RemoteObject.
+        With an inventory, a fresh prefix is answered from the inventory; otherwise the inventory is
+        refreshed for the prefix first.
+
+        :param bucket_name: The name of the bucket to list objects from.
+        :param prefix: Optional prefix to filter the listed objects.
+        :param refresh: If True, always list S3 (and refresh the inventory, if any).
+        :return: Dictionary of object key to RemoteObject.
+        """
+        if self.inventory is None:
+            return {obj.key: obj for obj in self.iter_objects(bucket_name, prefix)}
+        if refresh or not self.inventory.is_fresh(bucket_name, prefix or ""):
+            self.inventory.refresh(self, bucket_name, prefix or "")
+        return {obj.key: obj for obj in self.inventory.objects(bucket_name, prefix or "")}
 
     
     def get_bucket_policy(self, bucket_name) -> str:
@@ -369,12 +990,14 @@ class S3Storage:
             raise e
 
 
-    def delete_bucket(self, bucket_name, force=False) -> bool:
+    def delete_bucket(self, bucket_name, force=False, workers: int = 4) -> bool:
         """
         Deletes an S3 bucket. By default, the bucket must be empty.
         
         :param bucket_name: The name of the bucket to delete.
-        :param force: If True, all objects in the bucket will be deleted before deleting the bucket.
+        :param force: If True, all objects in the bucket will be deleted before deleting the bucket,
+                      including all versions and delete markers of a versioned bucket.
+        :param workers: Number of delete_objects batches (of up to 1000 keys) to run concurrently when force is True.
         :return: True if the bucket was deleted successfully, False otherwise.
         """
         try:
@@ -385,52 +1008,28 @@ class S3Storage:
             if force:
                 print(f"Force option enabled. Deleting all objects in bucket '{bucket_name}'...")
                 
-                # List and delete all object versions if versioning is enabled
-                try:
-                    # Check if versioning is enabled
-                    versioning_status = self.get_bucket_versioning(bucket_name)
-                    if versioning_status == "Enabled" or versioning_status == "Suspended":
-                        # Delete all versions and delete markers
-                        versions_response = self.s3_client.list_object_versions(Bucket=bucket_name)
-                        
-                        # Delete versions
-                        if 'Versions' in versions_response:
-                            for version in versions_response['Versions']:
-                                self.s3_client.delete_object(
-                                    Bucket=bucket_name,
-                                    Key=version['Key'],
-                                    VersionId=version['VersionId']
-                                )
-                        
-                        # Delete delete markers
-                        if 'DeleteMarkers' in versions_response:
-                            for marker in versions_response['DeleteMarkers']:
-                                self.s3_client.delete_object(
-                                    Bucket=bucket_name,
-                                    Key=marker['Key'],
-                                    VersionId=marker['VersionId']
-                                )
-                except Exception as e:
-                    print(f"Error deleting versioned objects: {e}")
-                    return False
+                # Delete all object versions and delete markers if versioning is or was enabled
+                versioning_status = self.get_bucket_versioning(bucket_name)
+                if versioning_status == "Enabled" or versioning_status == "Suspended":
+                    deleted, errors = self.delete_objects_in_batches(
+                        bucket_name, self._iter_object_versions(bucket_name), workers=workers)
+                    if errors:
+                        print(f"Error deleting versioned objects: {len(errors)} failed, first error: {errors[0]}")
+                        return False
                 
                 # Delete all non-versioned objects
-                try:
-                    objects_response = self.s3_client.list_objects_v2(Bucket=bucket_name)
-                    if 'Contents' in objects_response:
-                        for obj in objects_response['Contents']:
-                            self.s3_client.delete_object(
-                                Bucket=bucket_name,
-                                Key=obj['Key']
-                            )
-                except Exception as e:
-                    print(f"Error deleting objects: {e}")
+                deleted, errors = self.delete_objects_in_batches(
+                    bucket_name, ({'Key': obj.key} for obj in self.iter_objects(bucket_name)), workers=workers)
+                if errors:
+                    print(f"Error deleting objects: {len(errors)} failed, first error: {errors[0]}")
                     return False
                 
                 print(f"All objects in bucket '{bucket_name}' have been deleted.")
             
             # Delete the bucket
             self.s3_client.delete_bucket(Bucket=bucket_name)
+            if self.inventory is not None:
+                self.inventory.forget_bucket(bucket_name)
             print(f"Bucket '{bucket_name}' deleted successfully.")
             return True
             
@@ -447,6 +1046,59 @@ class S3Storage:
             print(f"An error occurred while deleting bucket '{bucket_name}': {e}")
             return False
 
+
+    def _iter_object_versions(self, bucket_name: str, prefix: str = None) -> Iterator[dict]:
+        """Iterates over all versions and delete markers in a bucket as {'Key', 'VersionId'} dicts, paginated."""
+        paginator = self.s3_client.get_paginator('list_object_versions')
+        pagination_params = {'Bucket': bucket_name}
+        if prefix:
+            pagination_params['Prefix'] = prefix
+        for page in paginator.paginate(**pagination_params):
+            for version in page.get('Versions', []) + page.get('DeleteMarkers', []):
+                yield {'Key': version['Key'], 'VersionId': version['VersionId']}
+
+
+    def delete_objects_in_batches(self, bucket_name: str, objects: Iterable[dict], workers: int = 4,
+                                  batch_size: int = 1000, show_progress: bool = True) -> Tuple[int, List[dict]]:
+        """
+        Deletes objects with delete_objects calls of up to batch_size (max. 1000) keys, running
+        several batches concurrently. The objects are consumed lazily, so a paginated listing can be
+        passed in directly.
+
+        :param bucket_name: The name of the bucket containing the objects.
+        :param objects: Iterable of {'Key': ...} or {'Key': ..., 'VersionId': ...} dicts.
+        :param workers: Number of batches to delete concurrently.
+        :param batch_size: Number of objects per delete_objects call.
+        :param show_progress: If True, print a running count of deleted objects.
+        :return: Tuple of the number of deleted objects and the list of errors (dicts with Key, Code, Message).
+        """
+        def delete_batch(batch: List[dict]) -> Tuple[int, List[dict]]:
+            try:
+                response = self.controller.call(self.s3_client.delete_objects, Bucket=bucket_name,
+                                                Delete={'Objects': batch, 'Quiet': True})
+                errors = response.get('Errors', [])
+            except Exception as e:
+                errors = [{**obj, 'Code': type(e).__name__, 'Message': str(e)} for obj in batch]
+            if self.inventory is not None:
+                # Deleting a specific version may leave older versions; those keys are left to the next refresh
+                failed = {error['Key'] for error in errors}
+                self.inventory.record_deleted(bucket_name, [obj['Key'] for obj in batch
+                                                            if 'VersionId' not in obj and obj['Key'] not in failed])
+            return len(batch) - len(errors), errors
+
+        deleted = 0
+        all_errors = []
+        progress = Progress("Delete") if show_progress else None
+        for batch_deleted, batch_errors in run_concurrently(batched(objects, batch_size), delete_batch, workers):
+            deleted += batch_deleted
+            all_errors.extend(batch_errors)
+            if progress is not None:
+                progress.update(done=batch_deleted + len(batch_errors), failed=len(batch_errors))
+        if progress is not None:
+            progress.close()
+        return deleted, all_errors
+
+
     def delete_file(self, bucket_name, file_key):
         """
         Deletes a specific file (object) from an S3 bucket.
@@ -467,6 +1119,8 @@ class S3Storage:
                 
             # Delete the file
             self.s3_client.delete_object(Bucket=bucket_name, Key=file_key)
+            if self.inventory is not None:
+                self.inventory.record_deleted(bucket_name, [file_key])
             print(f"File '{file_key}' deleted successfully from bucket '{bucket_name}'.")
             return True
             
@@ -477,6 +1131,11 @@ class S3Storage:
             print(f"An error occurred while deleting file '{file_key}' from bucket '{bucket_name}': {e}")
             return False
             
+    def _metadata_as_returned(self, metadata: dict) -> dict:
+        """The metadata as a HEAD request returns it after upload: URL-encoded values under lowercase keys."""
+        return {key.lower(): value for key, value in self._encode_metadata(metadata).items()}
+
+
     def _encode_metadata(self, metadata):
         """
         URL encode metadata values to handle non-ASCII characters that are not allowed or not safe in URLs.
@@ -493,6 +1152,119 @@ class S3Storage:
         return encoded_metadata
 
 
+    def copy_file(self, source_bucket: str, source_key: str, bucket_name: str, object_key: str,
+                  metadata: Optional[dict] = None, acl: Optional[str] = None,
+                  content_type: Optional[str] = None) -> CopyResult:
+        """
+        Copies an object within S3, without the data passing through this host. Safe to call from multiple threads.
+
+        An object that was stored with a single PUT is copied with a single copy_object, which keeps its ETag
+        (the MD5 of the content). A multipart object, or an object above the 5 GB limit of copy_object, is
+        copied with upload_part_copy, max_concurrency parts at a time and conditional on the source ETag. The
+        parts have the part size of the source (from its PartSize metadata, or the size of its first part),
+        so the copy gets the same multipart ETag and can still be verified locally.
+
+        :param source_bucket: The bucket of the object to copy.
+        :param source_key: The key of the object to copy.
+        :param bucket_name: The destination bucket; may be the source bucket.
+        :param object_key: The destination key; may be the source key, e.g. to replace the metadata.
+        :param metadata: Optional metadata (already URL-encoded, see _encode_metadata) replacing the metadata of
+                         the source. Defaults to the metadata of the source.
+        :param acl: Optional canned ACL of the copy. Without it the copy gets the bucket's default (private).
+        :param content_type: Optional Content-Type of the copy. Defaults to that of the source.
+        :return: A CopyResult with the ETag and size of the copy.
+        """
+        head = self.s3_client.head_object(Bucket=source_bucket, Key=source_key)
+        size = head['ContentLength']
+        source_etag = head['ETag']
+        metadata = dict(head.get('Metadata', {}) if metadata is None else metadata)
+        content_type = content_type or head.get('ContentType') or self._content_type(object_key)
+        acl_args = {'ACL': acl} if acl else {}
+
+        if '-' not in source_etag.strip('"') and size <= MAX_COPY_OBJECT_SIZE:
+            response = self.s3_client.copy_object(
+                Bucket=bucket_name,
+                Key=object_key,
+                CopySource={'Bucket': source_bucket, 'Key': source_key},
+                CopySourceIfMatch=source_etag,
+                Metadata=metadata,
+                MetadataDirective='REPLACE',
+                ContentType=content_type,
+                **acl_args
+            )
+            copy_result = response.get('CopyObjectResult', {})
+            result = CopyResult(copy_result.get('ETag', source_etag).strip('"'), size,
+                                last_modified=copy_result['LastModified'].isoformat()
+                                if 'LastModified' in copy_result else None)
+        else:
+            part_size = self._source_part_size(source_bucket, source_key, head)
+            # Leg de partgrootte vast, zodat de ETag van de kopie lokaal na te rekenen blijft
+            if not any(name.lower() == PART_SIZE_METADATA_KEY.lower() for name in metadata):
+                metadata[PART_SIZE_METADATA_KEY] = str(part_size)
+            result = self._copy_multipart(source_bucket, source_key, source_etag, size, part_size,
+                                          bucket_name, object_key, metadata, content_type, acl_args)
+
+        if self.inventory is not None:
+            self.inventory.record_upload(bucket_name, object_key, result.etag, result.size,
+                                         {name.lower(): value for name, value in metadata.items()},
+                                         result.last_modified)
+        return result
+
+
+    def _source_part_size(self, source_bucket: str, source_key: str, head: dict) -> int:
+        """The part size of a multipart object: its PartSize metadata or the size of its first part."""
+        recorded_part_size = head.get('Metadata', {}).get(PART_SIZE_METADATA_KEY.lower())
+        if recorded_part_size:
+            return int(recorded_part_size)
+        if '-' in head['ETag']:
+            first_part = self.s3_client.head_object(Bucket=source_bucket, Key=source_key, PartNumber=1)
+            if first_part.get('PartsCount', 1) > 1:
+                return first_part['ContentLength']
+        return self._part_size_for(head['ContentLength']) or self.transfer_config.multipart_chunksize
+
+
+    def _copy_multipart(self, source_bucket: str, source_key: str, source_etag: str, size: int, part_size: int,
+                        bucket_name: str, object_key: str, metadata: dict, content_type: str,
+                        acl_args: dict) -> CopyResult:
+        """Copies an object in ranges of part_size with upload_part_copy, max_concurrency parts at a time."""
+        response = self.s3_client.create_multipart_upload(
+            Bucket=bucket_name,
+            Key=object_key,
+            Metadata=metadata,
+            ContentType=content_type,
+            **acl_args
+        )
+        upload_id = response['UploadId']
+
+        def copy_part(part_number: int) -> dict:
+            first = (part_number - 1) * part_size
+            last = min(first + part_size, size) - 1
+            part = self.s3_client.upload_part_copy(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                CopySource={'Bucket': source_bucket, 'Key': source_key},
+                CopySourceIfMatch=source_etag,
+                CopySourceRange=f"bytes={first}-{last}"
+            )
+            return {'PartNumber': part_number, 'ETag': part['CopyPartResult']['ETag']}
+
+        try:
+            part_numbers = range(1, max(1, -(-size // part_size)) + 1)
+            parts = list(run_concurrently(part_numbers, copy_part, self.transfer_config.max_concurrency))
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': sorted(parts, key=lambda part: part['PartNumber'])}
+            )
+        except Exception:
+            self.s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+            raise
+        return CopyResult(response['ETag'].strip('"'), size, part_size)
+
+
     def update_object_metadata(self, bucket_name, object_key, new_metadata, acl='private'):
         '''
         to modify metadata of an object, there is no dedicated method in boto3, but one can do so by using copy_object 
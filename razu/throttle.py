@@ -0,0 +1,291 @@
+"""Adaptive concurrency and rate limits for S3 requests, shared by all bulk operations of an S3Storage."""
+
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, TypeVar, Union
+
+import yaml
+from botocore.exceptions import ClientError
+
+from razu.config import Config
+from razu.transfer_profiles import parse_size
+
+R = TypeVar('R')
+
+# Error codes with which S3 (and compatible stores) reject a request because of load; the request was not executed
+THROTTLING_ERROR_CODES = {
+    'SlowDown', '503', 'ServiceUnavailable', 'Throttling', 'ThrottlingException', 'ThrottledException',
+    'RequestThrottled', 'RequestLimitExceeded', 'TooManyRequests', '429', 'TooManyRequestsException',
+}
+
+
+def error_code(e: BaseException) -> Optional[str]:
+    if isinstance(e, ClientError):
+        return e.response.get('Error', {}).get('Code')
+    return None
+
+
+def is_throttling_error(e: BaseException) -> bool:
+    return error_code(e) in THROTTLING_ERROR_CODES
+
+
+class ConcurrencyController:
+    """
+    Limits the number of S3 calls in flight with an AIMD window.
+
+    Every successful call grows the window by about one slot per window of calls (additive increase);
+    a throttling response halves it, at most once per cooldown period (multiplicative decrease), so the
+    bulk operations sharing the controller settle near the throughput the backend can sustain.
+
+    The controller does not retry: botocore already retries every request, as set by the retry_mode and
+    max_attempts of the transfer profile. Through observe, each botocore retry of a throttled request
+    shrinks the window.
+    """
+
+    def __init__(self, max_window: int = 32, min_window: int = 1, initial_window: Optional[int] = None,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0):
+        """
+        :param max_window: Maximum number of calls in flight, e.g. the connection pool size.
+        :param min_window: Minimum number of calls in flight.
+        :param initial_window: Window to start with. Defaults to max_window.
+        :param decrease_factor: Factor the window is multiplied by on throttling.
+        :param cooldown: Minimum number of seconds between two decreases.
+        """
+        self.max_window = max_window
+        self.min_window = min_window
+        self.window = float(initial_window if initial_window is not None else max_window)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def on_success(self) -> None:
+        with self._condition:
+            self.window = min(self.max_window, self.window + 1 / self.window)
+            self._condition.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._condition:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.window = max(self.min_window, self.window * self.decrease_factor)
+                self._last_decrease = now
+
+    @contextmanager
+    def slot(self):
+        """Waits until the window has room and holds a slot for the duration of the block."""
+        with self._condition:
+            while self.in_flight >= max(self.min_window, int(self.window)):
+                self._condition.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def call(self, func: Callable[..., R], *args, **kwargs) -> R:
+        """
+        Calls func(*args, **kwargs) within the window. A successful call grows the window; a call that fails
+        with a throttling error (after botocore's own retries) shrinks it, and the error is raised.
+
+        :param func: The call to make, e.g. a method of the S3 client or S3Storage.put_file.
+        :return: The result of func.
+        """
+        try:
+            with self.slot():
+                result = func(*args, **kwargs)
+        except Exception as e:
+            if is_throttling_error(e):
+                self.on_throttle()
+            raise
+        self.on_success()
+        return result
+
+    def observe(self, client) -> None:
+        """
+        Registers with a botocore client, so throttling responses that botocore retries by itself also shrink
+        the window, even for calls made outside call().
+        """
+        client.meta.events.register('needs-retry.s3', self._on_needs_retry)
+
+    def _on_needs_retry(self, response=None, **kwargs) -> None:
+        # response is (http_response, parsed) or None on a connection error. Returning None leaves
+        # the retry decision to botocore.
+        if response is not None:
+            http_response, parsed = response
+            code = (parsed or {}).get('Error', {}).get('Code')
+            if code in THROTTLING_ERROR_CODES or getattr(http_response, 'status_code', None) in (429, 503):
+                self.on_throttle()
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate units per second on average, with bursts of up to burst units.
+
+    A request larger than the bucket (e.g. a multipart part) is admitted by going into debt, so callers
+    after it wait until the average rate is restored. Without a rate, acquire returns immediately.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.rate = None
+        self.burst = None
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: Optional[float], burst: Optional[float] = None) -> None:
+        """Changes the rate; the burst defaults to one second worth of tokens."""
+        with self._lock:
+            was_limited = self.rate is not None
+            self.rate = rate if rate and rate > 0 else None
+            self.burst = (burst or self.rate) if self.rate else None
+            if self.rate is None:
+                self.tokens = 0.0
+            else:
+                # A new limit starts with a full bucket; a changed one keeps its debt
+                self.tokens = min(self.tokens, self.burst) if was_limited else self.burst
+            self._updated = time.monotonic()
+
+    def acquire(self, amount: float = 1) -> None:
+        with self._lock:
+            if self.rate is None:
+                return
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimits:
+    """
+    Optional limits on the bytes per second and requests per second of an S3 client, e.g. to leave room on a
+    shared uplink during office hours.
+
+    Once attached to a client, every request waits for a request token and the body of every upload request
+    waits for byte tokens; downloads made with download_callback are limited per received chunk. The limits
+    can be changed at runtime with set_limits, or by editing a control file (YAML, with bytes_per_second and
+    requests_per_second; sizes like '10MB' are allowed, empty means unlimited). The control file is checked
+    at most once per check_interval seconds, and immediately on SIGHUP when install_signal_handler was called.
+    """
+
+    def __init__(self, bytes_per_second: Union[int, str, None] = None, requests_per_second: Optional[float] = None,
+                 control_file: Optional[str] = None, check_interval: float = 1.0):
+        self.bytes = TokenBucket()
+        self.requests = TokenBucket()
+        self.bytes_per_second = None
+        self.requests_per_second = None
+        self.set_limits(bytes_per_second, requests_per_second)
+        self.control_file = control_file
+        self.check_interval = check_interval
+        self._control_mtime = None
+        self._next_check = 0.0
+        self._check_lock = threading.Lock()
+        if control_file:
+            self.reload()
+
+    def set_limits(self, bytes_per_second: Union[int, str, None] = None,
+                   requests_per_second: Optional[float] = None) -> None:
+        self.bytes_per_second = parse_size(bytes_per_second) if bytes_per_second else None
+        self.requests_per_second = float(requests_per_second) if requests_per_second else None
+        self.bytes.set_rate(self.bytes_per_second)
+        self.requests.set_rate(self.requests_per_second)
+
+    def reload(self) -> None:
+        """Applies the limits in the control file, if it exists and changed since it was last read."""
+        try:
+            mtime = os.path.getmtime(self.control_file)
+        except OSError:
+            return
+        if mtime == self._control_mtime:
+            return
+        with open(self.control_file, "r", encoding="utf-8") as f:
+            settings = yaml.safe_load(f) or {}
+        self._control_mtime = mtime
+        self.set_limits(settings.get('bytes_per_second'), settings.get('requests_per_second'))
+        print(f"Rate limits: {self.bytes_per_second or 'unlimited'} bytes/s, "
+              f"{self.requests_per_second or 'unlimited'} requests/s.")
+
+    def install_signal_handler(self) -> None:
+        """Reloads the control file on SIGHUP. Must be called from the main thread; a no-op on Windows."""
+        if self.control_file and hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self._force_reload())
+
+    def throttle_request(self, size: int = 0) -> None:
+        self._check_control_file()
+        self.requests.acquire(1)
+        if size:
+            self.bytes.acquire(size)
+
+    def download_callback(self, received: int) -> None:
+        """Callback for boto3 download_file and download_fileobj: waits for byte tokens for every received chunk."""
+        self._check_control_file()
+        self.bytes.acquire(received)
+
+    def attach(self, client) -> None:
+        """Registers with a botocore client, so every request it sends is limited."""
+        client.meta.events.register('before-send.s3', self._on_before_send)
+
+    def _on_before_send(self, request=None, **kwargs) -> None:
+        self.throttle_request(body_size(getattr(request, 'body', None)))
+        return None
+
+    def _force_reload(self) -> None:
+        self._control_mtime = None
+        self._next_check = 0.0
+
+    def _check_control_file(self) -> None:
+        if not self.control_file:
+            return
+        now = time.monotonic()
+        if now < self._next_check or not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + self.check_interval
+            self.reload()
+        except Exception as e:
+            print(f"Rate limits not changed, cannot read {self.control_file}: {e}")
+        finally:
+            self._check_lock.release()
+
+
+def body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    try:
+        position = body.tell()
+        size = body.seek(0, os.SEEK_END) - position
+        body.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def get_rate_limits() -> Optional[RateLimits]:
+    """
+    RateLimits from the 's3_rate_limits' setting in config.yaml (bytes_per_second, requests_per_second and/or
+    control_file), or None when it is not set.
+    """
+    try:
+        cfg = Config.get_instance()
+    except RuntimeError:
+        return None
+    settings = getattr(cfg, 's3_rate_limits', None)
+    if not settings:
+        return None
+    return RateLimits(settings.get('bytes_per_second'), settings.get('requests_per_second'),
+                      settings.get('control_file'))
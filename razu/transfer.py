@@ -0,0 +1,185 @@
+"""Helpers for running bulk S3 transfers concurrently and collecting per-key results."""
+
+import json
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+UPLOADED = 'uploaded'
+UPDATED = 'updated'
+DOWNLOADED = 'downloaded'
+COPIED = 'copied'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+VERIFIED = 'verified'
+MISMATCH = 'mismatch'
+MISSING = 'missing'
+UNVERIFIABLE_MULTIPART = 'unverifiable-multipart'
+NO_CHECKSUM = 'no-checksum'
+
+
+@dataclass
+class TransferResult:
+    """Outcome of a single S3 operation on one object key."""
+    key: str
+    status: str
+    size: int = 0
+    etag: Optional[str] = None
+    reason: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TransferReport(dict[str, TransferResult]):
+    """Provides dict of transfer results by key, with summary helpers."""
+
+    def add(self, result: TransferResult) -> None:
+        self[result.key] = result
+
+    def with_status(self, status: str) -> List[TransferResult]:
+        """Get all results with the given status."""
+        return [result for result in self.values() if result.status == status]
+
+    @property
+    def failed(self) -> List[TransferResult]:
+        return self.with_status(FAILED)
+
+    @property
+    def summary(self) -> Dict[str, int]:
+        """Get the number of results per status."""
+        counts: Dict[str, int] = {}
+        for result in self.values():
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(result.size for result in self.values())
+
+    def save(self, output_file: str) -> None:
+        """Save the report as JSON, so long runs can be checked afterwards."""
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "summary": self.summary,
+                "results": [asdict(result) for result in self.values()]
+            }, f, indent=4)
+
+
+class ByteBudget:
+    """Limits the total size of the items being transferred at the same time.
+
+    An item larger than the whole budget is admitted when nothing else is in flight.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        if self.max_bytes is None:
+            return
+        with self._condition:
+            while self.in_flight > 0 and self.in_flight + size > self.max_bytes:
+                self._condition.wait()
+            self.in_flight += size
+
+    def release(self, size: int) -> None:
+        if self.max_bytes is None:
+            return
+        with self._condition:
+            self.in_flight -= size
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(self, size: int):
+        self.acquire(size)
+        try:
+            yield
+        finally:
+            self.release(size)
+
+
+def run_concurrently(items: Iterable[T], worker: Callable[[T], R], workers: int = 1,
+                     size_of: Optional[Callable[[T], int]] = None,
+                     max_bytes_in_flight: Optional[int] = None) -> Iterator[R]:
+    """
+    Runs worker on every item using a pool of threads and yields results as they complete.
+
+    Items are submitted lazily in iteration order, so at most a few items per worker are pending
+    at any time. When max_bytes_in_flight is given, submission waits until the sizes (as given by
+    size_of) of the items in progress leave room for the next one.
+
+    :param items: The items to process.
+    :param worker: Callable that processes one item and returns its result, usually a TransferResult.
+                   It should not raise.
+    :param workers: Number of worker threads.
+    :param size_of: Optional callable returning the size in bytes of an item.
+    :param max_bytes_in_flight: Optional cap on the total size of the items in progress.
+    """
+    budget = ByteBudget(max_bytes_in_flight if size_of else None)
+    max_pending = max(1, workers) * 2
+
+    def run(item: T, size: int) -> R:
+        try:
+            return worker(item)
+        finally:
+            budget.release(size)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = set()
+        for item in items:
+            size = size_of(item) if size_of else 0
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            budget.acquire(size)
+            pending.add(executor.submit(run, item, size))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def batched(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """Yields lists of at most batch_size items, without materializing the whole iterable."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def schedule_by_size(items: Iterable[T], size_of: Callable[[T], int], large_threshold: int) -> List[T]:
+    """
+    Orders items so a concurrent transfer of them finishes early: largest first, with small items interleaved.
+
+    Starting the largest items first keeps one late large item from setting the finish time of the whole job;
+    the large items (at or above large_threshold, i.e. multipart uploads) are bandwidth bound, the small ones
+    latency bound, so small items between them keep the remaining connections busy. The small items are spread
+    over the gaps after the large items, with an equal share left for the end to fill the tail of the run.
+
+    :param items: The items to schedule.
+    :param size_of: Callable returning the size in bytes of an item.
+    :param large_threshold: Size from which an item counts as large, e.g. the multipart threshold.
+    :return: The items in scheduled order. Items of equal size keep their original order.
+    """
+    ordered = sorted(items, key=size_of, reverse=True)
+    large = [item for item in ordered if size_of(item) >= large_threshold]
+    small = ordered[len(large):]
+    share = -(-len(small) // (len(large) + 1))
+    schedule = []
+    for i, item in enumerate(large):
+        schedule.append(item)
+        schedule.extend(small[i * share:(i + 1) * share])
+    schedule.extend(small[len(large) * share:])
+    return schedule
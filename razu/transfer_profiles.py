@@ -0,0 +1,122 @@
+import re
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Optional, Union
+
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+
+from razu.config import Config
+
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class TransferProfile:
+    """Named set of S3 client and transfer settings, tuned for a kind of ingest."""
+    name: str
+    max_pool_connections: int = 10
+    multipart_threshold: int = 8 * MB
+    multipart_chunksize: int = 8 * MB
+    max_concurrency: int = 10
+    retry_mode: str = 'legacy'
+    max_attempts: int = 5
+    # Request bodies below this size are sent right away, without waiting for a '100 Continue' first
+    small_object_threshold: int = 1 * MB
+    # S3 additional checksum sent with every upload ('SHA256', 'SHA1', 'CRC32', 'CRC32C'), for fixity checks
+    # without downloading; a full-object instead of a composite checksum for multipart uploads (CRCs only)
+    checksum_algorithm: Optional[str] = None
+    full_object_checksum: bool = False
+
+    def client_config(self) -> BotoConfig:
+        """
+        botocore client configuration: connection pool size, retry mode and total number of attempts. botocore
+        is the only layer that retries requests; see ConcurrencyController.
+        """
+        return BotoConfig(
+            max_pool_connections=self.max_pool_connections,
+            retries={'mode': self.retry_mode, 'total_max_attempts': self.max_attempts}
+        )
+
+    def transfer_config(self) -> TransferConfig:
+        """Multipart threshold, part size and number of parts transferred concurrently per file."""
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency
+        )
+
+
+TRANSFER_PROFILES: Dict[str, TransferProfile] = {
+    # boto3 defaults
+    'default': TransferProfile('default'),
+    # Metadata files of a few KB: many connections for many concurrent workers. Files below the threshold are
+    # read into memory whole, so an occasional larger file goes multipart early to bound memory use per worker
+    'many-small-files': TransferProfile('many-small-files', max_pool_connections=64, multipart_threshold=16 * MB,
+                                        multipart_chunksize=16 * MB, max_concurrency=4,
+                                        retry_mode='standard', max_attempts=5),
+    # Scans of hundreds of MB to tens of GB: large parts, many parts in flight per file
+    'large-scans': TransferProfile('large-scans', max_pool_connections=32, multipart_threshold=64 * MB,
+                                   multipart_chunksize=64 * MB, max_concurrency=16,
+                                   retry_mode='standard', max_attempts=5),
+    # Shared or unreliable uplink: few connections, small parts that are cheap to retry
+    'low-bandwidth': TransferProfile('low-bandwidth', max_pool_connections=4, multipart_threshold=16 * MB,
+                                     multipart_chunksize=8 * MB, max_concurrency=2,
+                                     retry_mode='adaptive', max_attempts=10),
+}
+
+
+def get_transfer_profile(profile: Union[str, TransferProfile, None] = None) -> TransferProfile:
+    """
+    Resolves a transfer profile by name.
+
+    Without a profile, the name in the 's3_transfer_profile' setting of config.yaml is used, or 'default'.
+    Besides the built-in TRANSFER_PROFILES, profiles can be defined in config.yaml under
+    's3_transfer_profiles'; such a profile may name a 'base' profile and override some of its settings.
+    Sizes may be given in bytes or as a string like '64MB'.
+    """
+    if isinstance(profile, TransferProfile):
+        return profile
+
+    profiles = dict(TRANSFER_PROFILES)
+    cfg = _config_or_none()
+    if cfg is not None:
+        profile = profile or getattr(cfg, 's3_transfer_profile', None)
+        for name, settings in (getattr(cfg, 's3_transfer_profiles', None) or {}).items():
+            profiles[name] = _profile_from_settings(name, settings, profiles)
+
+    profile = profile or 'default'
+    if profile not in profiles:
+        raise ValueError(f"Unknown transfer profile '{profile}'. Available profiles: {', '.join(profiles)}")
+    return profiles[profile]
+
+
+def _profile_from_settings(name: str, settings: dict, profiles: Dict[str, TransferProfile]) -> TransferProfile:
+    settings = dict(settings or {})
+    base_name = settings.pop('base', 'default')
+    if base_name not in profiles:
+        raise ValueError(f"Transfer profile '{name}' has unknown base profile '{base_name}'")
+    allowed = {field.name for field in fields(TransferProfile)} - {'name'}
+    unknown = set(settings) - allowed
+    if unknown:
+        raise ValueError(f"Transfer profile '{name}' has unknown settings: {', '.join(sorted(unknown))}")
+    for size_setting in ('multipart_threshold', 'multipart_chunksize', 'small_object_threshold'):
+        if size_setting in settings:
+            settings[size_setting] = parse_size(settings[size_setting])
+    return replace(profiles[base_name], name=name, **settings)
+
+
+def parse_size(value: Union[int, str]) -> int:
+    if isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+)\s*([KMG]?)B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size '{value}', expected bytes or e.g. '64MB'")
+    number, unit = match.groups()
+    return int(number) * {'': 1, 'K': 1024, 'M': MB, 'G': 1024 * MB}[unit.upper()]
+
+
+def _config_or_none() -> Optional[Config]:
+    try:
+        return Config.get_instance()
+    except RuntimeError:
+        return None
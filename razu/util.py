@@ -158,6 +158,26 @@ def calculate_md5(file_path):
     """
     md5 = hashlib.md5()
     with open(file_path, "rb") as f:
-        while chunk := f.read(8192):
+        while chunk := f.read(1024 * 1024):
             md5.update(chunk)
     return md5.hexdigest()
+
+def calculate_multipart_etag(file_path, part_size: int) -> str:
+    """
+    Calculate the ETag S3 assigns to a multipart upload of a file: the MD5 of the concatenated
+    binary MD5 digests of all parts, followed by '-' and the number of parts.
+    """
+    part_digests = []
+    with open(file_path, "rb") as f:
+        while True:
+            part_md5 = hashlib.md5()
+            remaining = part_size
+            while remaining > 0 and (chunk := f.read(min(remaining, 1024 * 1024))):
+                part_md5.update(chunk)
+                remaining -= len(chunk)
+            if remaining == part_size:
+                break
+            part_digests.append(part_md5.digest())
+    if not part_digests:
+        part_digests.append(hashlib.md5().digest())
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
@@ -8,6 +8,7 @@ setup(
         'console_scripts': [
             'razu-turtle=tools.turtle:main',
             'razu-collect-rdf=tools.collect_rdf:main',
+            'razu-manifest-diff=tools.manifest_diff:main',
         ],
     },
 )
\ No newline at end of file
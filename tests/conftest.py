@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from razu.config import Config
+from razu.transfer_profiles import TransferProfile, MB
+
+BUCKET = "g0321"
+COLLECTION = "NL-WbDRAZU-G0321-661"
+# moto rejects parts below 5 MB, like S3
+SMALL_PARTS = TransferProfile("test", multipart_threshold=8 * MB, multipart_chunksize=5 * MB, max_concurrency=3)
+
+
+@pytest.fixture
+def mock_s3(monkeypatch):
+    """Run the test against the in-memory S3 of moto."""
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("S3_ACCESS_KEY", "test")
+    monkeypatch.setenv("S3_SECRET_KEY", "test")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.delenv("S3_ENDPOINT", raising=False)
+    Config.reset()
+    Config.initialize(config_file=str(Path(__file__).parent / 'fixtures' / 'test_config.yaml'))
+    with moto.mock_aws():
+        yield
+    Config.reset()
+
+
+@pytest.fixture
+def edepot(mock_s3):
+    """An EDepot with a small multipart threshold and an empty bucket."""
+    from razu.edepot import EDepot
+    depot = EDepot(SMALL_PARTS)
+    depot.check_or_create_bucket(BUCKET)
+    return depot
+
+
+@pytest.fixture
+def make_sip(tmp_path):
+    """
+    Factory writing files of the given sizes with random content and their manifest into the SIP directory
+    of the bucket; the keys start with the collection.
+    Returns the manifest file, the SIP directory and the manifest entries by key.
+    """
+    def make(sizes, sip_directory=None):
+        sip_directory = Path(sip_directory or tmp_path / "nl-wbdrazu" / BUCKET)
+        collection_directory = sip_directory / COLLECTION
+        collection_directory.mkdir(parents=True, exist_ok=True)
+        entries = {}
+        for i, size in enumerate(sizes):
+            key = f"{COLLECTION}/{COLLECTION}-{i}.meta.json"
+            data = os.urandom(size)
+            (sip_directory / key).write_bytes(data)
+            entries[key] = {'MD5Hash': hashlib.md5(data).hexdigest(), 'MD5HashDate': "2025-01-01T00:00:00",
+                            'FileSize': size}
+        manifest_file = collection_directory / f"{COLLECTION}.manifest.json"
+        manifest_file.write_text(json.dumps(entries))
+        return str(manifest_file), str(sip_directory), entries
+    return make
@@ -0,0 +1,29 @@
+from razu.acl_cache import AclCache
+from razu.s3storage import S3Storage, RemoteObject, ALL_USERS_URI
+
+OWNER = {'Grantee': {'Type': 'CanonicalUser', 'ID': 'owner'}, 'Permission': 'FULL_CONTROL'}
+PUBLIC_READ = {'Grantee': {'Type': 'Group', 'URI': ALL_USERS_URI}, 'Permission': 'READ'}
+
+
+def test_cache_is_trusted_only_for_same_object_version(tmp_path):
+    """Test dat de cache alleen geldt zolang ETag en LastModified gelijk zijn."""
+    cache_file = str(tmp_path / "x.manifest.acl.json")
+    remote = RemoteObject("a.json", "etag-1", 10, "2025-01-01T00:00:00+00:00")
+    cache = AclCache(cache_file)
+    cache.set_acl(remote, remote.key, "public-read")
+    cache.save()
+
+    cache = AclCache(cache_file)
+    assert cache.has_acl(remote, "public-read")
+    assert not cache.has_acl(remote, "private")
+    reuploaded = RemoteObject("a.json", "etag-1", 10, "2025-02-01T00:00:00+00:00")
+    assert not cache.has_acl(reuploaded, "public-read")
+
+
+def test_grants_match_canned_acl():
+    """Test herkenning van canned ACL's aan de group grants."""
+    assert S3Storage.grants_match_acl([OWNER, PUBLIC_READ], "public-read")
+    assert not S3Storage.grants_match_acl([OWNER], "public-read")
+    assert S3Storage.grants_match_acl([OWNER], "private")
+    assert not S3Storage.grants_match_acl([OWNER, PUBLIC_READ], "private")
+    assert not S3Storage.grants_match_acl([OWNER], "bucket-owner-full-control")
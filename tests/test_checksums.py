@@ -0,0 +1,40 @@
+import base64
+import hashlib
+import zlib
+
+import pytest
+
+from razu.checksums import Checksum, calculate_file_checksum, checksum_field, normalize_algorithm
+
+
+def test_checksum_values_match_s3_encoding():
+    """Test dat checksums base64-gecodeerd zijn zoals S3 ze teruggeeft, CRC's big-endian."""
+    data = b"razu" * 1000
+    sha256 = Checksum('sha256')
+    sha256.update(data)
+    crc32 = Checksum('CRC32')
+    crc32.update(data[:100])
+    crc32.update(data[100:])
+    assert sha256.value == base64.b64encode(hashlib.sha256(data).digest()).decode()
+    assert crc32.value == base64.b64encode(zlib.crc32(data).to_bytes(4, 'big')).decode()
+    assert checksum_field(sha256.algorithm) == 'ChecksumSHA256'
+
+
+def test_file_checksum_whole_and_composite(tmp_path):
+    """Test de checksum van een heel bestand en de composite checksum van de delen van een multipart upload."""
+    data = bytes(range(256)) * 100
+    file_path = tmp_path / "scan.tif"
+    file_path.write_bytes(data)
+    part_size = 10000
+    part_digests = [hashlib.sha256(data[i:i + part_size]).digest() for i in range(0, len(data), part_size)]
+    composite = base64.b64encode(hashlib.sha256(b"".join(part_digests)).digest()).decode() + f"-{len(part_digests)}"
+
+    assert calculate_file_checksum(file_path, 'SHA256') == base64.b64encode(hashlib.sha256(data).digest()).decode()
+    assert calculate_file_checksum(file_path, 'SHA256', part_size, full_object=False) == composite
+    assert calculate_file_checksum(file_path, 'CRC32', part_size) == calculate_file_checksum(file_path, 'CRC32')
+
+
+def test_unknown_algorithm():
+    """Test dat een onbekend algoritme een ValueError geeft."""
+    with pytest.raises(ValueError):
+        normalize_algorithm('md4')
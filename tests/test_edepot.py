@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import urllib.parse
+
+from dataclasses import replace
+
+from razu.edepot import EDepot
+from razu.ingest_journal import IngestJournal
+from razu.transfer import (UPLOADED, UPDATED, DOWNLOADED, SKIPPED, COPIED, VERIFIED, MISMATCH, MISSING, NO_CHECKSUM,
+                           UNVERIFIABLE_MULTIPART)
+from razu.transfer_profiles import MB
+
+
+def test_sync_uploads_changed_multipart_file_of_same_size(edepot, make_sip):
+    """Test dat sync een gewijzigd multipart bestand van gelijke grootte opnieuw uploadt."""
+    manifest_file, sip_directory, entries = make_sip([11 * MB, 100, 200])
+    big_key = sorted(entries)[0]
+    report = edepot.store_files_from_manifest(manifest_file, sip_directory, workers=2, sync=True)
+    assert report[big_key].status == UPLOADED
+
+    # Without FileSize the part size is read from the PartSize metadata of the object
+    for properties in entries.values():
+        del properties['FileSize']
+    with open(manifest_file, "w") as f:
+        json.dump(entries, f)
+    report = edepot.store_files_from_manifest(manifest_file, sip_directory, workers=2, sync=True)
+    assert all(report[key].status == SKIPPED for key in entries)
+
+    data = os.urandom(11 * MB)
+    with open(os.path.join(sip_directory, big_key), "wb") as f:
+        f.write(data)
+    entries[big_key]['MD5Hash'] = hashlib.md5(data).hexdigest()
+    with open(manifest_file, "w") as f:
+        json.dump(entries, f)
+    report = edepot.store_files_from_manifest(manifest_file, sip_directory, workers=2, sync=True)
+    assert report[big_key].status == UPLOADED
+    assert [key for key in entries if report[key].status == SKIPPED] == sorted(entries)[1:]
+
+
+def test_deletion_plan_round_trip_retries_failed_keys(edepot, make_sip, monkeypatch):
+    """Test dat een verwijderplan uitgevoerd wordt, mislukte keys opnieuw geprobeerd en alles bevestigd."""
+    manifest_file, sip_directory, entries = make_sip([100] * 5)
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    plan_file = edepot.plan_deletion(manifest_file, "g0321")
+    with open(plan_file) as f:
+        assert len(json.load(f)['objects']) == 6  # the files and the manifest
+
+    # The first delete_objects call fails for one key
+    delete_objects = edepot.s3_client.delete_objects
+    failing_key = sorted(entries)[2]
+    calls = []
+
+    def flaky_delete_objects(**kwargs):
+        calls.append([obj['Key'] for obj in kwargs['Delete']['Objects']])
+        if len(calls) == 1:
+            kwargs['Delete']['Objects'] = [obj for obj in kwargs['Delete']['Objects'] if obj['Key'] != failing_key]
+            response = delete_objects(**kwargs)
+            response['Errors'] = [{'Key': failing_key, 'Code': 'InternalError', 'Message': "try again"}]
+            return response
+        return delete_objects(**kwargs)
+
+    monkeypatch.setattr(edepot.s3_client, 'delete_objects', flaky_delete_objects)
+    monkeypatch.setattr("razu.edepot.time.sleep", lambda seconds: None)
+    log = edepot.execute_deletion_plan(plan_file)
+    assert calls[1] == [failing_key]
+    assert log['Deleted'] == 6
+    assert log['Errors'] == [] and log['NotDeleted'] == []
+    assert os.path.exists(plan_file.replace(".json", ".log.json"))
+    assert edepot.list_objects("g0321", refresh=True) == {}
+
+
+def test_verify_files_from_listing_without_downloading(edepot, make_sip):
+    """Test dat de batchverificatie met de listing en de multipart ETag werkt, zonder iets te downloaden."""
+    manifest_file, sip_directory, entries = make_sip([9 * MB, 9 * MB, 9 * MB, 300, 400, 500])
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    keys = sorted(entries)
+    requests = []
+    for operation in ('GetObject', 'HeadObject'):
+        edepot.s3_client.meta.events.register(f'before-send.s3.{operation}',
+                                              lambda operation=operation, **kwargs: requests.append(operation))
+
+    # A changed local file, a missing local file, a corrupt object and a deleted object
+    with open(os.path.join(sip_directory, keys[1]), "wb") as f:
+        f.write(os.urandom(9 * MB))
+    os.remove(os.path.join(sip_directory, keys[2]))
+    edepot.s3_client.put_object(Bucket="g0321", Key=keys[4], Body=b"corrupt")
+    edepot.s3_client.delete_object(Bucket="g0321", Key=keys[5])
+
+    report = edepot.validate_uploaded_files_from_manifest(manifest_file, sip_directory, workers=2)
+    assert [report[key].status for key in keys] == [VERIFIED, MISMATCH, UNVERIFIABLE_MULTIPART, VERIFIED, MISMATCH,
+                                                   MISSING]
+    assert report[keys[2]].reason == "local file missing"
+    # The manifest has no PartSize, so it is read from the metadata of each multipart object
+    assert requests == ['HeadObject'] * 3
+
+
+def test_restore_in_ranges_and_skip_when_run_again(edepot, make_sip, tmp_path):
+    """Test dat een restore grote objecten in delen ophaalt, controleert en bij herhaling overslaat."""
+    manifest_file, sip_directory, entries = make_sip([12 * MB, 300, 400])
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    gets = []
+    edepot.s3_client.meta.events.register(
+        'before-send.s3.GetObject', lambda request=None, **kwargs: gets.append(
+            (request.headers.get('Range'), request.headers.get('If-Match'))))
+
+    target_directory = tmp_path / "restore"
+    report = edepot.restore_files_from_manifest(manifest_file, sip_directory, str(target_directory))
+    assert all(report[key].status == DOWNLOADED for key in entries)
+    for key, properties in entries.items():
+        assert hashlib.md5((target_directory / key).read_bytes()).hexdigest() == properties['MD5Hash']
+    ranges = [get for get in gets if get[0]]
+    assert len(ranges) == 3  # 12 MB in parts of 5 MB
+    assert all(if_match for _, if_match in gets)
+    assert not list(target_directory.rglob("*.download"))
+
+    gets.clear()
+    report = edepot.restore_files_from_manifest(manifest_file, sip_directory, str(target_directory))
+    assert all(report[key].status == SKIPPED and report[key].reason == "journal" for key in entries)
+    assert gets == []
+
+
+def test_restore_leaves_no_file_on_md5_mismatch(edepot, make_sip, tmp_path):
+    """Test dat een bestand met afwijkende MD5 niet teruggezet wordt, ook niet gedeeltelijk."""
+    manifest_file, sip_directory, entries = make_sip([12 * MB, 300])
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    large_key, small_key = sorted(entries)
+    edepot.s3_client.put_object(Bucket="g0321", Key=small_key, Body=b"corrupt")
+    other_file = tmp_path / "other.bin"
+    other_file.write_bytes(os.urandom(12 * MB))
+    edepot.put_file("g0321", large_key, str(other_file), {})
+
+    target_directory = tmp_path / "restore"
+    report = edepot.restore_files_from_manifest(manifest_file, sip_directory, str(target_directory))
+    assert report[small_key].status == MISMATCH
+    assert report[large_key].status == MISMATCH
+    assert not (target_directory / small_key).exists()
+    assert not (target_directory / large_key).exists()
+    assert not list(target_directory.rglob("*.download"))
+
+
+def test_verify_checksums_against_journal_or_local_file(edepot, make_sip):
+    """Test dat opgeslagen checksums met het journal of anders met het lokale bestand vergeleken worden."""
+    manifest_file, sip_directory, entries = make_sip([12 * MB, 300, 400, 500])
+    depot = EDepot(replace(edepot.transfer_profile, checksum_algorithm="SHA256"))
+    depot.store_files_from_manifest(manifest_file, sip_directory, use_journal=True)
+    keys = sorted(entries)
+    # Without a checksum
+    edepot.put_file("g0321", keys[3], os.path.join(sip_directory, keys[3]), {})
+
+    # The journal is the reference, also for a file that is no longer there
+    os.remove(os.path.join(sip_directory, keys[1]))
+    report = depot.verify_checksums_from_manifest(manifest_file, sip_directory)
+    assert [report[key].status for key in keys] == [VERIFIED, VERIFIED, VERIFIED, NO_CHECKSUM]
+
+    # Without the journal the local files are the reference; a changed one does not match
+    os.remove(os.path.splitext(manifest_file)[0] + IngestJournal.JOURNAL_SUFFIX)
+    with open(os.path.join(sip_directory, keys[2]), "wb") as f:
+        f.write(os.urandom(400))
+    report = depot.verify_checksums_from_manifest(manifest_file, sip_directory)
+    assert [report[key].status for key in keys] == [VERIFIED, NO_CHECKSUM, MISMATCH, NO_CHECKSUM]
+
+
+def test_update_metadata_merges_manifest_properties(edepot, make_sip):
+    """Test dat manifestvelden in de metadata samengevoegd worden, met behoud van overige velden, Content-Type en ACL."""
+    manifest_file, sip_directory, entries = make_sip([100, 12 * MB, 300])
+    keys = sorted(entries)
+    for properties in entries.values():
+        properties['Source'] = "https://archief.example.org/id/organisatie/Gemeente Ö"
+    with open(manifest_file, "w") as f:
+        json.dump(entries, f)
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    # moto stores no ACL with a multipart upload, so every object gets one explicitly
+    for key, acl in zip(keys, ("public-read", "private", "private")):
+        edepot.s3_client.put_object_acl(Bucket="g0321", Key=key, ACL=acl)
+    etags = {key: edepot.s3_client.head_object(Bucket="g0321", Key=key)['ETag'] for key in keys}
+    copies = []
+    for operation in ('CopyObject', 'UploadPartCopy'):
+        edepot.s3_client.meta.events.register(f'before-send.s3.{operation}',
+                                              lambda operation=operation, **kwargs: copies.append(operation))
+
+    # A fixity run refreshed two dates; another property changed, but only MD5HashDate is merged
+    for key in keys[:2]:
+        entries[key]['MD5HashDate'] = "2026-10-01T12:00:00"
+    entries[keys[2]]['Dataset'] = "https://archief.example.org/id/dataset/661"
+    missing_key = f"{keys[0].rsplit('/', 1)[0]}/niet-opgeslagen.json"
+    entries[missing_key] = {'MD5Hash': "0" * 32, 'MD5HashDate': "2026-10-01T12:00:00"}
+    with open(manifest_file, "w") as f:
+        json.dump(entries, f)
+    report = edepot.update_metadata_from_manifest(manifest_file, sip_directory, fields=['MD5HashDate'], workers=2)
+    assert [report[key].status for key in keys] == [UPDATED, UPDATED, SKIPPED]
+    assert report[keys[2]].reason == "unchanged"
+    assert report[missing_key].status == MISSING
+
+    for key in keys[:2]:
+        response = edepot.s3_client.head_object(Bucket="g0321", Key=key)
+        metadata = {name: urllib.parse.unquote(value) for name, value in response['Metadata'].items()}
+        assert metadata['md5hashdate'] == "2026-10-01T12:00:00"
+        assert metadata['md5hash'] == entries[key]['MD5Hash']
+        assert metadata['source'] == "https://archief.example.org/id/organisatie/Gemeente Ö"
+        assert response['ETag'] == etags[key]
+    assert 'dataset' not in edepot.s3_client.head_object(Bucket="g0321", Key=keys[2])['Metadata']
+    assert edepot.s3_client.head_object(Bucket="g0321", Key=keys[0])['ContentType'] == "application/json"
+    assert edepot.grants_match_acl(edepot.get_object_grants("g0321", keys[0]), "public-read")
+
+    # All properties: only the changed Dataset is copied; the percent-encoded URLs compare as equal
+    copies.clear()
+    report = edepot.update_metadata_from_manifest(manifest_file, sip_directory, workers=2)
+    assert [report[key].status for key in keys] == [SKIPPED, SKIPPED, UPDATED]
+    assert copies == ['CopyObject']
+    copies.clear()
+    report = edepot.update_metadata_from_manifest(manifest_file, sip_directory, workers=2)
+    assert all(report[key].status == SKIPPED for key in keys)
+    assert copies == []
+
+
+def test_migrate_prefix_keeps_objects_and_skips_when_run_again(edepot, make_sip):
+    """Test dat een migratie ETag, metadata en ACL behoudt en bij herhaling alles overslaat."""
+    manifest_file, sip_directory, entries = make_sip([12 * MB, 300, 400])
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    for key in entries:
+        edepot.s3_client.put_object_acl(Bucket="g0321", Key=key, ACL="public-read")
+    edepot.check_or_create_bucket("g0999")
+
+    report = edepot.migrate_prefix("g0321", "NL-WbDRAZU-G0321-661/", "g0999", workers=2)
+    assert all(report[key].status == COPIED for key in entries)
+    for key in entries:
+        source = edepot.s3_client.head_object(Bucket="g0321", Key=key)
+        target = edepot.s3_client.head_object(Bucket="g0999", Key=key)
+        assert target['ETag'] == source['ETag']
+        assert target['Metadata'] == source['Metadata']
+        assert edepot.grants_match_acl(edepot.get_object_grants("g0999", key), "public-read")
+
+    report = edepot.migrate_prefix("g0321", "NL-WbDRAZU-G0321-661/", "g0999", workers=2)
+    assert len(report) == len(entries) + 1  # and the manifest
+    assert all(result.status == SKIPPED for result in report.values())
+
+
+def test_copy_keeping_acl_uses_owner_of_the_copy(edepot, make_sip, monkeypatch):
+    """Test dat losse grants met de eigenaar van de kopie teruggezet worden, ook bij een ander account."""
+    manifest_file, sip_directory, entries = make_sip([300])
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    key = next(iter(entries))
+    source_owner = edepot.s3_client.get_object_acl(Bucket="g0321", Key=key)['Owner']
+    # moto ignores grants to unknown accounts in an AccessControlPolicy, but not in the grant headers
+    edepot.s3_client.put_object_acl(Bucket="g0321", Key=key, GrantFullControl=f'id="{source_owner["ID"]}"',
+                                    GrantRead='id="reader-account"')
+    edepot.check_or_create_bucket("g0999")
+
+    # The target bucket belongs to another account
+    target_owner = {'ID': "target-account"}
+    get_object_acl = edepot.s3_client.get_object_acl
+    monkeypatch.setattr(edepot.s3_client, 'get_object_acl', lambda **kwargs: {
+        **get_object_acl(**kwargs), **({'Owner': target_owner} if kwargs['Bucket'] == "g0999" else {})})
+    policies = []
+    edepot.s3_client.meta.events.register('before-parameter-build.s3.PutObjectAcl',
+                                          lambda params=None, **kwargs: policies.append(params))
+
+    edepot._copy_keeping_acl("g0321", key, "g0999", key)
+    policy = policies[-1]['AccessControlPolicy']
+    assert policy['Owner'] == target_owner
+    grantees = {grant['Grantee']['ID']: grant['Permission'] for grant in policy['Grants']}
+    assert grantees == {"target-account": 'FULL_CONTROL', "reader-account": 'READ'}
+
+
+def test_update_acl_skips_unchanged_and_cached_objects(edepot, make_sip):
+    """Test dat een ACL-update objecten met de ACL overslaat, daarna uit de cache, en gewijzigde opnieuw bijwerkt."""
+    manifest_file, sip_directory, entries = make_sip([100, 200, 300])
+    edepot.store_files_from_manifest(manifest_file, sip_directory)
+    keys = sorted(entries)
+    edepot.s3_client.put_object_acl(Bucket="g0321", Key=keys[0], ACL="public-read")
+    requests = []
+    for operation in ('GetObjectAcl', 'PutObjectAcl'):
+        edepot.s3_client.meta.events.register(f'before-send.s3.{operation}',
+                                              lambda operation=operation, **kwargs: requests.append(operation))
+
+    report = edepot.update_acl_from_manifest(manifest_file, sip_directory, workers=2, skip_unchanged=True)
+    assert report[keys[0]].status == SKIPPED and report[keys[0]].reason == "unchanged"
+    assert report[keys[1]].status == UPDATED and report[keys[2]].status == UPDATED
+    for key in keys:
+        assert edepot.grants_match_acl(edepot.get_object_grants("g0321", key), "public-read")
+
+    requests.clear()
+    report = edepot.update_acl_from_manifest(manifest_file, sip_directory, workers=2, skip_unchanged=True)
+    assert all(report[key].status == SKIPPED and report[key].reason == "cached" for key in keys)
+    assert requests == []
+
+    # Uploading an object again resets its ACL
+    edepot.s3_client.put_object(Bucket="g0321", Key=keys[1], Body=b"changed")
+    report = edepot.update_acl_from_manifest(manifest_file, sip_directory, workers=2, skip_unchanged=True)
+    assert report[keys[1]].status == UPDATED
+    assert report[keys[0]].reason == "cached" and report[keys[2]].reason == "cached"
+    assert edepot.grants_match_acl(edepot.get_object_grants("g0321", keys[1]), "public-read")
@@ -0,0 +1,31 @@
+import os
+import time
+
+from razu.fixity_cache import FixityCache
+
+
+def test_cache_is_trusted_only_for_unchanged_file(tmp_path):
+    """Test dat de cache alleen geldt zolang device, inode, grootte en mtime gelijk zijn."""
+    data_file = tmp_path / "a.bin"
+    data_file.write_bytes(b"abc")
+    os.utime(data_file, (time.time() - 60, time.time() - 60))
+    cache_file = str(tmp_path / "x.manifest.fixity.json")
+    cache = FixityCache(cache_file)
+    cache.set_verified("a.bin", data_file.stat(), "md5-1")
+    cache.save()
+
+    cache = FixityCache(cache_file)
+    assert cache.get_verified_md5("a.bin", data_file.stat()) == "md5-1"
+    assert cache.get_verified_md5("a.bin", data_file.stat(), max_age=3600) == "md5-1"
+    assert cache.get_verified_md5("a.bin", data_file.stat(), max_age=0) is None
+    os.utime(data_file, (time.time() - 30, time.time() - 30))
+    assert cache.get_verified_md5("a.bin", data_file.stat()) is None
+
+
+def test_recently_modified_file_is_not_cached(tmp_path):
+    """Test dat een bestand dat net voor het hashen gewijzigd is niet in de cache komt."""
+    data_file = tmp_path / "a.bin"
+    data_file.write_bytes(b"abc")
+    cache = FixityCache(str(tmp_path / "x.manifest.fixity.json"))
+    cache.set_verified("a.bin", data_file.stat(), "md5-1")
+    assert cache.get_verified_md5("a.bin", data_file.stat()) is None
@@ -0,0 +1,37 @@
+from razu.ingest_journal import IngestJournal
+
+
+def test_journal_path_next_to_manifest(tmp_path):
+    """Test dat het journal naast het manifest komt te staan."""
+    journal = IngestJournal.for_manifest(str(tmp_path / "NL-WbDRAZU-G0321-661.manifest.json"))
+    assert journal.journal_file == str(tmp_path / "NL-WbDRAZU-G0321-661.manifest.journal.jsonl")
+
+
+def test_journal_survives_restart(tmp_path):
+    """Test dat voltooide uploads en onderbroken multipart uploads na herstart bekend zijn."""
+    journal_file = str(tmp_path / "x.journal.jsonl")
+    with IngestJournal(journal_file) as journal:
+        journal.record_completed("a.json", "etag-a", "md5-a", 10)
+        journal.record_multipart_started("scan.tif", "upload-1", 8388608, "md5-scan")
+        journal.record_multipart_started("done.tif", "upload-2", 8388608, "md5-done")
+        journal.record_completed("done.tif", "etag-done-2", "md5-done", 20000000)
+
+    journal = IngestJournal(journal_file)
+    assert journal.is_completed("a.json", "md5-a")
+    assert not journal.is_completed("a.json", "changed-md5")
+    assert journal.get_multipart_upload("scan.tif", "md5-scan")["upload_id"] == "upload-1"
+    assert journal.get_multipart_upload("scan.tif", "changed-md5") is None
+    assert journal.get_multipart_upload("done.tif", "md5-done") is None
+
+
+def test_journal_ignores_truncated_last_line(tmp_path):
+    """Test dat een half geschreven laatste regel (na een crash) genegeerd wordt."""
+    journal_file = tmp_path / "x.journal.jsonl"
+    with IngestJournal(str(journal_file)) as journal:
+        journal.record_completed("a.json", "etag-a", "md5-a", 10)
+    with journal_file.open("a") as f:
+        f.write('{"event": "completed", "key": "b.js')
+
+    journal = IngestJournal(str(journal_file))
+    assert journal.is_completed("a.json", "md5-a")
+    assert "b.json" not in journal.completed
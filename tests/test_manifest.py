@@ -0,0 +1,86 @@
+import os
+import time
+import pytest
+from pathlib import Path
+from razu.config import Config
+from razu.fixity_cache import FixityCache
+from razu.manifest import Manifest
+from razu.transfer import VERIFIED, MISMATCH, MISSING
+import razu.util as util
+
+
+@pytest.fixture
+def config():
+    """Create a Config instance with test configuration."""
+    Config.reset()
+    yield Config.initialize(config_file=str(Path(__file__).parent / 'fixtures' / 'test_identifiers.yaml'))
+    Config.reset()
+
+
+@pytest.fixture
+def manifest(config, tmp_path):
+    """Create a manifest of a directory with a few files."""
+    for i in range(6):
+        (tmp_path / f"file{i}.txt").write_bytes(b"x" * (i * 1000))
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "nested.txt").write_text("nested")
+    return Manifest.create_from_directory(str(tmp_path), manifest_filename="manifest.json")
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_validate_ok(manifest, jobs):
+    """Test dat een ongewijzigde directory valideert, ook met meerdere jobs."""
+    errors = manifest.validate(jobs=jobs)
+    assert not any(errors.values())
+    assert len(manifest.validation_report) == 7
+    assert manifest.validation_report.summary == {VERIFIED: 7}
+
+
+def test_validate_reports_sorted_errors(manifest, tmp_path):
+    """Test dat afwijkingen per bestand en gesorteerd gerapporteerd worden."""
+    (tmp_path / "file4.txt").write_text("changed")
+    (tmp_path / "file1.txt").write_text("changed")
+    errors = manifest.validate(jobs=3)
+    assert errors['checksum_mismatch'] == ["file1.txt", "file4.txt"]
+    assert manifest.validation_report["file4.txt"].status == MISMATCH
+
+    (tmp_path / "sub" / "nested.txt").unlink()
+    with pytest.raises(FileNotFoundError):
+        manifest.validate(jobs=3)
+    assert manifest.validation_report["sub/nested.txt"].status == MISSING
+
+
+def test_quick_validate_skips_unchanged_files(manifest, tmp_path):
+    """Test dat een snelle validatie alleen gewijzigde bestanden opnieuw hasht."""
+    for file_path in tmp_path.rglob("*.txt"):
+        os.utime(file_path, (time.time() - 60, time.time() - 60))
+    cache = FixityCache(str(tmp_path / "manifest.fixity.json"))
+    manifest.validate(fixity_cache=cache, max_age=3600)
+    assert not any(result.reason == 'cached' for result in manifest.validation_report.values())
+
+    (tmp_path / "file2.txt").write_text("changed")
+    errors = manifest.validate(fixity_cache=FixityCache(cache.cache_file), max_age=3600)
+    assert errors['checksum_mismatch'] == ["file2.txt"]
+    cached = [key for key, result in manifest.validation_report.items() if result.reason == 'cached']
+    assert len(cached) == 6 and "file2.txt" not in cached
+
+    manifest.validate(fixity_cache=FixityCache(cache.cache_file), max_age=0)
+    assert not any(result.reason == 'cached' for result in manifest.validation_report.values())
+
+
+def test_create_from_directory_with_ignore_patterns(config, tmp_path):
+    """Test dat glob-patronen bestanden en directories uitsluiten en de metadata compleet is."""
+    (tmp_path / "scans" / "thumbs").mkdir(parents=True)
+    (tmp_path / "scans" / "a.tar.gz").write_bytes(b"a" * 5000)
+    (tmp_path / "scans" / "b.tmp").write_text("tmp")
+    (tmp_path / "scans" / "thumbs" / "a.jpg").write_text("thumb")
+    (tmp_path / "c.json").write_text("{}")
+
+    manifest = Manifest.create_from_directory(str(tmp_path), manifest_filename="manifest.json",
+                                              ignore_files=["*.tmp", "scans/thumbs"], jobs=4)
+    assert list(manifest.entries) == ["c.json", "scans/a.tar.gz"]
+    entry = manifest.get_entry("scans/a.tar.gz").to_dict()
+    assert entry['FileSize'] == 5000
+    assert entry['FileExtension'] == ".tar.gz"
+    assert entry['MD5Hash'] == util.calculate_md5(str(tmp_path / "scans" / "a.tar.gz"))
+    assert entry['LastModified'] == util.get_last_modified(str(tmp_path / "scans" / "a.tar.gz"))
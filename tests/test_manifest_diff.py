@@ -0,0 +1,31 @@
+import pytest
+
+from razu.s3storage import RemoteObject
+from tools.manifest_diff import diff_sorted, MATCH, MISSING, EXTRA, MISMATCH, UNVERIFIED
+
+
+def test_diff_sorted_reports_differences():
+    """Test dat ontbrekende, extra en afwijkende keys gevonden worden."""
+    manifest_items = [
+        ("a", {"MD5Hash": "1"}),
+        ("b", {"MD5Hash": "2"}),
+        ("d", {"MD5Hash": "4", "FileSize": 10}),
+        ("e", {"MD5Hash": "5"}),
+        ("f", {"MD5Hash": "6", "FileSize": 10}),
+    ]
+    remote_objects = [
+        RemoteObject("a", "1", 1),
+        RemoteObject("b", "x", 1),
+        RemoteObject("c", "3", 1),
+        RemoteObject("d", "abc-2", 11),
+        RemoteObject("f", "def-2", 10),
+    ]
+    statuses = {record['key']: record['status'] for record in diff_sorted(manifest_items, remote_objects)}
+    assert statuses == {"a": MATCH, "b": MISMATCH, "c": EXTRA, "d": MISMATCH, "e": MISSING,
+                        "f": UNVERIFIED}
+
+
+def test_diff_sorted_rejects_unsorted_listing():
+    """Test dat een ongesorteerde listing een fout geeft in plaats van een verkeerd verschil."""
+    with pytest.raises(ValueError):
+        list(diff_sorted([], [RemoteObject("b", "1", 1), RemoteObject("a", "1", 1)]))
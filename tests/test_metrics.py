@@ -0,0 +1,62 @@
+import io
+
+from razu.metrics import CallStats, Progress, TransferMetrics
+from razu.transfer import TransferResult, UPLOADED, FAILED
+
+
+def test_latency_histogram_quantiles():
+    """Test dat kwantielen uit de histogram geschat worden."""
+    stats = CallStats()
+    for latency in [0.001] * 90 + [0.3] * 10:
+        stats.add(latency, failed=False, retries=0, sent=0, received=0)
+    assert stats.latency_quantile(0.5) == 0.005
+    assert stats.latency_quantile(0.95) == 0.5
+
+
+def test_metrics_per_operation_and_prefix():
+    """Test dat metrics per operatie en per prefix worden opgeteld."""
+    metrics = TransferMetrics()
+    metrics.record("PutObject", "a/b/1.json", 0.02, sent=100)
+    metrics.record("PutObject", "a/b/2.json", 0.04, failed=True, retries=2, sent=50)
+    metrics.record("HeadObject", "a/c/1.json", 0.2)
+
+    summary = metrics.to_dict()
+    assert summary['operations']['PutObject']['requests'] == 2
+    assert summary['operations']['PutObject']['failures'] == 1
+    assert summary['operations']['PutObject']['bytes_sent'] == 150
+    assert summary['totals']['retries'] == 2
+    assert list(summary['slowest_prefixes']) == ["a/c", "a/b"]
+
+
+def test_prometheus_export(tmp_path):
+    """Test dat de Prometheus-export tellers en een cumulatieve histogram bevat."""
+    metrics = TransferMetrics()
+    metrics.record("UploadPart", "x/1", 0.02, sent=10)
+    metrics.record("UploadPart", "x/2", 3.0, sent=10)
+    output_file = tmp_path / "razu.prom"
+    metrics.write_prometheus(str(output_file), labels={"job": "ingest"})
+
+    text = output_file.read_text()
+    assert 'razu_s3_sent_bytes_total{operation="UploadPart",job="ingest"} 20' in text
+    assert 'razu_s3_request_duration_seconds_bucket{operation="UploadPart",job="ingest",le="0.025"} 1' in text
+    assert 'razu_s3_request_duration_seconds_bucket{operation="UploadPart",job="ingest",le="+Inf"} 2' in text
+    assert 'razu_s3_request_duration_seconds_count{operation="UploadPart",job="ingest"} 2' in text
+
+
+def test_progress_counts_results():
+    """Test dat de voortgangsregel verwerkte en mislukte keys telt."""
+    stream = io.StringIO()
+    progress = Progress("Upload", total=2, interval=0, stream=stream)
+    progress.add(TransferResult("a", UPLOADED, size=2048))
+    progress.add(TransferResult("b", FAILED))
+    progress.close()
+    assert "Upload: 2/2 (1 mislukt), 2.0 KB" in stream.getvalue()
+
+
+def test_after_call_without_http_response():
+    """Test dat een after-call zonder HTTP-response als mislukt geteld wordt, zonder fout in de hook."""
+    metrics = TransferMetrics()
+    context = {}
+    metrics._on_before_parameter_build(params={'Key': "a/b/1.json"}, context=context)
+    metrics._on_after_call(http_response=None, parsed={}, model=None, context=context)
+    assert metrics.to_dict()['operations']['unknown']['failures'] == 1
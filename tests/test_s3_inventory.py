@@ -0,0 +1,67 @@
+import time
+
+from razu.s3_inventory import S3Inventory
+from razu.s3storage import RemoteObject
+
+
+class ListingStub:
+    """Levert een vaste listing en telt HEAD-verzoeken, zoals S3Storage dat zou doen."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.heads = []
+
+    def iter_objects(self, bucket_name, prefix=None):
+        return iter(sorted((obj for obj in self.objects if obj.key.startswith(prefix or "")), key=lambda obj: obj.key))
+
+    def get_file_metadata(self, bucket, file_key, use_inventory=True):
+        self.heads.append(file_key)
+        return {"md5hash": file_key}
+
+
+def test_refresh_and_query_prefix(tmp_path):
+    """Test dat een verversing per prefix wordt opgeslagen en bevraagd."""
+    inventory = S3Inventory(tmp_path / "inventory.sqlite")
+    storage = ListingStub([RemoteObject("a/1", "e1", 1, "t1"), RemoteObject("a/2", "e2", 2, "t1"),
+                           RemoteObject("b/1", "e3", 3, "t1")])
+
+    assert not inventory.is_fresh("bucket", "a/")
+    counts = inventory.refresh(storage, "bucket", "a/")
+
+    assert counts == {'added': 2, 'changed': 0, 'unchanged': 0, 'removed': 0}
+    assert inventory.is_fresh("bucket", "a/1")
+    assert not inventory.is_fresh("bucket", "b/")
+    assert [obj.key for obj in inventory.objects("bucket", "a/")] == ["a/1", "a/2"]
+    assert inventory.get("bucket", "b/1") is None
+
+
+def test_refresh_is_incremental(tmp_path):
+    """Test dat alleen nieuwe of gewijzigde objecten opnieuw een HEAD-verzoek krijgen."""
+    inventory = S3Inventory(tmp_path / "inventory.sqlite")
+    storage = ListingStub([RemoteObject("a/1", "e1", 1, "t1"), RemoteObject("a/2", "e2", 2, "t1")])
+    inventory.refresh(storage, "bucket", "a/", with_metadata=True)
+    assert sorted(storage.heads) == ["a/1", "a/2"]
+
+    storage.heads.clear()
+    storage.objects = [RemoteObject("a/1", "e1", 1, "t1"), RemoteObject("a/3", "e4", 4, "t2")]
+    counts = inventory.refresh(storage, "bucket", "a/", with_metadata=True)
+
+    assert counts == {'added': 1, 'changed': 0, 'unchanged': 1, 'removed': 1}
+    assert storage.heads == ["a/3"]
+    assert inventory.get_metadata("bucket", "a/1") == {"md5hash": "a/1"}
+    assert inventory.get("bucket", "a/2") is None
+
+
+def test_write_through_and_max_age(tmp_path):
+    """Test dat eigen uploads en verwijderingen worden bijgehouden en dat een verversing verloopt."""
+    inventory = S3Inventory(tmp_path / "inventory.sqlite", max_age=0.05)
+    inventory.refresh(ListingStub([]), "bucket")
+    inventory.record_upload("bucket", "x", "etag", 10, {"partsize": "8"})
+    assert inventory.get("bucket", "x") == RemoteObject("x", "etag", 10, None)
+    assert inventory.get_metadata("bucket", "x") == {"partsize": "8"}
+
+    inventory.record_deleted("bucket", ["x"])
+    assert inventory.get("bucket", "x") is None
+
+    time.sleep(0.1)
+    assert not inventory.is_fresh("bucket", "x")
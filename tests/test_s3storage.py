@@ -0,0 +1,252 @@
+import base64
+import hashlib
+import os
+from dataclasses import replace
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+from razu.s3storage import S3Storage, ChecksumMismatchError
+from razu.transfer_profiles import TransferProfile, MB
+import razu.util as util
+
+
+@pytest.fixture
+def stubbed_storage(monkeypatch):
+    """An S3Storage whose client only answers the responses queued on its Stubber."""
+    monkeypatch.setenv("S3_ACCESS_KEY", "test")
+    monkeypatch.setenv("S3_SECRET_KEY", "test")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.delenv("S3_ENDPOINT", raising=False)
+    storage = S3Storage(TransferProfile("test", multipart_threshold=8 * MB, multipart_chunksize=5 * MB,
+                                        max_concurrency=1))
+    with Stubber(storage.s3_client) as stubber:
+        yield storage, stubber
+
+
+def content_md5(data: bytes) -> str:
+    return base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+
+
+def test_md5_mismatch_is_raised_before_sending(stubbed_storage, tmp_path):
+    """Test dat een afwijkende MD5 een fout geeft voordat er een verzoek verstuurd wordt."""
+    storage, stubber = stubbed_storage
+    local_file = tmp_path / "a.json"
+    local_file.write_bytes(b"{}")
+    with pytest.raises(ChecksumMismatchError):
+        storage.put_file("bucket", "a.json", str(local_file), {}, expected_md5="0" * 32)
+    stubber.assert_no_pending_responses()
+
+
+def test_multipart_sends_content_md5_per_part_and_aborts_on_mismatch(stubbed_storage, tmp_path):
+    """Test dat ieder deel met eigen Content-MD5 verstuurd wordt en de upload bij een afwijkende MD5 afgebroken."""
+    storage, stubber = stubbed_storage
+    data = os.urandom(9 * MB)
+    local_file = tmp_path / "scan.tif"
+    local_file.write_bytes(data)
+    parts = [data[:5 * MB], data[5 * MB:]]
+
+    stubber.add_response('create_multipart_upload', {'UploadId': 'upload-1'},
+                         {'Bucket': "bucket", 'Key': "scan.tif", 'Metadata': {'PartSize': str(5 * MB)},
+                          'ContentType': "image/tiff"})
+    for part_number, part in enumerate(parts, 1):
+        stubber.add_response('upload_part', {'ETag': f'"{hashlib.md5(part).hexdigest()}"'},
+                             {'Bucket': "bucket", 'Key': "scan.tif", 'UploadId': "upload-1",
+                              'PartNumber': part_number, 'Body': part, 'ContentMD5': content_md5(part)})
+    stubber.add_response('abort_multipart_upload', {},
+                         {'Bucket': "bucket", 'Key': "scan.tif", 'UploadId': "upload-1"})
+
+    with pytest.raises(ChecksumMismatchError):
+        storage.put_file("bucket", "scan.tif", str(local_file), {}, expected_md5="0" * 32)
+    stubber.assert_no_pending_responses()
+
+
+def test_controller_does_not_retry_on_top_of_botocore(stubbed_storage, tmp_path):
+    """Test dat een gethrottelde upload niet door de controller herhaald wordt, maar wel het venster verkleint."""
+    storage, stubber = stubbed_storage
+    local_file = tmp_path / "a.json"
+    local_file.write_bytes(b"{}")
+    stubber.add_client_error('put_object', 'SlowDown', http_status_code=503)
+    window = storage.controller.window
+    with pytest.raises(ClientError):
+        storage.controller.call(storage.put_file, "bucket", "a.json", str(local_file), {})
+    stubber.assert_no_pending_responses()
+    assert storage.controller.throttled >= 1
+    assert storage.controller.window < window
+
+
+def test_expect_header_is_dropped_for_small_bodies(edepot, tmp_path):
+    """Test dat 'Expect: 100-continue' alleen onder small_object_threshold wordt weggelaten."""
+    sent = {}
+    edepot.s3_client.meta.events.register(
+        'before-send.s3.PutObject', lambda request=None, **kwargs: sent.update(
+            {request.url.rsplit('/', 1)[-1]: request.headers.get('Expect')}))
+    threshold = edepot.transfer_profile.small_object_threshold
+    for name, size in (("small.json", 100), ("large.json", threshold + 1)):
+        (tmp_path / name).write_bytes(b"x" * size)
+        edepot.put_file("g0321", name, str(tmp_path / name), {})
+    assert sent["small.json"] is None
+    assert sent["large.json"] == b"100-continue"
+
+
+def test_content_type_uses_last_two_extensions():
+    """Test dat het Content-Type uit de laatste twee extensies bepaald wordt."""
+    assert S3Storage._content_type("NL-WbDRAZU-G0321-661/NL-WbDRAZU-G0321-661-1.meta.json") == "application/json"
+    assert S3Storage._content_type("scans/NL-WbDRAZU-G0321-661-2.tif") == "image/tiff"
+    assert S3Storage._content_type("data/archief.tar.gz") == "application/x-tar"
+    assert S3Storage._content_type("data/zonder-extensie") == "application/octet-stream"
+
+
+def test_force_delete_bucket_with_more_than_1000_versions(edepot, monkeypatch):
+    """Test dat force-delete alle versies en delete markers in batches van maximaal 1000 verwijdert."""
+    # moto fails to list versions of a key whose versions were all deleted, which S3 allows; so all
+    # pages are listed before the first batch is deleted
+    iter_object_versions = edepot._iter_object_versions
+    monkeypatch.setattr(edepot, '_iter_object_versions',
+                        lambda *args, **kwargs: iter(list(iter_object_versions(*args, **kwargs))))
+    pages = []
+    edepot.s3_client.meta.events.register('after-call.s3.ListObjectVersions',
+                                          lambda parsed=None, **kwargs: pages.append(parsed))
+    edepot.set_bucket_versioning("g0321")
+    for i in range(1100):
+        edepot.s3_client.put_object(Bucket="g0321", Key=f"k{i:04d}", Body=b"v1")
+    for i in range(0, 1100, 10):
+        edepot.s3_client.put_object(Bucket="g0321", Key=f"k{i:04d}", Body=b"v2")
+        edepot.s3_client.delete_object(Bucket="g0321", Key=f"k{i + 1:04d}")
+    batches = []
+    edepot.s3_client.meta.events.register(
+        'before-parameter-build.s3.DeleteObjects', lambda params=None, **kwargs: batches.append(
+            len(params['Delete']['Objects'])))
+
+    assert edepot.delete_bucket("g0321", force=True)
+    # 1100 versions, 110 overwrites and 110 delete markers
+    assert sum(batches) >= 1320
+    assert max(batches) <= 1000 and len(batches) >= 2
+    assert len(pages) >= 2
+    assert "g0321" not in [bucket['Name'] for bucket in edepot.s3_client.list_buckets()['Buckets']]
+
+
+@pytest.mark.parametrize("size", [300, 12 * MB])
+def test_sha256_checksum_round_trip(edepot, tmp_path, size):
+    """Test dat een SHA256-checksum (enkelvoudig of composite) bewaard en tegen het lokale bestand gecontroleerd wordt."""
+    local_file = tmp_path / "scan.bin"
+    local_file.write_bytes(os.urandom(size))
+    uploaded = edepot.put_file("g0321", "scan.bin", str(local_file), {}, checksum_algorithm="sha256")
+    assert uploaded.checksum_algorithm == "SHA256"
+
+    remote = edepot.get_object_checksum("g0321", "scan.bin")
+    assert remote.algorithm == "SHA256"
+    assert remote.is_composite == (size > MB)
+    assert remote.value.split('-')[0] == uploaded.checksum.split('-')[0]
+    if remote.is_composite:
+        assert remote.part_size == 5 * MB
+    assert edepot.verify_checksum("g0321", "scan.bin", str(local_file)) is True
+
+    other_file = tmp_path / "other.bin"
+    other_file.write_bytes(os.urandom(size))
+    assert edepot.verify_checksum("g0321", "scan.bin", str(other_file)) is False
+
+
+def test_resume_multipart_upload_sends_only_missing_parts(edepot, tmp_path, monkeypatch):
+    """Test dat een onderbroken multipart upload hervat wordt zonder de al geüploade delen opnieuw te versturen."""
+    # One part at a time, so the parts before the failing one are uploaded
+    storage = S3Storage(replace(edepot.transfer_profile, max_concurrency=1))
+    data = os.urandom(18 * MB)
+    local_file = tmp_path / "scan.tif"
+    local_file.write_bytes(data)
+    started = []
+    sent = []
+    failing_parts = [3]
+    upload_part = storage._upload_part
+
+    def failing_upload_part(bucket_name, object_key, upload_id, part_number, *args):
+        sent.append(part_number)
+        if part_number in failing_parts:
+            failing_parts.remove(part_number)
+            raise ConnectionError("connection reset")
+        return upload_part(bucket_name, object_key, upload_id, part_number, *args)
+
+    monkeypatch.setattr(storage, '_upload_part', failing_upload_part)
+    record = lambda upload_id, part_size: started.append((upload_id, part_size))
+    with pytest.raises(ConnectionError):
+        storage.put_file("g0321", "scan.tif", str(local_file), {}, on_multipart_started=record)
+    assert sent == [1, 2, 3]
+    (upload_id, part_size), = started
+
+    sent.clear()
+    result = storage.put_file("g0321", "scan.tif", str(local_file), {}, upload_id=upload_id, part_size=part_size,
+                              on_multipart_started=record)
+    assert sent == [3, 4]
+    assert len(started) == 1
+    assert result.md5 == hashlib.md5(data).hexdigest()
+    assert result.etag == util.calculate_multipart_etag(str(local_file), part_size)
+    assert storage.s3_client.head_object(Bucket="g0321", Key="scan.tif")['ETag'] == f'"{result.etag}"'
+
+
+def test_resume_expired_multipart_upload_starts_a_new_one(edepot, tmp_path):
+    """Test dat een verlopen upload_id (NoSuchUpload) tot een nieuwe multipart upload leidt."""
+    local_file = tmp_path / "scan.tif"
+    local_file.write_bytes(os.urandom(12 * MB))
+    expired_id = edepot.s3_client.create_multipart_upload(Bucket="g0321", Key="scan.tif")['UploadId']
+    edepot.s3_client.abort_multipart_upload(Bucket="g0321", Key="scan.tif", UploadId=expired_id)
+
+    started = []
+    result = edepot.put_file("g0321", "scan.tif", str(local_file), {}, upload_id=expired_id, part_size=5 * MB,
+                             on_multipart_started=lambda upload_id, part_size: started.append(upload_id))
+    assert len(started) == 1 and started[0] != expired_id
+    assert result.etag == util.calculate_multipart_etag(str(local_file), 5 * MB)
+
+
+def test_verify_multipart_upload_without_download(edepot, tmp_path, monkeypatch):
+    """Test dat een multipart upload met de vastgelegde partsize gecontroleerd wordt, zonder download."""
+    def no_download(*args, **kwargs):
+        raise AssertionError("verify_upload downloaded the object")
+
+    monkeypatch.setattr(edepot.s3_client, 'download_file', no_download)
+    data = os.urandom(12 * MB)
+    local_file = tmp_path / "scan.tif"
+    local_file.write_bytes(data)
+    edepot.put_file("g0321", "scan.tif", str(local_file), {})
+    local_md5 = hashlib.md5(data).hexdigest()
+    assert edepot.verify_upload("g0321", "scan.tif", local_md5, str(local_file)) is True
+
+    local_file.write_bytes(data[:-1] + bytes([data[-1] ^ 1]))
+    assert edepot.verify_upload("g0321", "scan.tif", local_md5, str(local_file)) is False
+
+
+def test_copy_keeps_multipart_etag_and_metadata(edepot, tmp_path):
+    """Test dat een multipart object met gelijke ETag, metadata en Content-Type gekopieerd wordt."""
+    edepot.check_or_create_bucket("g0999")
+    local_file = tmp_path / "scan.tif"
+    local_file.write_bytes(os.urandom(12 * MB))
+    edepot.put_file("g0321", "a/scan.tif", str(local_file), {'MD5HashDate': "2025-01-01T00:00:00"})
+
+    copied = edepot.copy_file("g0321", "a/scan.tif", "g0999", "b/scan.tif")
+    source = edepot.s3_client.head_object(Bucket="g0321", Key="a/scan.tif")
+    target = edepot.s3_client.head_object(Bucket="g0999", Key="b/scan.tif")
+    assert source['ETag'].endswith('-3"')
+    assert target['ETag'] == source['ETag'] == f'"{copied.etag}"'
+    assert target['Metadata'] == source['Metadata']
+    assert target['Metadata']['partsize'] == str(5 * MB)
+    assert target['ContentType'] == "image/tiff"
+
+
+def test_copy_derives_part_size_from_first_part(edepot):
+    """Test dat zonder PartSize-metadata de partgrootte van het eerste deel gebruikt en vastgelegd wordt."""
+    data = os.urandom(14 * MB)
+    client = edepot.s3_client
+    upload_id = client.create_multipart_upload(Bucket="g0321", Key="scan.tif")['UploadId']
+    parts = []
+    for part_number, first in enumerate(range(0, len(data), 6 * MB), 1):
+        response = client.upload_part(Bucket="g0321", Key="scan.tif", UploadId=upload_id, PartNumber=part_number,
+                                      Body=data[first:first + 6 * MB])
+        parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+    source_etag = client.complete_multipart_upload(Bucket="g0321", Key="scan.tif", UploadId=upload_id,
+                                                   MultipartUpload={'Parts': parts})['ETag']
+
+    copied = edepot.copy_file("g0321", "scan.tif", "g0321", "copy.tif")
+    assert copied.part_size == 6 * MB
+    target = client.head_object(Bucket="g0321", Key="copy.tif")
+    assert target['ETag'] == source_etag
+    assert target['Metadata']['partsize'] == str(6 * MB)
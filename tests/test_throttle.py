@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from razu.throttle import ConcurrencyController, RateLimits, TokenBucket, is_throttling_error
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'PutObject')
+
+
+def test_error_classification():
+    """Test dat throttling herkend wordt."""
+    assert is_throttling_error(client_error('SlowDown'))
+    assert is_throttling_error(client_error('503'))
+    assert not is_throttling_error(client_error('InternalError'))
+    assert not is_throttling_error(ValueError("checksum"))
+
+
+def test_window_aimd():
+    """Test dat het venster additief groeit en bij throttling halveert."""
+    controller = ConcurrencyController(max_window=8, initial_window=4, cooldown=0)
+    for _ in range(4):
+        controller.on_success()
+    assert 4.5 < controller.window < 5
+    controller.on_throttle()
+    assert controller.window < 2.5
+    for _ in range(100):
+        controller.on_throttle()
+    assert controller.window == 1
+
+
+def test_call_does_not_retry():
+    """Test dat een mislukte aanroep niet herhaald wordt en throttling het venster verkleint."""
+    controller = ConcurrencyController(max_window=8, cooldown=0)
+    attempts = []
+
+    def put(code):
+        attempts.append(code)
+        raise client_error(code)
+
+    with pytest.raises(ClientError):
+        controller.call(put, 'InternalError')
+    assert controller.window == 8
+    with pytest.raises(ClientError):
+        controller.call(put, 'SlowDown')
+    assert attempts == ['InternalError', 'SlowDown']
+    assert controller.window == 4
+    assert controller.call(lambda: "ok") == "ok"
+    assert controller.in_flight == 0
+
+
+def test_window_limits_calls_in_flight():
+    """Test dat niet meer aanroepen tegelijk lopen dan het venster toelaat."""
+    controller = ConcurrencyController(max_window=2)
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    threads = [threading.Thread(target=controller.call, args=(call,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max_active == 2
+
+
+def test_token_bucket_limits_rate():
+    """Test dat de token bucket het gemiddelde tempo begrenst."""
+    bucket = TokenBucket(rate=100, burst=10)
+    start = time.monotonic()
+    for _ in range(30):
+        bucket.acquire(1)
+    assert time.monotonic() - start >= 0.15
+
+
+def test_rate_limits_reload_control_file(tmp_path):
+    """Test dat gewijzigde limieten uit het controlebestand worden overgenomen."""
+    control_file = tmp_path / "limits.yaml"
+    control_file.write_text("bytes_per_second: 1MB\nrequests_per_second: 10\n")
+    limits = RateLimits(control_file=str(control_file), check_interval=0)
+    assert limits.bytes_per_second == 1024 * 1024
+    assert limits.requests_per_second == 10
+
+    control_file.write_text("bytes_per_second:\nrequests_per_second: 50\n")
+    os.utime(control_file, (time.time() + 5, time.time() + 5))
+    limits.throttle_request()
+    assert limits.bytes_per_second is None
+    assert limits.requests_per_second == 50
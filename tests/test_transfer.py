@@ -0,0 +1,89 @@
+import threading
+import time
+
+from razu.transfer import (ByteBudget, TransferReport, TransferResult, batched, run_concurrently, schedule_by_size,
+                           UPLOADED, SKIPPED, FAILED)
+
+
+def test_report_summary_and_status():
+    """Test dat het rapport resultaten per status telt."""
+    report = TransferReport()
+    report.add(TransferResult("a", UPLOADED, size=10))
+    report.add(TransferResult("b", UPLOADED, size=5))
+    report.add(TransferResult("c", SKIPPED, reason="exists"))
+    report.add(TransferResult("d", FAILED, error="boom"))
+
+    assert report.summary == {UPLOADED: 2, SKIPPED: 1, FAILED: 1}
+    assert [result.key for result in report.failed] == ["d"]
+    assert report.total_bytes == 15
+
+
+def test_run_concurrently_returns_all_results():
+    """Test dat iedere taak precies één resultaat oplevert."""
+    keys = [f"key-{i}" for i in range(100)]
+    results = list(run_concurrently(keys, lambda key: TransferResult(key, UPLOADED), workers=8))
+    assert sorted(result.key for result in results) == sorted(keys)
+
+
+def test_run_concurrently_uses_multiple_workers():
+    """Test dat taken daadwerkelijk gelijktijdig draaien."""
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def worker(key):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return TransferResult(key, UPLOADED)
+
+    list(run_concurrently(range(20), worker, workers=4))
+    assert 1 < max_active <= 4
+
+
+def test_run_concurrently_respects_byte_budget():
+    """Test dat het aantal bytes in uitvoering de limiet niet overschrijdt."""
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def worker(size):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += size
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= size
+        return TransferResult(str(size), UPLOADED)
+
+    sizes = [40, 30, 20, 10] * 5
+    list(run_concurrently(sizes, worker, workers=8, size_of=lambda size: size, max_bytes_in_flight=50))
+    assert max_in_flight <= 50
+
+
+def test_byte_budget_admits_oversized_item_when_idle():
+    """Test dat een item groter dan het budget wordt toegelaten als er niets anders loopt."""
+    budget = ByteBudget(max_bytes=10)
+    with budget.reserve(100):
+        assert budget.in_flight == 100
+    assert budget.in_flight == 0
+
+
+def test_batched_splits_lazily():
+    """Test dat batched vaste porties oplevert met een kleinere laatste portie."""
+    assert list(batched(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
+
+
+def test_schedule_by_size_starts_largest_and_interleaves_small():
+    """Test dat grote bestanden eerst komen, met kleine bestanden ertussen en aan het eind."""
+    sizes = [1, 100, 2, 300, 3, 4, 200, 5]
+    schedule = schedule_by_size(sizes, lambda size: size, large_threshold=100)
+    assert schedule == [300, 5, 4, 200, 3, 2, 100, 1]
+    assert sorted(schedule) == sorted(sizes)
+    assert schedule_by_size([1, 3, 2], lambda size: size, large_threshold=100) == [3, 2, 1]
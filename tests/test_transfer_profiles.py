@@ -0,0 +1,48 @@
+import pytest
+from pathlib import Path
+from razu.config import Config
+from razu.transfer_profiles import TransferProfile, TRANSFER_PROFILES, get_transfer_profile, MB
+
+@pytest.fixture
+def config():
+    """Create a Config instance with a custom transfer profile."""
+    Config.reset()
+    yield Config.initialize(config_file=str(Path(__file__).parent / 'fixtures' / 'test_transfer_profiles.yaml'))
+    Config.reset()
+
+def test_builtin_profile_by_name():
+    """Test opvragen van een ingebouwd profiel zonder configuratie."""
+    Config.reset()
+    profile = get_transfer_profile('large-scans')
+    assert profile is TRANSFER_PROFILES['large-scans']
+    assert profile.transfer_config().multipart_chunksize == 64 * MB
+    assert profile.client_config().max_pool_connections == 32
+
+def test_default_profile_without_config():
+    """Test dat zonder configuratie het default profiel gebruikt wordt."""
+    Config.reset()
+    assert get_transfer_profile().name == 'default'
+
+def test_profile_instance_is_returned_as_is():
+    """Test dat een TransferProfile-instantie ongewijzigd teruggegeven wordt."""
+    profile = TransferProfile('custom', max_concurrency=3)
+    assert get_transfer_profile(profile) is profile
+
+def test_profile_from_config(config):
+    """Test een profiel uit config.yaml dat een ingebouwd profiel aanpast."""
+    profile = get_transfer_profile()
+    assert profile.name == 'nas-scans'
+    assert profile.multipart_chunksize == 128 * MB
+    assert profile.max_concurrency == 8
+    assert profile.small_object_threshold == 256 * 1024
+    assert profile.max_pool_connections == TRANSFER_PROFILES['large-scans'].max_pool_connections
+
+def test_unknown_profile(config):
+    """Test dat een onbekend profiel een ValueError geeft."""
+    with pytest.raises(ValueError):
+        get_transfer_profile('does-not-exist')
+
+def test_single_part_memory_of_small_files_profile():
+    """Test dat 64 workers met enkelvoudige uploads onder de drempel samen hooguit 1 GB in het geheugen houden."""
+    profile = TRANSFER_PROFILES['many-small-files']
+    assert profile.max_pool_connections * profile.multipart_threshold <= 1024 * MB
@@ -1,5 +1,6 @@
+import hashlib
 import pytest
-from razu.util import normalize_path, date_type
+from razu.util import normalize_path, date_type, calculate_multipart_etag
 from rdflib import Literal, XSD
 from datetime import date
 
@@ -95,3 +96,19 @@ def test_date_type_partial_date():
     assert isinstance(result, Literal)
     assert result.datatype is None
     assert result.value == "2023-12"  # Partial date blijft een string
+
+def test_calculate_multipart_etag(tmp_path):
+    """Test berekening van de multipart ETag (MD5 van de MD5's van de parts)."""
+    data = bytes(range(256)) * 10
+    file_path = tmp_path / "scan.tif"
+    file_path.write_bytes(data)
+    part_size = 1000
+    parts = [data[i:i + part_size] for i in range(0, len(data), part_size)]
+    expected = hashlib.md5(b"".join(hashlib.md5(part).digest() for part in parts)).hexdigest()
+    assert calculate_multipart_etag(str(file_path), part_size) == f"{expected}-3"
+
+def test_calculate_multipart_etag_exact_multiple(tmp_path):
+    """Test dat een bestand van precies twee parts geen lege derde part krijgt."""
+    file_path = tmp_path / "scan.tif"
+    file_path.write_bytes(b"a" * 2000)
+    assert calculate_multipart_etag(str(file_path), 1000).endswith("-2")
@@ -0,0 +1,123 @@
+"""
+Read-only comparison of a manifest with the objects in the bucket.
+
+Streams the paginated listing of the collection prefix and merges it with the sorted manifest keys, so memory
+use does not grow with the listing. Reports every key that is missing in the bucket, extra in the bucket, or
+stored with another ETag (MD5Hash) or size than the manifest lists, as JSON lines. Multipart ETags are not an
+MD5, so a multipart object of the listed size is reported as unverified; verify_files_from_manifest checks
+them against the local files.
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from razu.config import Config
+from razu.edepot import EDepot
+from razu.manifest import Manifest
+from razu.s3storage import RemoteObject
+
+MATCH = 'match'
+MISSING = 'missing'
+EXTRA = 'extra'
+MISMATCH = 'mismatch'
+UNVERIFIED = 'unverified-multipart'
+
+
+def diff_sorted(manifest_items: Iterable[Tuple[str, dict]], remote_objects: Iterable[RemoteObject]) -> Iterator[dict]:
+    """
+    Merges manifest entries and listed objects, both sorted by key, and yields a record for every key.
+
+    Both inputs must be in the same order. S3 lists keys in UTF-8 byte order, which equals the order of
+    Python's sorted() on str.
+
+    :param manifest_items: (key, properties) pairs sorted by key, properties as in ManifestEntry.to_dict.
+    :param remote_objects: RemoteObjects sorted by key, e.g. S3Storage.iter_objects.
+    :return: Iterator of dicts with 'key' and 'status' (match, missing, extra, mismatch or
+             unverified-multipart) and details.
+    """
+    manifest_iter = iter(manifest_items)
+    remote_iter = iter(remote_objects)
+    entry = next(manifest_iter, None)
+    remote = next(remote_iter, None)
+    previous_key = None
+    while entry is not None or remote is not None:
+        if remote is not None:
+            if previous_key is not None and remote.key <= previous_key:
+                raise ValueError(f"Listing is not sorted: '{remote.key}' after '{previous_key}'")
+        if remote is None or (entry is not None and entry[0] < remote.key):
+            key, properties = entry
+            yield {'key': key, 'status': MISSING, 'md5': properties.get('MD5Hash')}
+            entry = next(manifest_iter, None)
+        elif entry is None or remote.key < entry[0]:
+            yield {'key': remote.key, 'status': EXTRA, 'etag': remote.etag, 'size': remote.size}
+            previous_key = remote.key
+            remote = next(remote_iter, None)
+        else:
+            key, properties = entry
+            record = {'key': key, 'status': MATCH, 'md5': properties.get('MD5Hash'), 'etag': remote.etag,
+                      'size': remote.size}
+            file_size = properties.get('FileSize')
+            if remote.is_multipart:
+                if file_size is not None and int(file_size) != remote.size:
+                    record['status'] = MISMATCH
+                    record['reason'] = 'size'
+                else:
+                    record['status'] = UNVERIFIED
+            elif not EDepot.is_unchanged(remote, properties):
+                record['status'] = MISMATCH
+                record['reason'] = 'etag'
+            yield record
+            previous_key = remote.key
+            entry = next(manifest_iter, None)
+            remote = next(remote_iter, None)
+
+
+def diff_manifest(manifest_file: str, bucket_name: Optional[str] = None, prefix: Optional[str] = None,
+                  storage: Optional[EDepot] = None) -> Iterator[dict]:
+    """Diffs a manifest file against the listing of its collection prefix; the manifest file itself is skipped."""
+    manifest_path = Path(manifest_file).resolve()
+    manifest = Manifest.load_existing(str(manifest_path.parent), manifest_path.name)
+    storage = storage or EDepot()
+    bucket_name = bucket_name or storage._get_bucket_name(str(manifest_path))
+    prefix = prefix if prefix is not None else storage._get_collection_prefix(manifest)
+
+    manifest_items = ((key, manifest.entries[key].to_dict()) for key in sorted(manifest.entries))
+    remote_objects = (obj for obj in storage.iter_objects(bucket_name, prefix)
+                      if obj.key.rsplit('/', 1)[-1] != manifest_path.name)
+    return diff_sorted(manifest_items, remote_objects)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a manifest with the objects in the bucket (read-only).")
+    parser.add_argument("manifest", help="Path to the manifest file")
+    parser.add_argument("--bucket", help="Bucket name (default: the path segment after 'nl-wbdrazu')")
+    parser.add_argument("--prefix", help="Prefix to list (default: the common prefix of the manifest keys)")
+    parser.add_argument("--output", "-o", help="Write the differences as JSON lines to this file (default: stdout)")
+    parser.add_argument("--all", action="store_true", help="Also report matching keys")
+    parser.add_argument("--config", help="config.yaml to use (default: the usual lookup)")
+    args = parser.parse_args(argv)
+
+    Config.initialize(args.config)
+    counts = Counter()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in diff_manifest(args.manifest, args.bucket, args.prefix):
+            counts[record['status']] += 1
+            if args.all or record['status'] != MATCH:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"{counts[MATCH]} match, {counts[MISSING]} missing, {counts[EXTRA]} extra, {counts[MISMATCH]} mismatch, "
+          f"{counts[UNVERIFIED]} multipart unverified.",
+          file=sys.stderr)
+    return 1 if counts[MISSING] or counts[EXTRA] or counts[MISMATCH] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())